@@ -0,0 +1,84 @@
+"""Hot/cold split of appointments.
+
+Completed and cancelled appointments dated before the archive horizon
+(``APPOINTMENT_ARCHIVE_AFTER_DAYS`` before today) are moved, batch by batch,
+from ``Appointment`` to ``ArchivedAppointment`` by
+``manage.py archive_appointments``. ``Appointment`` and its indexes then only
+hold the recent past and the future, which is all that booking, overlap
+checks and the schedule ever read.
+
+Reports and patient history merge in the archive (``read.appointment_rows``
+with ``archived=``) when their dates reach back before the horizon. As the
+archive never holds rows after the horizon, that needs no query; it is why
+``APPOINTMENT_ARCHIVE_AFTER_DAYS`` may be lowered but must not be raised once
+appointments have been archived.
+
+Archiving is not an appointment change: the moved rows keep counting in
+``DailyStatusRollup`` and are not written to the change log. The write hooks
+in ``signals.py`` skip them while ``in_progress()``.
+"""
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import versions
+from .models import Appointment, ArchivedAppointment, DoctorDay
+
+_archiving = ContextVar("appointments_archiving", default=False)
+
+
+def in_progress():
+    return _archiving.get()
+
+
+def horizon():
+    """The first date that is never archived."""
+    return timezone.localdate() - timedelta(days=settings.APPOINTMENT_ARCHIVE_AFTER_DAYS)
+
+
+def reaches_archive(date_from):
+    """Whether a range starting at ``date_from`` may include archived rows."""
+    return date_from is None or date_from < horizon()
+
+
+def archive_batch(before, status_ids, batch_size):
+    """Move up to ``batch_size`` of the oldest archivable appointments.
+
+    Returns how many were moved and the date of the last one, ``(0, None)``
+    when nothing is left. Each batch is one transaction, so an interrupted run
+    loses nothing and the next one carries on where it stopped.
+    """
+    with transaction.atomic():
+        rows = list(
+            Appointment.objects.select_for_update()
+            .filter(date__lt=before, status_id__in=status_ids)
+            .order_by("date", "id")[:batch_size]
+        )
+        if not rows:
+            return 0, None
+
+        fields = [field.attname for field in Appointment._meta.concrete_fields]
+        ArchivedAppointment.objects.bulk_create(
+            ArchivedAppointment(**{name: getattr(row, name) for name in fields})
+            for row in rows
+        )
+        token = _archiving.set(True)
+        try:
+            Appointment.objects.filter(pk__in=[row.pk for row in rows]).delete()
+        finally:
+            _archiving.reset(token)
+
+        # Bitmaps of these days are rebuilt from the hot rows when next locked.
+        pairs = {(row.doctor_id, row.date) for row in rows}
+        dates_by_doctor = {}
+        for doctor_id, date in pairs:
+            dates_by_doctor.setdefault(doctor_id, []).append(date)
+        for doctor_id, dates in dates_by_doctor.items():
+            DoctorDay.objects.filter(doctor_id=doctor_id, date__in=dates).delete()
+
+        # Schedules of these days lose the rows; reports read them from the archive.
+        versions.bump_directory()
+    return len(rows), rows[-1].date
@@ -0,0 +1,92 @@
+"""Async versions of the schedule, change stream and report endpoints.
+
+They share parameter parsing and querysets with the DRF views in
+``views.py`` and return byte-identical JSON (and ETags). ``urls`` route to
+them when ``ASYNC_READ_VIEWS`` is on, which is meant for the ASGI
+deployment; see DEPLOY_ASGI.md.
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import Sum
+
+from common.async_views import AsyncAPIView
+from .changes import aevent_stream, last_seq
+from .read import aappointment_rows
+from .status_registry import statuses
+from .versions import aconditional_get
+from .views import ChangeStreamMixin, DailyReportMixin, DoctorReportMixin, ScheduleMixin
+
+
+class AsyncScheduleView(ScheduleMixin, AsyncAPIView):
+    replica_reads = True
+
+    @aconditional_get
+    async def get(self, request):
+        return self.render(await aappointment_rows(self.get_queryset(request)))
+
+
+class AsyncScheduleChangeStreamView(ChangeStreamMixin, AsyncAPIView):
+    async def get(self, request):
+        since, date, doctor_id = self._stream_params(request)
+        if since is None:
+            since = await sync_to_async(last_seq)()
+        else:
+            await sync_to_async(self._check_since)(since)
+        return self._stream_response(aevent_stream(since, date=date, doctor_id=doctor_id))
+
+
+class AsyncReportMixin:
+    async def _aitem_rows(self, date_from, date_to, **filters):
+        return await aappointment_rows(
+            self._items(date_from, date_to, **filters),
+            archived=self._archived_items(date_from, date_to, **filters),
+        )
+
+    async def _astatus_totals(self, date_from, date_to, **filters):
+        rows = [row async for row in self._totals_rows(date_from, date_to, **filters)]
+        await sync_to_async(self._load_statuses)(rows)
+        return self._format_totals(rows)
+
+    async def _areport(self, request, date_from, date_to, **filters):
+        data = {}
+        if self._include_items(request):
+            data["items"] = await self._aitem_rows(date_from, date_to, **filters)
+        data["totals"] = await self._astatus_totals(date_from, date_to, **filters)
+        return self.render(data)
+
+
+class AsyncDailyReportView(AsyncReportMixin, DailyReportMixin, AsyncAPIView):
+    replica_reads = True
+
+    @aconditional_get
+    async def get(self, request):
+        date_from, date_to = self._parse_range(request)
+        return await self._areport(request, date_from, date_to)
+
+
+class AsyncDoctorDailyReportView(AsyncReportMixin, DoctorReportMixin, AsyncAPIView):
+    replica_reads = True
+
+    @aconditional_get
+    async def get(self, request):
+        date_from, date_to, doctor_id = self.get_version_scope(request)
+        return await self._areport(request, date_from, date_to, doctor_id=doctor_id)
+
+
+class AsyncCancelledReportView(AsyncReportMixin, DailyReportMixin, AsyncAPIView):
+    replica_reads = True
+
+    @aconditional_get
+    async def get(self, request):
+        date_from, date_to = self._parse_range(request)
+        await statuses.aload()
+        cancelled_status = self._cancelled_status()
+        data = {}
+        if self._include_items(request):
+            data["items"] = await self._aitem_rows(
+                date_from, date_to, status=cancelled_status
+            )
+        totals = await self._rollups(date_from, date_to, status=cancelled_status).aaggregate(
+            total=Sum("count")
+        )
+        data["count"] = totals["total"] or 0
+        return self.render(data)
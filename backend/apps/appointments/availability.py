@@ -0,0 +1,152 @@
+"""Free-slot computation for doctors.
+
+All appointments of the requested range are fetched in a single query ordered
+along ``ix_app_doctor_date`` and the gaps are found with an in-memory sweep
+against each doctor's working hours, so looking for a free time never has to
+go through ``Appointment.clean()``.
+"""
+from collections import defaultdict
+from datetime import time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+
+from apps.doctors.models import DoctorWorkingHours
+from .models import Appointment
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minutes(value, round_up=False):
+    minutes = value.hour * 60 + value.minute
+    if round_up and (value.second or value.microsecond):
+        minutes += 1
+    return minutes
+
+
+def from_minutes(minutes):
+    if minutes >= MINUTES_PER_DAY:
+        return time(23, 59, 59)
+    return time(minutes // 60, minutes % 60)
+
+
+def daterange(date_from, date_to):
+    day = date_from
+    while day <= date_to:
+        yield day
+        day += timedelta(days=1)
+
+
+def free_gaps(windows, busy):
+    """Return the parts of ``windows`` not covered by ``busy``.
+
+    Both arguments are lists of ``(start, end)`` minute pairs; ``busy`` must be
+    sorted by start. Runs in O(len(windows) + len(busy)).
+    """
+    gaps = []
+    i = 0
+    for window_start, window_end in sorted(windows):
+        cursor = window_start
+        # Skip intervals that end before this window starts.
+        while i < len(busy) and busy[i][1] <= cursor:
+            i += 1
+        j = i
+        while j < len(busy) and busy[j][0] < window_end:
+            busy_start, busy_end = busy[j]
+            if busy_start > cursor:
+                gaps.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            if cursor >= window_end:
+                break
+            j += 1
+        if cursor < window_end:
+            gaps.append((cursor, window_end))
+    return gaps
+
+
+def slots_in_gaps(gaps, duration, step):
+    """Split gaps into ``duration``-long slots whose starts are aligned to ``step``."""
+    slots = []
+    for gap_start, gap_end in gaps:
+        start = -(-gap_start // step) * step
+        while start + duration <= gap_end:
+            slots.append((start, start + duration))
+            start += step
+    return slots
+
+
+def working_windows(doctor_ids):
+    """Map ``doctor_id -> weekday -> [(start, end), ...]`` in minutes."""
+    windows = defaultdict(lambda: defaultdict(list))
+    rows = DoctorWorkingHours.objects.filter(doctor_id__in=doctor_ids).values_list(
+        "doctor_id", "weekday", "time_start", "time_end"
+    )
+    for doctor_id, weekday, time_start, time_end in rows:
+        windows[doctor_id][weekday].append(
+            (to_minutes(time_start), to_minutes(time_end))
+        )
+
+    default_windows = defaultdict(list)
+    for weekday, start, end in settings.SCHEDULE_DEFAULT_WORKING_HOURS:
+        default_windows[weekday].append(
+            (to_minutes(parse_time(start)), to_minutes(parse_time(end)))
+        )
+    for doctor_id in doctor_ids:
+        if doctor_id not in windows:
+            windows[doctor_id] = default_windows
+    return windows
+
+
+def busy_intervals(doctor_ids, date_from, date_to):
+    """Map ``(doctor_id, date) -> sorted [(start, end), ...]`` of booked minutes."""
+    busy = defaultdict(list)
+    rows = (
+        Appointment.objects.filter(
+            doctor_id__in=doctor_ids, date__gte=date_from, date__lte=date_to
+        )
+        .order_by("doctor_id", "date", "time_start")
+        .values_list("doctor_id", "date", "time_start", "time_end")
+    )
+    for doctor_id, date, time_start, time_end in rows:
+        busy[(doctor_id, date)].append(
+            (to_minutes(time_start), to_minutes(time_end, round_up=True))
+        )
+    return busy
+
+
+def find_available_slots(doctor_ids, date_from, date_to, duration, step=None):
+    """Return bookable slots per doctor and day.
+
+    Every appointment counts as busy regardless of its status, mirroring the
+    overlap rule in ``Appointment.clean()``. Slots that already started today
+    are dropped.
+    """
+    step = step or duration
+    windows = working_windows(doctor_ids)
+    busy = busy_intervals(doctor_ids, date_from, date_to)
+
+    now = timezone.localtime()
+    today, now_minutes = now.date(), to_minutes(now, round_up=True)
+
+    result = []
+    for doctor_id in doctor_ids:
+        for day in daterange(date_from, date_to):
+            if day < today:
+                continue
+            day_windows = windows[doctor_id].get(day.weekday(), [])
+            gaps = free_gaps(day_windows, busy.get((doctor_id, day), []))
+            slots = slots_in_gaps(gaps, duration, step)
+            if day == today:
+                slots = [slot for slot in slots if slot[0] >= now_minutes]
+            result.append(
+                {
+                    "doctor": doctor_id,
+                    "date": day,
+                    "slots": [
+                        {"time_start": from_minutes(start), "time_end": from_minutes(end)}
+                        for start, end in slots
+                    ],
+                }
+            )
+    return result
@@ -0,0 +1,203 @@
+"""Set-based bulk booking.
+
+Rows are validated field by field, foreign keys are checked (and the
+search keys copied onto appointments are read) with one ``IN`` query per
+model, overlaps are checked with one query per doctor plus an
+in-memory sort-and-sweep, and the accepted rows are written with a single
+``bulk_create`` inside one transaction. The affected ``DoctorDay`` ledger rows
+are locked for the duration of that transaction, so the check cannot race
+with other bookings.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import accumulate
+
+from django.db import transaction
+from rest_framework import serializers
+
+from apps.doctors.models import Doctor
+from apps.patients.models import Patient
+from .models import OVERLAP_ERROR, Appointment, DoctorDay
+from .signals import appointments_bulk_created
+from .status_registry import statuses
+
+MAX_BULK_ROWS = 1000
+
+
+class BulkAppointmentRowSerializer(serializers.Serializer):
+    """Field-level validation only; foreign keys are resolved in bulk."""
+
+    patient = serializers.IntegerField(min_value=1)
+    doctor = serializers.IntegerField(min_value=1)
+    date = serializers.DateField()
+    time_start = serializers.TimeField()
+    time_end = serializers.TimeField()
+    status = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    note = serializers.CharField(
+        max_length=500, required=False, allow_blank=True, allow_null=True
+    )
+
+    def validate(self, attrs):
+        if attrs["time_end"] <= attrs["time_start"]:
+            raise serializers.ValidationError("time_end must be after time_start")
+        return attrs
+
+
+def _patient_search_keys(ids):
+    rows = Patient.objects.filter(pk__in=ids).values_list(
+        "pk", "search_name", "search_name_alt", "phone_digits"
+    )
+    return {pk: keys for pk, *keys in rows}
+
+
+def _doctor_ids(ids):
+    return set(Doctor.objects.filter(pk__in=ids).values_list("pk", flat=True))
+
+
+def _booked_intervals(groups):
+    """Fetch booked intervals for every (doctor, date) group.
+
+    One query per doctor covers all of that doctor's dates and walks
+    ``ix_app_doctor_date``. Returns ``(doctor, date) -> (starts, ends, max_ends)``
+    with starts sorted, ready for bisection.
+    """
+    dates_by_doctor = defaultdict(set)
+    for doctor_id, date in groups:
+        dates_by_doctor[doctor_id].add(date)
+
+    booked = defaultdict(list)
+    for doctor_id, dates in dates_by_doctor.items():
+        rows = (
+            Appointment.objects.filter(doctor_id=doctor_id, date__in=dates)
+            .order_by("date", "time_start")
+            .values_list("date", "time_start", "time_end")
+        )
+        for date, time_start, time_end in rows:
+            booked[(doctor_id, date)].append((time_start, time_end))
+
+    result = {}
+    for key, intervals in booked.items():
+        starts = [start for start, _ in intervals]
+        max_ends = list(accumulate((end for _, end in intervals), max))
+        result[key] = (starts, max_ends)
+    return result
+
+
+def _overlaps_booked(booked, time_start, time_end):
+    if not booked:
+        return False
+    starts, max_ends = booked
+    # Intervals starting before our end are the only candidates; the latest
+    # end among them decides whether any of them reaches past our start.
+    i = bisect_left(starts, time_end)
+    return i > 0 and max_ends[i - 1] > time_start
+
+
+def find_conflicts(rows):
+    """Check ``rows`` (index, attrs) against the database and against each other.
+
+    Returns ``index -> error message`` for every rejected row.
+    """
+    groups = defaultdict(list)
+    for index, attrs in rows:
+        groups[(attrs["doctor"], attrs["date"])].append((index, attrs))
+
+    booked = _booked_intervals(groups.keys())
+    errors = {}
+    for key, group in groups.items():
+        group.sort(key=lambda item: (item[1]["time_start"], item[0]))
+        last_end, last_index = None, None
+        for index, attrs in group:
+            if _overlaps_booked(booked.get(key), attrs["time_start"], attrs["time_end"]):
+                errors[index] = OVERLAP_ERROR
+            elif last_end is not None and attrs["time_start"] < last_end:
+                errors[index] = f"Overlaps row {last_index} of this request"
+            else:
+                last_end, last_index = attrs["time_end"], index
+    return errors
+
+
+def insert_appointments(objs, days):
+    """Insert checked appointments with one ``bulk_create``.
+
+    ``days`` are the ``DoctorDay`` rows of their (doctor, date) pairs, locked
+    by the caller's transaction; their bitmaps are updated to match.
+    """
+    objs = Appointment.objects.bulk_create(objs)
+    for obj in objs:
+        day = days[(obj.doctor_id, obj.date)]
+        day.bits |= DoctorDay.mask(obj.time_start, obj.time_end)
+    DoctorDay.objects.bulk_update(days.values(), ["occupancy"])
+    appointments_bulk_created.send(sender=Appointment, appointments=objs)
+    return objs
+
+
+def bulk_book(payload, all_or_nothing=False):
+    """Validate and insert many appointments at once.
+
+    Returns ``(created, errors)`` where ``created`` is a list of
+    ``(index, Appointment)`` and ``errors`` a list of
+    ``{"index": i, "errors": ...}`` dicts in request order.
+    """
+    errors = {}
+    valid = []
+    for index, row in enumerate(payload):
+        serializer = BulkAppointmentRowSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+
+    patient_keys = _patient_search_keys({attrs["patient"] for _, attrs in valid})
+    doctor_ids = _doctor_ids({attrs["doctor"] for _, attrs in valid})
+    status_ids = {status.pk for status in statuses.all()}
+    planned = statuses.get_or_none("planned")
+    planned_id = planned.pk if planned else None
+
+    resolved = []
+    for index, attrs in valid:
+        row_errors = {}
+        if attrs["patient"] not in patient_keys:
+            row_errors["patient"] = ["Invalid pk - object does not exist."]
+        if attrs["doctor"] not in doctor_ids:
+            row_errors["doctor"] = ["Invalid pk - object does not exist."]
+        if attrs.get("status") is None:
+            attrs["status"] = planned_id
+        if attrs["status"] not in status_ids:
+            row_errors["status"] = ["Invalid pk - object does not exist."]
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            resolved.append((index, attrs))
+
+    with transaction.atomic():
+        days = DoctorDay.lock_many((attrs["doctor"], attrs["date"]) for _, attrs in resolved)
+        for index, message in find_conflicts(resolved).items():
+            errors[index] = {"non_field_errors": [message]}
+
+        created = []
+        if not (errors and all_or_nothing):
+            accepted = [(index, attrs) for index, attrs in resolved if index not in errors]
+            objs = insert_appointments(
+                [
+                    Appointment(
+                        patient_id=attrs["patient"],
+                        doctor_id=attrs["doctor"],
+                        date=attrs["date"],
+                        time_start=attrs["time_start"],
+                        time_end=attrs["time_end"],
+                        status_id=attrs["status"],
+                        note=attrs.get("note"),
+                        patient_search=patient_keys[attrs["patient"]][0],
+                        patient_search_alt=patient_keys[attrs["patient"]][1],
+                        patient_phone=patient_keys[attrs["patient"]][2],
+                    )
+                    for _, attrs in accepted
+                ],
+                days,
+            )
+            created = [(index, obj) for (index, _), obj in zip(accepted, objs)]
+
+    return created, [
+        {"index": index, "errors": errors[index]} for index in sorted(errors)
+    ]
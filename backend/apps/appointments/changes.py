@@ -0,0 +1,271 @@
+"""Writing and reading the appointment change log.
+
+Clients keep the last ``seq`` they have seen and ask for what came after it,
+either by polling ``/api/schedule/changes/`` or over the server-sent event
+stream, instead of re-downloading the whole schedule.
+
+``seq`` is not the row id. Ids are taken at insert, so a long transaction
+(bulk booking, a series) can commit a lower id after a reader has moved past
+it. Rows get their ``seq`` after commit instead, from ``number_pending`` in
+an ``on_commit`` hook of the writing transaction: whatever has committed by
+then is numbered above everything numbered before, so a reader never skips a
+change. Readers only read numbered rows and never write. Rows whose hook did
+not run (the process died right after commit) are numbered by
+``manage.py sequence_changes``, run periodically.
+"""
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Func, Max, Subquery
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import BaseRenderer
+
+from . import versions
+from .models import AppointmentChange, VersionCounter
+from .status_registry import statuses
+
+# VersionCounter keys: the last seq given and the last seq pruned.
+SEQUENCE = "change_seq"
+PRUNED = "change_pruned"
+
+_datetime_field = serializers.DateTimeField()
+
+
+def change_data(appointment):
+    status = statuses.by_id(appointment.status_id)
+    return {
+        "id": appointment.pk,
+        "patient": appointment.patient_id,
+        "doctor": appointment.doctor_id,
+        "date": appointment.date.isoformat(),
+        "time_start": appointment.time_start.isoformat(),
+        "time_end": appointment.time_end.isoformat(),
+        "status": appointment.status_id,
+        "status_code": status.code if status else None,
+        "note": appointment.note,
+        "updated_at": _datetime_field.to_representation(appointment.updated_at),
+    }
+
+
+def _change(appointment, action, doctor_id=None, date=None, with_data=True):
+    return AppointmentChange(
+        appointment_id=appointment.pk,
+        action=action,
+        doctor_id=doctor_id if doctor_id is not None else appointment.doctor_id,
+        date=date if date is not None else appointment.date,
+        data=change_data(appointment) if with_data else None,
+    )
+
+
+def _log(changes):
+    AppointmentChange.objects.bulk_create(changes, batch_size=1000)
+    transaction.on_commit(number_pending, robust=True)
+
+
+def record_saved(appointment, previous):
+    if previous is None:
+        _log([_change(appointment, AppointmentChange.CREATED)])
+        return
+    changes = [_change(appointment, AppointmentChange.UPDATED)]
+    previous_doctor_id, previous_date = previous[:2]
+    if (previous_doctor_id, previous_date) != (appointment.doctor_id, appointment.date):
+        changes.insert(
+            0,
+            _change(
+                appointment,
+                AppointmentChange.REMOVED,
+                doctor_id=previous_doctor_id,
+                date=previous_date,
+                with_data=False,
+            ),
+        )
+    _log(changes)
+
+
+def record_deleted(appointment):
+    _log([_change(appointment, AppointmentChange.DELETED, with_data=False)])
+
+
+def record_created(appointments):
+    _log([_change(appointment, AppointmentChange.CREATED) for appointment in appointments])
+
+
+def assign_sequence():
+    """Give a ``seq`` to the committed changes that have none yet.
+
+    One indexed EXISTS when nothing is pending, then ``number_pending``.
+    Returns how many were numbered.
+    """
+    if not AppointmentChange.objects.filter(seq__isnull=True).exists():
+        return 0
+    return number_pending()
+
+
+def _pending_id(function):
+    pending = AppointmentChange.objects.filter(seq__isnull=True).order_by()
+    return Subquery(pending.values(value=Func(F("id"), function=function)))
+
+
+def number_pending():
+    """Number the pending changes; the ``on_commit`` hook of every writer.
+
+    The ``SEQUENCE`` counter is locked, so callers number one after another,
+    and the pending rows get ``seq = id + offset`` above the counter in a
+    single UPDATE. Returns how many were numbered.
+    """
+    with transaction.atomic():
+        # Write before reading: it takes the lock on every backend, SQLite
+        # included, where select_for_update() is a no-op.
+        counter = VersionCounter.objects.filter(key=SEQUENCE)
+        if not counter.update(value=F("value")):
+            last = AppointmentChange.objects.aggregate(last=Max("seq"))["last"] or 0
+            VersionCounter.objects.create(key=SEQUENCE, value=last)
+        value, first, last = counter.values_list(
+            "value", _pending_id("MIN"), _pending_id("MAX")
+        ).get()
+        if first is None:
+            return 0
+        offset = value - first + 1
+        numbered = AppointmentChange.objects.filter(seq__isnull=True, id__lte=last).update(
+            seq=F("id") + offset
+        )
+        counter.update(value=last + offset)
+    return numbered
+
+
+def _counter(key):
+    return VersionCounter.objects.filter(key=key).values_list("value", flat=True).first() or 0
+
+
+def changes_since(since, date=None, doctor_id=None, limit=500):
+    """Return numbered changes after ``since`` in ``seq`` order."""
+    qs = AppointmentChange.objects.filter(seq__isnull=False, seq__gt=since)
+    if date is not None:
+        qs = qs.filter(date=date)
+    if doctor_id is not None:
+        qs = qs.filter(doctor_id=doctor_id)
+    return list(
+        qs.order_by("seq").values(
+            "seq", "action", "appointment_id", "doctor_id", "date", "data", "created_at"
+        )[:limit]
+    )
+
+
+def last_seq():
+    """The highest ``seq`` given so far."""
+    return _counter(SEQUENCE)
+
+
+def pruned_seq():
+    """Changes up to this ``seq`` may have been deleted by ``prune_batch``."""
+    return _counter(PRUNED)
+
+
+def prune_batch(before, batch_size):
+    """Delete up to ``batch_size`` of the oldest changes logged before ``before``.
+
+    Returns how many were deleted. The newest change is always kept, as
+    ``versions`` takes its floor from the lowest id left. Feeds asked for
+    changes after a pruned ``seq`` answer 410 and the client reloads.
+    """
+    assign_sequence()
+    with transaction.atomic():
+        newest = AppointmentChange.objects.aggregate(newest=Max("id"))["newest"]
+        rows = list(
+            AppointmentChange.objects.filter(
+                created_at__lt=before, seq__isnull=False, id__lt=newest or 0
+            )
+            .order_by("seq")
+            .values_list("id", "seq")[:batch_size]
+        )
+        if not rows:
+            return 0
+        AppointmentChange.objects.filter(id__in=[pk for pk, _ in rows]).delete()
+        pruned = rows[-1][1]
+        if not VersionCounter.objects.filter(key=PRUNED).update(value=pruned):
+            VersionCounter.objects.create(key=PRUNED, value=pruned)
+        # Scope versions count changes; they all move once here.
+        versions.bump_directory()
+    return len(rows)
+
+
+def retention_horizon():
+    """Changes logged before this moment may be pruned."""
+    return timezone.now() - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS)
+
+
+def serialize_change(row):
+    return {
+        "seq": row["seq"],
+        "action": row["action"],
+        "appointment": row["appointment_id"],
+        "doctor": row["doctor_id"],
+        "date": row["date"].isoformat(),
+        "data": row["data"],
+        "at": row["created_at"].isoformat(),
+    }
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets DRF negotiate ``text/event-stream``; also renders error bodies."""
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data, default=str).encode(self.charset)
+
+
+def _events(rows):
+    for row in rows:
+        data = json.dumps(serialize_change(row), ensure_ascii=False)
+        yield f"id: {row['seq']}\nevent: change\ndata: {data}\n\n"
+    if not rows:
+        yield ": keep-alive\n\n"
+
+
+def event_stream(since, date=None, doctor_id=None):
+    """Yield server-sent events for changes after ``since``, as a long poll.
+
+    Under WSGI every open stream holds a worker, so this one ends as soon as
+    it has sent changes, or after ``CHANGE_STREAM_WSGI_SECONDS`` of polling
+    every ``CHANGE_STREAM_POLL_SECONDS`` with heartbeats. ``EventSource``
+    reconnects with ``Last-Event-ID`` and picks up where it stopped.
+    """
+    deadline = time.monotonic() + settings.CHANGE_STREAM_WSGI_SECONDS
+    yield "retry: 1000\n\n"
+    while True:
+        rows = changes_since(since, date=date, doctor_id=doctor_id)
+        yield from _events(rows)
+        if rows or time.monotonic() >= deadline:
+            return
+        time.sleep(settings.CHANGE_STREAM_POLL_SECONDS)
+
+
+async def aevent_stream(since, date=None, doctor_id=None):
+    """``event_stream`` for ASGI: waits between polls without holding a thread.
+
+    It stays open up to ``CHANGE_STREAM_MAX_SECONDS``. Django buffers
+    synchronous iterators completely under ASGI, so the stream must be an
+    async generator there.
+    """
+    deadline = time.monotonic() + settings.CHANGE_STREAM_MAX_SECONDS
+    yield "retry: 1000\n\n"
+    while True:
+        rows = await sync_to_async(changes_since)(since, date=date, doctor_id=doctor_id)
+        if rows:
+            since = rows[-1]["seq"]
+        for event in _events(rows):
+            yield event
+        if time.monotonic() >= deadline:
+            return
+        await asyncio.sleep(settings.CHANGE_STREAM_POLL_SECONDS)
@@ -0,0 +1,137 @@
+"""Streaming export of appointments over a date range.
+
+Rows are read with ``QuerySet.iterator()`` over a narrow ``values_list`` and
+written to the response one by one, so memory stays flat however long the
+range is.
+"""
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+from .read import full_name
+from .status_registry import statuses
+
+EXPORT_COLUMNS = [
+    "id",
+    "date",
+    "time_start",
+    "time_end",
+    "doctor",
+    "doctor_name",
+    "patient",
+    "patient_name",
+    "status",
+    "status_code",
+    "status_name",
+    "note",
+]
+CHUNK_SIZE = 2000
+# Spreadsheet apps run cells starting with these as formulas.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class _StreamRenderer(BaseRenderer):
+    """Lets DRF accept ``?format=`` for export; errors are rendered as JSON."""
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data, default=str).encode(self.charset)
+
+
+class CSVStreamRenderer(_StreamRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONStreamRenderer(_StreamRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+def _export_values(queryset):
+    return (
+        queryset.annotate(
+            patient_name=full_name("patient"),
+            doctor_name=full_name("doctor"),
+        )
+        .order_by()
+        .values_list(
+            "id",
+            "date",
+            "time_start",
+            "time_end",
+            "doctor_id",
+            "doctor_name",
+            "patient_id",
+            "patient_name",
+            "status_id",
+            "note",
+        )
+    )
+
+
+def export_rows(queryset, archived=None):
+    """Yield one tuple per appointment, in ``EXPORT_COLUMNS`` order.
+
+    Rows of ``archived``, an ``ArchivedAppointment`` queryset, are merged in.
+    """
+    rows = _export_values(queryset)
+    if archived is not None:
+        rows = rows.union(_export_values(archived), all=True)
+    rows = rows.order_by("date", "time_start", "id")
+    for (
+        pk,
+        date,
+        time_start,
+        time_end,
+        doctor_id,
+        doctor_name,
+        patient_id,
+        patient_name,
+        status_id,
+        note,
+    ) in rows.iterator(chunk_size=CHUNK_SIZE):
+        status = statuses.by_id(status_id)
+        yield (
+            pk,
+            date.isoformat(),
+            time_start.isoformat(),
+            time_end.isoformat(),
+            doctor_id,
+            doctor_name,
+            patient_id,
+            patient_name,
+            status_id,
+            status.code if status else None,
+            status.name if status else None,
+            note,
+        )
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows):
+    """CSV lines of ``rows``; text that would run as a formula is quoted with ``'``."""
+    writer = csv.writer(_Echo())
+    # BOM so spreadsheet apps detect UTF-8 (names are mostly Cyrillic).
+    yield "\ufeff" + writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow([_cell(value) for value in row])
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n"
@@ -0,0 +1,103 @@
+import django_filters
+from django.db.models import Q
+from rest_framework.filters import SearchFilter
+
+from apps.doctors.models import Doctor
+from common.text import digits, fold, is_phone_query, phone_prefixes, prefix_range
+from .models import Appointment
+from .status_registry import statuses
+
+
+class AppointmentFilter(django_filters.FilterSet):
+    """Filters that compile to plain column predicates.
+
+    Doctor, patient and status filter on the FK columns directly (no joins,
+    no existence queries) so the planner can use ``ix_app_doctor_date``,
+    ``ix_app_patient_date`` and ``ix_app_status_date`` together with the
+    date range.
+    """
+
+    date = django_filters.DateFilter(field_name="date")
+    date_from = django_filters.DateFilter(field_name="date", lookup_expr="gte")
+    date_to = django_filters.DateFilter(field_name="date", lookup_expr="lte")
+    doctor = django_filters.NumberFilter(field_name="doctor_id")
+    patient = django_filters.NumberFilter(field_name="patient_id")
+    status = django_filters.CharFilter(method="filter_status")
+
+    class Meta:
+        model = Appointment
+        fields = ["date", "date_from", "date_to", "doctor", "patient", "status"]
+
+    def filter_status(self, queryset, name, value):
+        """Accept status ids or codes, comma-separated (``status=planned,3``)."""
+        status_ids = set()
+        for item in (part.strip() for part in value.split(",")):
+            if not item:
+                continue
+            status = (
+                statuses.by_id(int(item)) if item.isdigit() else statuses.get_or_none(item)
+            )
+            if status is None:
+                return queryset.none()
+            status_ids.add(status.pk)
+        if not status_ids:
+            return queryset
+        if len(status_ids) == 1:
+            return queryset.filter(status_id=status_ids.pop())
+        return queryset.filter(status_id__in=status_ids)
+
+
+class AppointmentSearchFilter(SearchFilter):
+    """``?search=`` as a prefix match on the denormalized search keys.
+
+    A name matches the patient's "last first middle" or "first last middle"
+    key, or a doctor any of whose name words start with the query words; a
+    phone matches the patient's normalized phone digits. Patients are range
+    predicates on their own indexes; doctors are few, so their names are
+    matched in Python and the appointments filtered by ``doctor_id``.
+    """
+
+    min_phone_digits = 3
+
+    def _range(self, field, prefix):
+        low, high = prefix_range(prefix, Appointment._meta.get_field(field).max_length)
+        return Q(**{f"{field}__gte": low, f"{field}__lte": high})
+
+    def _doctor_ids(self, key):
+        words = key.split()
+        doctors = Doctor.objects.only("last_name", "first_name", "middle_name")
+        return [doctor.pk for doctor in doctors if _words_match(words, doctor.search_words)]
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        if is_phone_query(query):
+            query_digits = digits(query)
+            if len(query_digits) < self.min_phone_digits:
+                return queryset.none()
+            condition = Q()
+            for prefix in phone_prefixes(query_digits):
+                condition |= self._range("patient_phone", prefix)
+            return queryset.filter(condition)
+        key = fold(query)
+        if not key:
+            return queryset
+        condition = self._range("patient_search", key) | self._range("patient_search_alt", key)
+        doctor_ids = self._doctor_ids(key)
+        if doctor_ids:
+            condition |= Q(doctor_id__in=doctor_ids)
+        return queryset.filter(condition)
+
+
+def _words_match(query_words, name_words):
+    """Whether each query word starts a different name word, in any order."""
+    name_words = list(name_words)
+    for query_word in sorted(query_words, key=len, reverse=True):
+        for index, name_word in enumerate(name_words):
+            if name_word.startswith(query_word):
+                del name_words[index]
+                break
+        else:
+            return False
+    return True
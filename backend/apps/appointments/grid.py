@@ -0,0 +1,94 @@
+"""Columnar schedule for multi-day, multi-doctor grids.
+
+A week view of the whole clinic used to be one ``/api/schedule/`` call per day
+(or per doctor and day), each repeating the doctor, patient and status names
+in every row. ``schedule_grid`` loads the range in one query along
+``ix_app_doctor_date`` and returns every name once, in lookup lists, with the
+appointments as parallel arrays of indexes into them and of minutes since
+midnight.
+"""
+from datetime import timedelta
+
+from apps.doctors.models import Doctor
+from .availability import to_minutes
+from .models import Appointment
+from .status_registry import statuses
+
+
+def _status_entry(status):
+    return {"id": status.pk, "code": status.code, "name": status.name}
+
+
+def _add_status(status_id, status_list, status_index):
+    """Append a status the registry did not know when the grid started.
+
+    It was created since this process loaded the registry, so the local copy
+    is reloaded once for it; a status still missing is listed without code
+    and name.
+    """
+    statuses.load()
+    status = statuses.by_id(status_id)
+    status_index[status_id] = len(status_list)
+    status_list.append(
+        _status_entry(status) if status else {"id": status_id, "code": None, "name": None}
+    )
+    return status_index[status_id]
+
+
+def schedule_grid(date_from, date_to, doctor_ids=None):
+    doctors = Doctor.objects.order_by("last_name", "first_name", "id")
+    if doctor_ids is not None:
+        doctors = doctors.filter(pk__in=doctor_ids)
+    doctors = list(doctors.values_list("id", "last_name", "first_name"))
+    doctor_index = {pk: index for index, (pk, _, _) in enumerate(doctors)}
+
+    dates = [date_from + timedelta(days=n) for n in range((date_to - date_from).days + 1)]
+    date_index = {day: index for index, day in enumerate(dates)}
+
+    status_list = [
+        _status_entry(status) for status in sorted(statuses.all(), key=lambda status: status.pk)
+    ]
+    status_index = {status["id"]: index for index, status in enumerate(status_list)}
+
+    rows = Appointment.objects.filter(date__gte=date_from, date__lte=date_to)
+    if doctor_ids is not None:
+        rows = rows.filter(doctor_id__in=list(doctor_index))
+    rows = rows.order_by("doctor_id", "date", "time_start").values_list(
+        "id",
+        "doctor_id",
+        "date",
+        "time_start",
+        "time_end",
+        "status_id",
+        "patient_id",
+        "patient__last_name",
+        "patient__first_name",
+    )
+
+    patients, patient_index = [], {}
+    columns = {name: [] for name in ("id", "doctor", "date", "start", "end", "status", "patient")}
+    for pk, doctor_id, day, start, end, status_id, patient_id, last_name, first_name in rows:
+        if patient_id not in patient_index:
+            patient_index[patient_id] = len(patients)
+            patients.append({"id": patient_id, "name": f"{last_name} {first_name}"})
+        columns["id"].append(pk)
+        columns["doctor"].append(doctor_index[doctor_id])
+        columns["date"].append(date_index[day])
+        columns["start"].append(to_minutes(start))
+        columns["end"].append(to_minutes(end, round_up=True))
+        position = status_index.get(status_id)
+        if position is None:
+            position = _add_status(status_id, status_list, status_index)
+        columns["status"].append(position)
+        columns["patient"].append(patient_index[patient_id])
+
+    return {
+        "dates": [day.isoformat() for day in dates],
+        "doctors": [
+            {"id": pk, "name": f"{last_name} {first_name}"}
+            for pk, last_name, first_name in doctors
+        ],
+        "patients": patients,
+        "statuses": status_list,
+        "appointments": columns,
+    }
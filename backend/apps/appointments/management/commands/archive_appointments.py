@@ -0,0 +1,103 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.appointments import archive, changes
+from apps.appointments.models import Appointment, AppointmentChange
+from apps.appointments.status_registry import statuses
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves completed and cancelled appointments dated before --before (by "
+        "default the archive horizon, APPOINTMENT_ARCHIVE_AFTER_DAYS ago) to the "
+        "archive table, oldest first, one transaction per batch, then prunes "
+        "change log entries older than CHANGE_LOG_RETENTION_DAYS. An interrupted "
+        "run can simply be started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", help="Archive appointments before this date (YYYY-MM-DD)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--max-batches", type=int, help="Stop after this many batches (resume later)"
+        )
+        parser.add_argument(
+            "--pause", type=float, default=0.0, help="Seconds to sleep between batches"
+        )
+        parser.add_argument(
+            "--statuses",
+            default="completed,cancelled",
+            help="Comma-separated status codes to archive",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only count what would be archived"
+        )
+
+    def handle(self, *args, **options):
+        horizon = archive.horizon()
+        before = horizon
+        if options["before"]:
+            before = parse_date(options["before"])
+            if before is None:
+                raise CommandError(f"--before: invalid date {options['before']!r}")
+            if before > horizon:
+                raise CommandError(
+                    f"--before must not be after the archive horizon {horizon} "
+                    "(APPOINTMENT_ARCHIVE_AFTER_DAYS)"
+                )
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        status_ids = []
+        for code in options["statuses"].split(","):
+            status = statuses.get_or_none(code.strip())
+            if status is None:
+                raise CommandError(f"Unknown status {code!r}")
+            status_ids.append(status.pk)
+
+        if options["dry_run"]:
+            count = Appointment.objects.filter(date__lt=before, status_id__in=status_ids).count()
+            self.stdout.write(f"{count} appointments before {before} would be archived.")
+            count = AppointmentChange.objects.filter(
+                created_at__lt=changes.retention_horizon()
+            ).count()
+            self.stdout.write(f"Up to {count} change log entries would be pruned.")
+            return
+
+        moved = batches = 0
+        started = time.perf_counter()
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            count, last_date = archive.archive_batch(before, status_ids, options["batch_size"])
+            if not count:
+                break
+            batches += 1
+            moved += count
+            self.stdout.write(f"Batch {batches}: {moved} archived, up to {last_date}")
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {moved} appointments before {before} in {batches} batches "
+                f"({time.perf_counter() - started:.1f} s)."
+            )
+        )
+
+        pruned = batches = 0
+        logged_before = changes.retention_horizon()
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            count = changes.prune_batch(logged_before, options["batch_size"])
+            if not count:
+                break
+            batches += 1
+            pruned += count
+            if options["pause"]:
+                time.sleep(options["pause"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Pruned {pruned} change log entries logged before "
+                f"{logged_before:%Y-%m-%d %H:%M}."
+            )
+        )
@@ -0,0 +1,93 @@
+import json
+import statistics
+import time
+from datetime import date, time as dtime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.doctors.models import Doctor
+from apps.patients.models import Patient
+from apps.appointments.models import Appointment
+from apps.appointments.read import appointment_rows
+from apps.appointments.serializers import AppointmentSerializer
+from apps.appointments.status_registry import statuses
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares AppointmentSerializer with the .values() fast path on one "
+        "day's schedule. Data is created in a transaction that is rolled back."
+    )
+    day = date(1999, 1, 1)
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>7} {'serializer ms':>14} {'fast path ms':>13} {'speedup':>8}")
+        for rows in options["rows"]:
+            try:
+                with transaction.atomic():
+                    self._seed(rows)
+                    self._run(rows, options["repeat"])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _seed(self, rows):
+        doctors = Doctor.objects.bulk_create(
+            Doctor(first_name=f"Bench{i}", last_name="Doctor", specialization="bench")
+            for i in range(20)
+        )
+        patients = Patient.objects.bulk_create(
+            Patient(first_name=f"Bench{i}", last_name="Patient", phone=f"bench-{i}")
+            for i in range(min(rows, 5000))
+        )
+        planned = statuses.get("planned")
+        Appointment.objects.bulk_create(
+            (
+                Appointment(
+                    patient=patients[i % len(patients)],
+                    doctor=doctors[i % len(doctors)],
+                    date=self.day,
+                    time_start=dtime(8, 0),
+                    time_end=dtime(8, 30),
+                    status=planned,
+                )
+                for i in range(rows)
+            ),
+            batch_size=1000,
+        )
+
+    def _time(self, fn, repeat):
+        samples = []
+        result = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples), result
+
+    def _run(self, rows, repeat):
+        def serializer_path():
+            qs = Appointment.objects.select_related("patient", "doctor", "status").filter(
+                date=self.day
+            )
+            return AppointmentSerializer(qs, many=True).data
+
+        def fast_path():
+            return appointment_rows(Appointment.objects.filter(date=self.day))
+
+        slow_ms, slow = self._time(serializer_path, repeat)
+        fast_ms, fast = self._time(fast_path, repeat)
+        if json.loads(json.dumps(slow)) != json.loads(json.dumps(fast)):
+            self.stderr.write(self.style.ERROR(f"{rows}: outputs differ"))
+        self.stdout.write(
+            f"{rows:>7} {slow_ms:>14.1f} {fast_ms:>13.1f} {slow_ms / fast_ms:>7.1f}x"
+        )
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import quote, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+DEFAULT_PATHS = ["/api/schedule/?date={today}"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests a running server: keeps N connections (keep-alive where the "
+        "server allows it) busy with GET requests for a fixed time and reports "
+        "throughput and p50/p95 latency per concurrency level. Use it to compare the WSGI and ASGI deployments "
+        "(see DEPLOY_ASGI.md)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL")
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path to request, repeatable; {today} is replaced with today's date",
+        )
+        parser.add_argument(
+            "--concurrency",
+            default="1,10,50",
+            help="Comma-separated numbers of concurrent connections",
+        )
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+        parser.add_argument("--token", help="JWT access token")
+        parser.add_argument("--username", help="Log in with these credentials instead of --token")
+        parser.add_argument("--password")
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    def handle(self, *args, **options):
+        base = urlsplit(options["url"])
+        if base.scheme != "http" or not base.hostname:
+            raise CommandError("--url must be an http:// URL")
+        try:
+            levels = [int(level) for level in options["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency must be a list of integers")
+        if not levels or min(levels) < 1:
+            raise CommandError("--concurrency levels must be positive")
+
+        today = timezone.localdate().isoformat()
+        paths = [
+            quote(path.format(today=today), safe="/?=&%:,+")
+            for path in options["paths"] or DEFAULT_PATHS
+        ]
+        self.host = base.hostname
+        self.port = base.port or 80
+        self.prefix = base.path.rstrip("/")
+
+        results = asyncio.run(self._run(options, paths, levels))
+        self._print(results)
+        if options["output"]:
+            report = {
+                "meta": {
+                    "url": options["url"],
+                    "paths": paths,
+                    "duration": options["duration"],
+                    "created_at": timezone.now().isoformat(),
+                },
+                "results": results,
+            }
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    async def _run(self, options, paths, levels):
+        token = options["token"]
+        if options["username"]:
+            token = await self._login(options["username"], options["password"] or "")
+        if not token:
+            raise CommandError("Pass --token or --username/--password")
+        self.headers = f"Authorization: Bearer {token}\r\n"
+
+        results = []
+        for level in levels:
+            results.append(await self._level(level, paths, options["duration"]))
+        return results
+
+    async def _login(self, username, password):
+        body = json.dumps({"username": username, "password": password}).encode()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(
+                (
+                    f"POST {self.prefix}/api/auth/login/ HTTP/1.1\r\nHost: {self.host}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                ).encode()
+                + body
+            )
+            status, payload, _ = await self._read_response(reader)
+        finally:
+            writer.close()
+        if status != 200:
+            raise CommandError(f"Login failed: {status} {payload[:200]!r}")
+        return json.loads(payload)["access"]
+
+    async def _level(self, concurrency, paths, duration):
+        deadline = time.perf_counter() + duration
+        samples, errors = [], {}
+
+        async def worker(offset):
+            writer = None
+            try:
+                n = offset
+                while time.perf_counter() < deadline:
+                    path = paths[n % len(paths)]
+                    n += 1
+                    started = time.perf_counter()
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(self.host, self.port)
+                    writer.write(
+                        (
+                            f"GET {self.prefix}{path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                            f"{self.headers}\r\n"
+                        ).encode()
+                    )
+                    status, _, keep_alive = await self._read_response(reader)
+                    samples.append(time.perf_counter() - started)
+                    if status != 200:
+                        errors[status] = errors.get(status, 0) + 1
+                    if not keep_alive:
+                        # Sync gunicorn workers close the connection after
+                        # every response; reconnecting is part of the cost.
+                        writer.close()
+                        writer = None
+            finally:
+                if writer is not None:
+                    writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        if not samples:
+            raise CommandError(f"No responses at concurrency {concurrency}")
+
+        samples.sort()
+        return {
+            "concurrency": concurrency,
+            "requests": len(samples),
+            "rps": round(len(samples) / elapsed, 1),
+            "p50_ms": round(statistics.median(samples) * 1000, 2),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+            "max_ms": round(samples[-1] * 1000, 2),
+            "errors": errors,
+        }
+
+    async def _read_response(self, reader):
+        """Read one HTTP/1.1 response; returns ``(status, body, keep_alive)``."""
+        status_line = await reader.readline()
+        if not status_line:
+            raise CommandError("The server closed the connection")
+        status = int(status_line.split()[1])
+        length, chunked, keep_alive = 0, False, True
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value.lower():
+                chunked = True
+            elif name == "connection" and "close" in value.lower():
+                keep_alive = False
+        if not chunked:
+            return status, await reader.readexactly(length), keep_alive
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            chunk = await reader.readexactly(size + 2)
+            if size == 0:
+                return status, bytes(body), keep_alive
+            body += chunk[:-2]
+
+    def _print(self, results):
+        self.stdout.write(
+            f"{'conc':>5} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  errors"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['concurrency']:>5} {result['requests']:>9} {result['rps']:>9.1f} "
+                f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['max_ms']:>8.2f}  "
+                f"{result['errors'] or '-'}"
+            )
@@ -0,0 +1,311 @@
+import json
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from datetime import date, time as dtime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.appointments.models import Appointment
+from apps.doctors.models import Doctor
+from apps.patients.models import Patient
+
+BENCH_PASSWORD = "bench-password-1"
+
+# name -> maximum SQL queries per request. Authentication is stateless, so
+# these are the queries of the view itself; a budget that grows with the
+# number of returned rows would be an N+1. Schedule and report budgets
+# include the ETag version lookup (appointments/versions.py); name search
+# reads the doctor names (appointments/filters.py); writes number their
+# change log entries after commit (appointments/changes.py).
+QUERY_BUDGETS = {
+    "appointments.list": 2,
+    "appointments.list.filtered": 2,
+    "appointments.list.search": 3,
+    "appointments.list.cursor": 1,
+    "appointments.create": 19,
+    "appointments.update": 16,
+    "schedule.day": 2,
+    "schedule.doctor": 2,
+    "schedule.grid": 3,
+    "reports.daily": 3,
+    "reports.daily.totals": 2,
+    "reports.doctor_daily": 3,
+    "reports.cancelled": 3,
+    "patients.search": 2,
+    "patients.lookup": 2,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the API endpoints on a seeded test database: p50/p95 latency "
+        "and SQL query counts, written to JSON. Fails when an endpoint exceeds its "
+        "query budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--doctors", type=int, default=20)
+        parser.add_argument("--patients", type=int, default=5000)
+        parser.add_argument("--days", type=int, default=60)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument("--output", default="bench-results.json")
+        parser.add_argument("--compare", help="Earlier results file to compare with")
+        parser.add_argument(
+            "--max-slowdown",
+            type=float,
+            default=None,
+            help="With --compare, fail when a p50 grows by more than this factor",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database (and its seeded data) between runs",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"], serialize=False
+        )
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        try:
+            self._seed(options)
+            results = self._run(options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        report = {
+            "meta": {
+                "commit": self._commit(),
+                "database": connection.vendor,
+                "created_at": timezone.now().isoformat(),
+                "dataset": {
+                    key: options[key] for key in ("doctors", "patients", "days", "seed")
+                },
+                "appointments": self.appointment_count,
+                "repeat": options["repeat"],
+            },
+            "results": results,
+        }
+        with open(options["output"], "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self._print(results)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        failures = [
+            f"{name}: {result['queries']} queries (budget {result['budget']})"
+            for name, result in results.items()
+            if result["queries"] > result["budget"]
+        ]
+        if options["compare"]:
+            failures += self._compare(options["compare"], results, options["max_slowdown"])
+        if failures:
+            raise CommandError("Benchmark failed:\n  " + "\n  ".join(failures))
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _seed(self, options):
+        call_command("loaddata", "appointment_statuses", verbosity=0)
+        if not Appointment.objects.exists():
+            call_command(
+                "generate_load_data",
+                doctors=options["doctors"],
+                patients=options["patients"],
+                days=options["days"],
+                seed=options["seed"],
+                stdout=self.stdout,
+            )
+        self.appointment_count = Appointment.objects.count()
+
+        group, _ = Group.objects.get_or_create(name="registrar")
+        user, created = User.objects.get_or_create(username="bench-registrar")
+        if created:
+            user.set_password(BENCH_PASSWORD)
+            user.save()
+            user.groups.add(group)
+
+        self.client = APIClient()
+        response = self.client.post(
+            "/api/auth/login/",
+            {"username": "bench-registrar", "password": BENCH_PASSWORD},
+            format="json",
+        )
+        if response.status_code != 200:
+            raise CommandError(f"Login failed: {response.status_code} {response.content!r}")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+        # The busiest recent day: the latest working day up to today.
+        self.day = (
+            Appointment.objects.filter(date__lte=date.today())
+            .order_by("-date")
+            .values_list("date", flat=True)
+            .first()
+        )
+        if self.day is None:
+            raise CommandError("The dataset has no appointments up to today; use a larger --days")
+        self.target = Appointment.objects.filter(date=self.day).order_by("pk").first()
+        self.doctor = Doctor.objects.get(pk=self.target.doctor_id)
+        self.patient = Patient.objects.get(pk=self.target.patient_id)
+
+    def _new_appointments(self):
+        """Payloads for create: free 5-minute slots on a day without bookings."""
+        day = self.day + timedelta(days=3650)
+        minute = 0
+        while True:
+            yield {
+                "patient": self.patient.pk,
+                "doctor": self.doctor.pk,
+                "date": (day + timedelta(days=minute // (24 * 60))).isoformat(),
+                "time_start": dtime(minute % (24 * 60) // 60, minute % 60).isoformat(),
+                "time_end": dtime(minute % (24 * 60) // 60, minute % 60 + 5).isoformat(),
+                "status": self.target.status_id,
+            }
+            minute += 10
+
+    def _cases(self):
+        today = self.day.isoformat()
+        week_ago = (self.day - timedelta(days=7)).isoformat()
+        search = self.patient.last_name[:4]
+        new_appointments = self._new_appointments()
+        notes = iter(range(10**9))
+        return [
+            ("appointments.list", "get", lambda: (f"/api/appointments/?date={today}",)),
+            (
+                "appointments.list.filtered",
+                "get",
+                lambda: (
+                    f"/api/appointments/?date_from={week_ago}&date_to={today}"
+                    f"&doctor={self.doctor.pk}&status=planned,completed",
+                ),
+            ),
+            ("appointments.list.search", "get", lambda: (f"/api/appointments/?search={search}",)),
+            ("appointments.list.cursor", "get", lambda: ("/api/appointments/?pagination=cursor",)),
+            (
+                "appointments.create",
+                "post",
+                lambda: ("/api/appointments/", next(new_appointments)),
+            ),
+            (
+                "appointments.update",
+                "patch",
+                lambda: (f"/api/appointments/{self.target.pk}/", {"note": f"bench {next(notes)}"}),
+            ),
+            ("schedule.day", "get", lambda: (f"/api/schedule/?date={today}",)),
+            (
+                "schedule.doctor",
+                "get",
+                lambda: (f"/api/schedule/?date={today}&doctor_id={self.doctor.pk}",),
+            ),
+            (
+                "schedule.grid",
+                "get",
+                lambda: (f"/api/schedule/grid/?from={week_ago}&to={today}",),
+            ),
+            ("reports.daily", "get", lambda: (f"/api/reports/daily/?date={today}",)),
+            (
+                "reports.daily.totals",
+                "get",
+                lambda: (f"/api/reports/daily/?from={week_ago}&to={today}&items=false",),
+            ),
+            (
+                "reports.doctor_daily",
+                "get",
+                lambda: (
+                    f"/api/reports/doctor-daily/?date={today}&doctor_id={self.doctor.pk}",
+                ),
+            ),
+            ("reports.cancelled", "get", lambda: (f"/api/reports/cancelled/?date={today}",)),
+            ("patients.search", "get", lambda: (f"/api/patients/?search={search}",)),
+            ("patients.lookup", "get", lambda: (f"/api/patients/lookup/?q={search}",)),
+        ]
+
+    def _request(self, method, path, data=None):
+        if data is None:
+            return getattr(self.client, method)(path)
+        return getattr(self.client, method)(path, data, format="json")
+
+    def _run(self, repeat):
+        results = {}
+        for name, method, make_args in self._cases():
+            self._request(method, *make_args())  # warm-up
+            samples, queries, status_codes = [], 0, set()
+            for _ in range(repeat):
+                args = make_args()
+                with ExitStack() as stack:
+                    # Reads may go to a replica; count queries on every alias.
+                    captured = [
+                        stack.enter_context(CaptureQueriesContext(connections[alias]))
+                        for alias in connections
+                    ]
+                    started = time.perf_counter()
+                    response = self._request(method, *args)
+                    samples.append((time.perf_counter() - started) * 1000)
+                queries = max(queries, sum(len(c) for c in captured))
+                status_codes.add(response.status_code)
+            if any(code >= 400 for code in status_codes):
+                raise CommandError(f"{name}: unexpected status {sorted(status_codes)}")
+            samples.sort()
+            results[name] = {
+                "p50_ms": round(statistics.median(samples), 3),
+                "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+                "max_ms": round(samples[-1], 3),
+                "queries": queries,
+                "budget": QUERY_BUDGETS[name],
+            }
+        return results
+
+    def _print(self, results):
+        self.stdout.write(f"{'endpoint':<28} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'budget':>7}")
+        for name, result in results.items():
+            line = (
+                f"{name:<28} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                f"{result['queries']:>8} {result['budget']:>7}"
+            )
+            if result["queries"] > result["budget"]:
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+    def _compare(self, path, results, max_slowdown):
+        try:
+            with open(path, encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+        failures = []
+        self.stdout.write(f"\nCompared with {path}:")
+        self.stdout.write(f"{'endpoint':<28} {'p50 before':>10} {'p50 now':>8} {'change':>8} {'queries':>9}")
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                self.stdout.write(f"{name:<28} {'-':>10} {result['p50_ms']:>8.2f}")
+                continue
+            ratio = result["p50_ms"] / before["p50_ms"] if before["p50_ms"] else 1.0
+            self.stdout.write(
+                f"{name:<28} {before['p50_ms']:>10.2f} {result['p50_ms']:>8.2f} "
+                f"{(ratio - 1) * 100:>+7.1f}% {before['queries']:>4}->{result['queries']:<4}"
+            )
+            if max_slowdown is not None and ratio > max_slowdown:
+                failures.append(f"{name}: p50 {before['p50_ms']} -> {result['p50_ms']} ms")
+        return failures
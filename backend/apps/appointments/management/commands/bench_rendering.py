@@ -0,0 +1,157 @@
+import json
+import statistics
+import time
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count
+from django.test.utils import setup_test_environment
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.appointments.models import Appointment
+from common.renderers import ORJSONRenderer, orjson
+
+BENCH_PASSWORD = "bench-password-1"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures JSON rendering and gzip on a DailyReportView payload of --rows "
+        "appointments: CPU time and bytes for JSONRenderer vs ORJSONRenderer, with "
+        "and without compression, plus whole-request latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database (and its seeded data) between runs",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"], serialize=False
+        )
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        try:
+            client, path = self._seed(options["rows"])
+            results = self._run(client, path, options["rows"], options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        self._print(results)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def _seed(self, rows):
+        call_command("loaddata", "appointment_statuses", verbosity=0)
+        if Appointment.objects.count() < rows:
+            call_command(
+                "generate_load_data",
+                doctors=20,
+                patients=5000,
+                days=max(60, rows // 100),
+                seed=1,
+                stdout=self.stdout,
+            )
+
+        # The shortest range ending at the latest booked day with enough rows.
+        per_day = (
+            Appointment.objects.values("date")
+            .annotate(n=Count("id"))
+            .order_by("-date")
+        )
+        total, date_from, date_to = 0, None, None
+        for day in per_day:
+            date_to = date_to or day["date"]
+            date_from = day["date"]
+            total += day["n"]
+            if total >= rows:
+                break
+        if total < rows:
+            raise CommandError(f"Only {total} appointments; lower --rows")
+
+        group, _ = Group.objects.get_or_create(name="registrar")
+        user, created = User.objects.get_or_create(username="bench-registrar")
+        if created:
+            user.set_password(BENCH_PASSWORD)
+            user.save()
+            user.groups.add(group)
+        client = APIClient()
+        response = client.post(
+            "/api/auth/login/",
+            {"username": "bench-registrar", "password": BENCH_PASSWORD},
+            format="json",
+        )
+        if response.status_code != 200:
+            raise CommandError(f"Login failed: {response.status_code} {response.content!r}")
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return client, f"/api/reports/daily/?from={date_from}&to={date_to}"
+
+    def _cpu(self, function, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.process_time()
+            result = function()
+            samples.append((time.process_time() - started) * 1000)
+        return result, round(statistics.median(samples), 3)
+
+    def _run(self, client, path, rows, repeat):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f"{path}: {response.status_code}")
+        data = dict(response.data)
+        data["items"] = data["items"][:rows]
+
+        results = {"rows": len(data["items"]), "orjson": orjson is not None, "render": {}}
+        for name, renderer in (("json", JSONRenderer()), ("orjson", ORJSONRenderer())):
+            body, render_ms = self._cpu(lambda: renderer.render(data), repeat)
+            compressed, gzip_ms = self._cpu(lambda: compress_string(body), repeat)
+            results["render"][name] = {
+                "render_cpu_ms": render_ms,
+                "bytes": len(body),
+                "gzip_cpu_ms": gzip_ms,
+                "gzip_bytes": len(compressed),
+            }
+
+        # Whole requests, including the query and CompressionMiddleware.
+        results["request"] = {}
+        for name, headers in (("identity", {}), ("gzip", {"HTTP_ACCEPT_ENCODING": "gzip"})):
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = client.get(path, **headers)
+                samples.append((time.perf_counter() - started) * 1000)
+            results["request"][name] = {
+                "p50_ms": round(statistics.median(samples), 3),
+                "bytes": len(response.content),
+            }
+        return results
+
+    def _print(self, results):
+        self.stdout.write(
+            f"DailyReportView, {results['rows']} rows"
+            + ("" if results["orjson"] else " (orjson is not installed: both renderers are JSONRenderer)")
+        )
+        self.stdout.write(
+            f"{'renderer':<9} {'render ms':>10} {'bytes':>10} {'gzip ms':>8} {'gzip bytes':>11}"
+        )
+        for name, result in results["render"].items():
+            self.stdout.write(
+                f"{name:<9} {result['render_cpu_ms']:>10.2f} {result['bytes']:>10} "
+                f"{result['gzip_cpu_ms']:>8.2f} {result['gzip_bytes']:>11}"
+            )
+        self.stdout.write(f"{'request':<9} {'p50 ms':>10} {'bytes':>10}")
+        for name, result in results["request"].items():
+            self.stdout.write(f"{name:<9} {result['p50_ms']:>10.2f} {result['bytes']:>10}")
@@ -0,0 +1,191 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import date, time as dtime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import setup_test_environment
+
+from apps.appointments.models import Appointment
+from apps.appointments.read import appointment_rows
+from apps.appointments.status_registry import statuses
+from apps.doctors.models import Doctor
+from apps.patients.models import Patient
+
+PROFILES = {
+    "stock": {},
+    "tuned": settings.SQLITE_TUNED_OPTIONS,
+}
+# Slots per thread per doctor-day; threads book disjoint slots of shared days.
+SLOTS_PER_THREAD = 12
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares SQLite profiles under concurrent bookings: writer threads book "
+        "appointments the way the API does (validation, then save in a transaction) "
+        "while reader threads load the schedule. Reports bookings/s, failed writes "
+        "and read latency per profile on a scratch database file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--doctors", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per profile")
+        parser.add_argument(
+            "--profile",
+            choices=[*PROFILES, "both"],
+            default="both",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("The default database is not SQLite")
+        max_writers = (24 * 60 - 1) // (SLOTS_PER_THREAD * 5)
+        if not 1 <= options["writers"] <= max_writers:
+            raise CommandError(f"--writers must be between 1 and {max_writers}")
+
+        setup_test_environment()
+        profiles = list(PROFILES) if options["profile"] == "both" else [options["profile"]]
+        results = {}
+        for profile in profiles:
+            results[profile] = self._bench(profile, options)
+
+        self.stdout.write(
+            f"{'profile':<8} {'bookings/s':>10} {'booked':>7} {'locked':>7} {'conflicts':>9} "
+            f"{'write p95 ms':>12} {'reads/s':>8} {'read p95 ms':>11}"
+        )
+        for profile, result in results.items():
+            self.stdout.write(
+                f"{profile:<8} {result['bookings_per_s']:>10.1f} {result['booked']:>7} "
+                f"{result['locked']:>7} {result['conflicts']:>9} {result['write_p95_ms']:>12.1f} "
+                f"{result['reads_per_s']:>8.1f} {result['read_p95_ms']:>11.1f}"
+            )
+
+    def _bench(self, profile, options):
+        database = connection.settings_dict
+        original = {key: database.get(key) for key in ("NAME", "OPTIONS", "TEST")}
+        with tempfile.TemporaryDirectory() as directory:
+            database["TEST"] = {
+                **(original["TEST"] or {}),
+                "NAME": os.path.join(directory, "bench.sqlite3"),
+            }
+            database["OPTIONS"] = dict(PROFILES[profile])
+            connections.close_all()
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                self._seed(options["doctors"])
+                return self._run(options)
+            finally:
+                connections.close_all()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                database.update(original)
+
+    def _seed(self, doctors):
+        call_command("loaddata", "appointment_statuses", verbosity=0)
+        self.doctor_ids = [
+            Doctor.objects.create(
+                last_name=f"Bench{number}", first_name="Doctor", specialization="Bench"
+            ).pk
+            for number in range(doctors)
+        ]
+        self.patient_id = Patient.objects.create(
+            last_name="Bench", first_name="Patient", phone="+380990000001"
+        ).pk
+        self.status_id = statuses.get("planned").pk
+        self.first_day = date.today() + timedelta(days=3650)
+
+    def _run(self, options):
+        deadline = time.perf_counter() + options["duration"]
+        counts = {"booked": 0, "locked": 0, "conflicts": 0, "reads": 0}
+        write_samples, read_samples = [], []
+        lock = threading.Lock()
+
+        def count(name):
+            with lock:
+                counts[name] += 1
+
+        def writer(number):
+            try:
+                booking = 0
+                while time.perf_counter() < deadline:
+                    appointment = self._appointment(number, booking)
+                    booking += 1
+                    started = time.perf_counter()
+                    try:
+                        # What AppointmentViewSet does: validate, then save atomically.
+                        appointment.full_clean()
+                        with transaction.atomic():
+                            appointment.save()
+                    except OperationalError:
+                        count("locked")
+                        continue
+                    except ValidationError:
+                        count("conflicts")
+                        continue
+                    write_samples.append(time.perf_counter() - started)
+                    count("booked")
+            finally:
+                connections.close_all()
+
+        def reader(number):
+            try:
+                n = number
+                while time.perf_counter() < deadline:
+                    day = self.first_day + timedelta(days=n % 5)
+                    n += 1
+                    started = time.perf_counter()
+                    try:
+                        appointment_rows(Appointment.objects.filter(date=day))
+                    except OperationalError:
+                        count("locked")
+                        continue
+                    read_samples.append(time.perf_counter() - started)
+                    count("reads")
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(options["writers"])]
+        threads += [threading.Thread(target=reader, args=(n,)) for n in range(options["readers"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            **counts,
+            "bookings_per_s": counts["booked"] / elapsed,
+            "reads_per_s": counts["reads"] / elapsed,
+            "write_p95_ms": self._p95(write_samples),
+            "read_p95_ms": self._p95(read_samples),
+        }
+
+    def _appointment(self, writer, booking):
+        """A slot no other writer books: all writers share doctor-days."""
+        day_number, slot = divmod(booking, SLOTS_PER_THREAD * len(self.doctor_ids))
+        doctor_number, slot = divmod(slot, SLOTS_PER_THREAD)
+        minute = (writer * SLOTS_PER_THREAD + slot) * 5
+        return Appointment(
+            patient_id=self.patient_id,
+            doctor_id=self.doctor_ids[doctor_number],
+            date=self.first_day + timedelta(days=day_number),
+            time_start=dtime(minute // 60, minute % 60),
+            time_end=dtime((minute + 5) // 60, (minute + 5) % 60),
+            status_id=self.status_id,
+        )
+
+    def _p95(self, samples):
+        if not samples:
+            return 0.0
+        samples.sort()
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000
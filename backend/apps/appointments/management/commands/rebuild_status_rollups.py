@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from apps.appointments.models import Appointment, ArchivedAppointment, DailyStatusRollup
+from apps.appointments.rollups import compute_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds DailyStatusRollup from appointments, archived ones included, "
+        "or verifies it with --verify."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="First date (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="date_to", help="Last date (YYYY-MM-DD)")
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare the rollup with the appointments; exit 1 on mismatch.",
+        )
+
+    def _date(self, value, name):
+        if value is None:
+            return None
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f"--{name}: invalid date {value!r}")
+        return date
+
+    def handle(self, *args, **options):
+        date_from = self._date(options["date_from"], "from")
+        date_to = self._date(options["date_to"], "to")
+
+        appointments = [Appointment.objects.all(), ArchivedAppointment.objects.all()]
+        stored = DailyStatusRollup.objects.all()
+        if date_from:
+            appointments = [qs.filter(date__gte=date_from) for qs in appointments]
+            stored = stored.filter(date__gte=date_from)
+        if date_to:
+            appointments = [qs.filter(date__lte=date_to) for qs in appointments]
+            stored = stored.filter(date__lte=date_to)
+
+        if options["verify"]:
+            self._verify(appointments, stored)
+        else:
+            self._rebuild(appointments, stored)
+
+    def _rebuild(self, appointments, stored):
+        with transaction.atomic():
+            expected = compute_rollups(*appointments)
+            deleted, _ = stored.delete()
+            DailyStatusRollup.objects.bulk_create(
+                (
+                    DailyStatusRollup(
+                        date=date,
+                        doctor_id=doctor_id,
+                        status_id=status_id,
+                        count=count,
+                        minutes=minutes,
+                    )
+                    for (date, doctor_id, status_id), (count, minutes) in expected.items()
+                ),
+                batch_size=1000,
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {len(expected)} rollup rows (replaced {deleted}).")
+        )
+
+    def _verify(self, appointments, stored):
+        expected = compute_rollups(*appointments)
+        actual = {
+            (date, doctor_id, status_id): (count, minutes)
+            for date, doctor_id, status_id, count, minutes in stored.values_list(
+                "date", "doctor_id", "status_id", "count", "minutes"
+            )
+            if count or minutes
+        }
+        mismatches = sorted(
+            key for key in expected.keys() | actual.keys()
+            if expected.get(key) != actual.get(key)
+        )
+        for date, doctor_id, status_id in mismatches[:50]:
+            key = (date, doctor_id, status_id)
+            self.stdout.write(
+                f"{date} doctor={doctor_id} status={status_id}: "
+                f"expected {expected.get(key, (0, 0))}, stored {actual.get(key, (0, 0))}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} rollup rows differ")
+        self.stdout.write(self.style.SUCCESS(f"{len(expected)} rollup rows verified."))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.appointments import changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Numbers committed change log entries that have no seq yet. Writers do "
+        "this right after commit; this sweep catches entries whose process died "
+        "in between. Run it from cron, or keep it running with --interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Repeat every this many seconds instead of running once",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        if interval is not None and interval <= 0:
+            raise CommandError("--interval must be positive")
+        while True:
+            numbered = changes.assign_sequence()
+            if numbered or interval is None:
+                self.stdout.write(f"Numbered {numbered} change log entries.")
+            if interval is None:
+                return
+            time.sleep(interval)
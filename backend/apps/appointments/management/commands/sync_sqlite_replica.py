@@ -0,0 +1,55 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the SQLite primary into the replica files from DB_REPLICAS with the "
+        "online backup API, once or every --interval seconds. Stands in for "
+        "replication when testing replica routing locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Keep copying with this many seconds between copies",
+        )
+
+    def handle(self, *args, **options):
+        primary = connections["default"].settings_dict
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("The primary database is not SQLite")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas configured; set DB_REPLICAS")
+        replicas = [
+            connections[alias].settings_dict["NAME"] for alias in settings.DATABASE_REPLICAS
+        ]
+
+        while True:
+            started = time.perf_counter()
+            self._copy(primary["NAME"], replicas)
+            self.stdout.write(
+                f"Copied to {len(replicas)} replica(s) in "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
+
+    def _copy(self, source_name, replica_names):
+        source = sqlite3.connect(source_name)
+        try:
+            for name in replica_names:
+                target = sqlite3.connect(name)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
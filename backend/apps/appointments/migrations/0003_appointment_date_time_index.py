@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_doctorday'),
+        ('doctors', '0002_doctorworkinghours'),
+        ('patients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['-date', '-time_start', 'id'], name='ix_app_date_time'),
+        ),
+    ]
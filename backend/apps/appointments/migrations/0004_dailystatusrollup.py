@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:57
+
+import django.db.models.deletion
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def populate_rollups(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    DailyStatusRollup = apps.get_model("appointments", "DailyStatusRollup")
+    counts, minutes = Counter(), Counter()
+    rows = Appointment.objects.order_by().values_list(
+        "date", "doctor_id", "status_id", "time_start", "time_end"
+    )
+    for date, doctor_id, status_id, time_start, time_end in rows.iterator():
+        key = (date, doctor_id, status_id)
+        counts[key] += 1
+        minutes[key] += (time_end.hour * 60 + time_end.minute) - (
+            time_start.hour * 60 + time_start.minute
+        )
+    DailyStatusRollup.objects.bulk_create(
+        (
+            DailyStatusRollup(
+                date=date,
+                doctor_id=doctor_id,
+                status_id=status_id,
+                count=counts[(date, doctor_id, status_id)],
+                minutes=minutes[(date, doctor_id, status_id)],
+            )
+            for date, doctor_id, status_id in counts
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_appointment_date_time_index'),
+        ('doctors', '0002_doctorworkinghours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStatusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('minutes', models.IntegerField(default=0)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='doctors.doctor')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='appointments.appointmentstatus')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['doctor', 'date'], name='ix_rollup_doctor_date')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'doctor', 'status'), name='uq_rollup_date_doctor_status')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
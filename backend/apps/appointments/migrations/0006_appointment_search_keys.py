@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:05
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+from common.text import name_key
+
+
+def populate_search_keys(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    Patient = apps.get_model("patients", "Patient")
+    Doctor = apps.get_model("doctors", "Doctor")
+    patient = Patient.objects.filter(pk=OuterRef("patient_id"))
+    Appointment.objects.update(
+        patient_search=Subquery(patient.values("search_name")[:1]),
+        patient_phone=Subquery(patient.values("phone_digits")[:1]),
+    )
+    for doctor in Doctor.objects.all():
+        Appointment.objects.filter(doctor_id=doctor.pk).update(
+            doctor_search=name_key(doctor.last_name, doctor.first_name, doctor.middle_name)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_appointment_changes'),
+        ('doctors', '0002_doctorworkinghours'),
+        ('patients', '0002_search_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='doctor_search',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='patient_phone',
+            field=models.CharField(default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='patient_search',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['patient_search'], name='ix_app_patient_search'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['patient_phone'], name='ix_app_patient_phone'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor_search'], name='ix_app_doctor_search'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_appointment_search_keys'),
+        ('doctors', '0002_doctorworkinghours'),
+        ('patients', '0002_search_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('time_start', models.TimeField()),
+                ('time_end', models.TimeField()),
+                ('note', models.CharField(blank=True, max_length=500, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('patient_search', models.CharField(default='', editable=False, max_length=255)),
+                ('patient_phone', models.CharField(default='', editable=False, max_length=32)),
+                ('doctor_search', models.CharField(default='', editable=False, max_length=255)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='doctors.doctor')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='patients.patient')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_appointments', to='appointments.appointmentstatus')),
+            ],
+            options={
+                'ordering': ['-date', '-time_start'],
+                'indexes': [models.Index(fields=['date', 'time_start'], name='ix_arch_date'), models.Index(fields=['doctor', 'date'], name='ix_arch_doctor_date'), models.Index(fields=['patient', 'date'], name='ix_arch_patient_date')],
+            },
+        ),
+    ]
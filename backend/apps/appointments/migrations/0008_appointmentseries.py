@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0007_archivedappointment'),
+        ('doctors', '0002_doctorworkinghours'),
+        ('patients', '0002_search_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_start', models.DateField()),
+                ('interval_weeks', models.PositiveSmallIntegerField(default=1)),
+                ('count', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('until', models.DateField(blank=True, null=True)),
+                ('time_start', models.TimeField()),
+                ('time_end', models.TimeField()),
+                ('note', models.CharField(blank=True, max_length=500, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to='doctors.doctor')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to='patients.patient')),
+            ],
+            options={
+                'verbose_name_plural': 'Appointment series',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='appointments.appointmentseries'),
+        ),
+        migrations.AddField(
+            model_name='archivedappointment',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_appointments', to='appointments.appointmentseries'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:01
+
+from django.db import migrations, models
+
+
+def create_directory_counter(apps, schema_editor):
+    VersionCounter = apps.get_model("appointments", "VersionCounter")
+    VersionCounter.objects.get_or_create(key="directory")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_appointmentseries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCounter',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='appointmentchange',
+            index=models.Index(fields=['doctor_id', 'date', 'id'], name='ix_change_doctor_date'),
+        ),
+        migrations.RunPython(create_directory_counter, migrations.RunPython.noop),
+    ]
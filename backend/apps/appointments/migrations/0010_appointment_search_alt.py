@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:09
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_patient_search_keys(apps, schema_editor):
+    Patient = apps.get_model("patients", "Patient")
+    patient = Patient.objects.filter(pk=OuterRef("patient_id"))
+    for model_name in ("Appointment", "ArchivedAppointment"):
+        apps.get_model("appointments", model_name).objects.update(
+            patient_search_alt=Subquery(patient.values("search_name_alt")[:1]),
+            patient_phone=Subquery(patient.values("phone_digits")[:1]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0009_version_counter'),
+        ('doctors', '0002_doctorworkinghours'),
+        ('patients', '0003_normalized_phone_digits'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='ix_app_doctor_search',
+        ),
+        migrations.RemoveField(
+            model_name='appointment',
+            name='doctor_search',
+        ),
+        migrations.RemoveField(
+            model_name='archivedappointment',
+            name='doctor_search',
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='patient_search_alt',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='archivedappointment',
+            name='patient_search_alt',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(copy_patient_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['patient_search_alt'], name='ix_app_patient_search_alt'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:14
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_changes(apps, schema_editor):
+    """Existing changes keep their id as ``seq``, so clients can resume."""
+    AppointmentChange = apps.get_model("appointments", "AppointmentChange")
+    VersionCounter = apps.get_model("appointments", "VersionCounter")
+    AppointmentChange.objects.update(seq=F("id"))
+    last = AppointmentChange.objects.aggregate(last=Max("id"))["last"] or 0
+    VersionCounter.objects.update_or_create(key="change_seq", defaults={"value": last})
+    VersionCounter.objects.get_or_create(key="change_pruned")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0010_appointment_search_alt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointmentchange',
+            name='seq',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='appointmentchange',
+            index=models.Index(fields=['seq'], name='ix_change_seq'),
+        ),
+        migrations.RunPython(number_existing_changes, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,5 @@
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
 
 from apps.patients.models import Patient
 from apps.doctors.models import Doctor
@@ -21,6 +21,207 @@ class AppointmentQuerySet(models.QuerySet):
         return self.filter(doctor_id=doctor_id, date=date)
 
 
+def duration_minutes(time_start, time_end):
+    return (time_end.hour * 60 + time_end.minute) - (
+        time_start.hour * 60 + time_start.minute
+    )
+
+
+OVERLAP_ERROR = "Doctor already has an overlapping appointment in this slot"
+
+
+class DoctorDay(models.Model):
+    """Occupancy ledger for one doctor on one date.
+
+    ``occupancy`` is a bitmap with one bit per ``SLOT_MINUTES`` of the day.
+    Booking locks just this row with ``select_for_update`` and tests/sets bits,
+    so concurrent bookings only contend when they target the same doctor-day.
+    A cell is marked as soon as any appointment covers part of it, which makes
+    the bitmap exact for grid-aligned times and conservative otherwise.
+    """
+
+    SLOT_MINUTES = 5
+    SLOTS = 24 * 60 // SLOT_MINUTES
+    SIZE = SLOTS // 8
+
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name="days")
+    date = models.DateField()
+    occupancy = models.BinaryField(max_length=SIZE, default=bytes(SIZE))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["doctor", "date"], name="uq_doctor_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.doctor_id} on {self.date}"
+
+    @property
+    def bits(self):
+        return int.from_bytes(bytes(self.occupancy), "big")
+
+    @bits.setter
+    def bits(self, value):
+        self.occupancy = value.to_bytes(self.SIZE, "big")
+
+    @classmethod
+    def _cell(cls, value, round_up=False):
+        seconds = value.hour * 3600 + value.minute * 60 + value.second
+        if round_up and value.microsecond:
+            seconds += 1
+        cell = cls.SLOT_MINUTES * 60
+        return -(-seconds // cell) if round_up else seconds // cell
+
+    @classmethod
+    def mask(cls, time_start, time_end):
+        first = cls._cell(time_start)
+        last = cls._cell(time_end, round_up=True)
+        return ((1 << (last - first)) - 1) << first
+
+    @classmethod
+    def is_aligned(cls, time_start, time_end):
+        cell = cls.SLOT_MINUTES * 60
+        return all(
+            not value.microsecond
+            and (value.hour * 3600 + value.minute * 60 + value.second) % cell == 0
+            for value in (time_start, time_end)
+        )
+
+    @classmethod
+    def lock(cls, doctor_id, date):
+        """Return the row for (doctor, date) locked for the current transaction.
+
+        Must be called inside ``transaction.atomic``. A missing row is created
+        from the appointments already booked for that day.
+        """
+        try:
+            return cls.objects.select_for_update().get(doctor_id=doctor_id, date=date)
+        except cls.DoesNotExist:
+            return cls._create_locked(doctor_id, date)
+
+    @classmethod
+    def _create_locked(cls, doctor_id, date):
+        day = cls(doctor_id=doctor_id, date=date)
+        day.bits = day.compute_bits()
+        try:
+            with transaction.atomic():
+                day.save()
+        except IntegrityError:
+            # Another transaction created it first; wait for its lock.
+            return cls.objects.select_for_update().get(doctor_id=doctor_id, date=date)
+        return day
+
+    @classmethod
+    def lock_many(cls, keys):
+        """Lock several (doctor, date) rows in a stable order to avoid deadlocks.
+
+        Existing rows are locked with one query per doctor. Missing ones are
+        built from one query over their appointments, inserted together and
+        locked with one more query, so fresh days cost the same per doctor
+        however many there are.
+        """
+        dates_by_doctor = {}
+        for doctor_id, date in sorted(set(keys)):
+            dates_by_doctor.setdefault(doctor_id, []).append(date)
+
+        days = {}
+        for doctor_id, dates in dates_by_doctor.items():
+            existing = {
+                day.date: day
+                for day in cls.objects.select_for_update()
+                .filter(doctor_id=doctor_id, date__in=dates)
+                .order_by("date")
+            }
+            missing = [date for date in dates if date not in existing]
+            if missing:
+                existing.update(cls._create_many_locked(doctor_id, missing))
+            for date in dates:
+                days[(doctor_id, date)] = existing[date]
+        return days
+
+    @classmethod
+    def _create_many_locked(cls, doctor_id, dates):
+        if not connection.features.supports_ignore_conflicts:
+            return {date: cls._create_locked(doctor_id, date) for date in dates}
+        created = {date: cls(doctor_id=doctor_id, date=date) for date in dates}
+        bits = dict.fromkeys(dates, 0)
+        rows = (
+            Appointment.objects.filter(doctor_id=doctor_id, date__in=dates)
+            .order_by()
+            .values_list("date", "time_start", "time_end")
+        )
+        for date, time_start, time_end in rows:
+            bits[date] |= cls.mask(time_start, time_end)
+        for date, day in created.items():
+            day.bits = bits[date]
+        # Rows another transaction inserted first are skipped here and
+        # locked (after its commit) below.
+        cls.objects.bulk_create(created.values(), ignore_conflicts=True)
+        return {
+            day.date: day
+            for day in cls.objects.select_for_update()
+            .filter(doctor_id=doctor_id, date__in=dates)
+            .order_by("date")
+        }
+
+    def compute_bits(self):
+        bits = 0
+        rows = Appointment.objects.for_doctor_date(self.doctor_id, self.date).values_list(
+            "time_start", "time_end"
+        )
+        for time_start, time_end in rows:
+            bits |= self.mask(time_start, time_end)
+        return bits
+
+    def test(self, time_start, time_end):
+        """Return True/False when the bitmap alone decides overlap, else None."""
+        if not self.bits & self.mask(time_start, time_end):
+            return False
+        if self.is_aligned(time_start, time_end):
+            return True
+        return None
+
+    def occupy(self, time_start, time_end):
+        self.bits |= self.mask(time_start, time_end)
+        self.save(update_fields=["occupancy"])
+
+    def rebuild(self):
+        self.bits = self.compute_bits()
+        self.save(update_fields=["occupancy"])
+
+
+class AppointmentSeries(models.Model):
+    """A recurring visit: every ``interval_weeks`` weeks from ``date_start``.
+
+    The rule ends after ``count`` occurrences or on ``until``. Occurrences are
+    ordinary appointments pointing back through ``Appointment.series``; they
+    are booked together by ``apps.appointments.series``, and only those that
+    did not conflict exist.
+    """
+
+    patient = models.ForeignKey(
+        Patient, on_delete=models.CASCADE, related_name="appointment_series"
+    )
+    doctor = models.ForeignKey(
+        Doctor, on_delete=models.CASCADE, related_name="appointment_series"
+    )
+    date_start = models.DateField()
+    interval_weeks = models.PositiveSmallIntegerField(default=1)
+    count = models.PositiveSmallIntegerField(blank=True, null=True)
+    until = models.DateField(blank=True, null=True)
+    time_start = models.TimeField()
+    time_end = models.TimeField()
+    note = models.CharField(max_length=500, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Appointment series"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Series {self.pk}: {self.doctor_id} from {self.date_start}"
+
+
 class Appointment(models.Model):
     patient = models.ForeignKey(
         Patient, on_delete=models.CASCADE, related_name="appointments"
@@ -35,7 +236,22 @@ class Appointment(models.Model):
         AppointmentStatus, on_delete=models.PROTECT, related_name="appointments"
     )
     note = models.CharField(max_length=500, blank=True, null=True)
+    series = models.ForeignKey(
+        AppointmentSeries,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="appointments",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Copies of the patient's search keys (see common.text) so search needs
+    # no joins. save() and the bulk path fill them; renames are propagated by
+    # receivers in signals.py. Doctors are few and matched by id instead
+    # (filters.AppointmentSearchFilter).
+    patient_search = models.CharField(max_length=255, default="", editable=False)
+    patient_search_alt = models.CharField(max_length=255, default="", editable=False)
+    patient_phone = models.CharField(max_length=32, default="", editable=False)
 
     objects = AppointmentQuerySet.as_manager()
 
@@ -47,30 +263,264 @@ class Appointment(models.Model):
             ),
             models.Index(fields=["patient", "date"], name="ix_app_patient_date"),
             models.Index(fields=["status", "date"], name="ix_app_status_date"),
+            models.Index(
+                fields=["-date", "-time_start", "id"], name="ix_app_date_time"
+            ),
+            models.Index(fields=["patient_search"], name="ix_app_patient_search"),
+            models.Index(fields=["patient_search_alt"], name="ix_app_patient_search_alt"),
+            models.Index(fields=["patient_phone"], name="ix_app_patient_phone"),
         ]
         ordering = ["-date", "-time_start"]
 
+    SEARCH_FIELDS = ("patient_search", "patient_search_alt", "patient_phone")
+    SNAPSHOT_FIELDS = ("doctor_id", "date", "time_start", "time_end", "status_id")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded = instance.snapshot()
+        return instance
+
+    def snapshot(self):
+        """``(doctor_id, date, time_start, time_end, status_id)`` as currently set."""
+        return tuple(self.__dict__.get(name) for name in self.SNAPSHOT_FIELDS)
+
+    def clean_fields(self, exclude=None):
+        from .status_registry import statuses
+
+        exclude = set(exclude or ())
+        # Known statuses come from the in-process registry; skip the FK query.
+        if self.status_id is not None and statuses.by_id(self.status_id) is not None:
+            exclude.add("status")
+        # Patients and doctors the caller already loaded (serializers do)
+        # exist; the FK constraint still guards against concurrent deletes.
+        for name in ("patient", "doctor"):
+            field = self._meta.get_field(name)
+            related = field.get_cached_value(self, default=None)
+            if (
+                related is not None
+                and not related._state.adding
+                and related.pk == getattr(self, field.attname)
+            ):
+                exclude.add(name)
+        super().clean_fields(exclude=exclude)
+
     def clean(self):
         if self.time_end <= self.time_start:
             raise ValidationError("time_end must be after time_start")
+        if self._overlaps():
+            raise ValidationError(OVERLAP_ERROR)
+
+    def _overlaps(self):
+        day = getattr(self, "_day", None)
+        loaded = getattr(self, "_loaded", None)
+        if loaded and not self._state.adding and loaded[:4] == self.snapshot()[:4]:
+            # The slot itself did not change (status or note edit).
+            return False
+        if day is not None and not (loaded and loaded[:2] == self.snapshot()[:2]):
+            # Our own bits are not in this day's bitmap yet, so it can answer.
+            verdict = day.test(self.time_start, self.time_end)
+            if verdict is not None:
+                return verdict
 
         qs = Appointment.objects.for_doctor_date(self.doctor_id, self.date)
         if self.pk:
             qs = qs.exclude(pk=self.pk)
-
-        overlap = qs.filter(
+        return qs.filter(
             time_start__lt=self.time_end,
             time_end__gt=self.time_start,
         ).exists()
-        if overlap:
-            raise ValidationError(
-                "Doctor already has an overlapping appointment in this slot"
-            )
+
+    def update_search_keys(self):
+        self.patient_search = self.patient.search_name
+        self.patient_search_alt = self.patient.search_name_alt
+        self.patient_phone = self.patient.phone_digits
 
     def save(self, *args, **kwargs):
-        self.full_clean()
-        return super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.update_search_keys()
+        elif {"patient", "patient_id"} & set(update_fields):
+            self.update_search_keys()
+            kwargs["update_fields"] = {*update_fields, *self.SEARCH_FIELDS}
+        with transaction.atomic():
+            self.clean_fields()
+            adding = self._state.adding
+            loaded = None
+            if not adding:
+                loaded = getattr(self, "_loaded", None) or (
+                    Appointment.objects.filter(pk=self.pk)
+                    .values_list(*self.SNAPSHOT_FIELDS)
+                    .first()
+                )
+                if loaded is None:
+                    adding = True
+                else:
+                    self._loaded = loaded
+            # Read by post_save receivers to apply incremental changes.
+            self._previous = None if adding else loaded
+            keys = {(self.doctor_id, self.date)}
+            if loaded:
+                keys.add(loaded[:2])
+            days = DoctorDay.lock_many(keys)
+            self._day = days[(self.doctor_id, self.date)]
+            try:
+                self.clean()
+                self.validate_unique()
+                self.validate_constraints()
+                result = super().save(*args, **kwargs)
+            finally:
+                self._day = None
+
+            if adding:
+                days[(self.doctor_id, self.date)].occupy(self.time_start, self.time_end)
+            elif loaded[:4] != self.snapshot()[:4]:
+                for day in days.values():
+                    day.rebuild()
+            self._loaded = self.snapshot()
+        return result
 
     def __str__(self):
         return f"{self.patient} with {self.doctor} on {self.date} {self.time_start}"
 
+
+class ArchivedAppointment(models.Model):
+    """Appointments moved out of ``Appointment`` by ``manage.py archive_appointments``.
+
+    Same columns and ids as ``Appointment``, but only the indexes that reports
+    and patient history need. Nothing books against these rows: they are not
+    in ``DoctorDay`` bitmaps or overlap checks, while ``DailyStatusRollup``
+    still counts them. See ``apps.appointments.archive``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    patient = models.ForeignKey(
+        Patient, on_delete=models.CASCADE, related_name="archived_appointments"
+    )
+    doctor = models.ForeignKey(
+        Doctor, on_delete=models.CASCADE, related_name="archived_appointments"
+    )
+    date = models.DateField()
+    time_start = models.TimeField()
+    time_end = models.TimeField()
+    status = models.ForeignKey(
+        AppointmentStatus, on_delete=models.PROTECT, related_name="archived_appointments"
+    )
+    note = models.CharField(max_length=500, blank=True, null=True)
+    series = models.ForeignKey(
+        AppointmentSeries,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="archived_appointments",
+    )
+    # Copied from the hot row, not set on save.
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    patient_search = models.CharField(max_length=255, default="", editable=False)
+    patient_search_alt = models.CharField(max_length=255, default="", editable=False)
+    patient_phone = models.CharField(max_length=32, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "time_start"], name="ix_arch_date"),
+            models.Index(fields=["doctor", "date"], name="ix_arch_doctor_date"),
+            models.Index(fields=["patient", "date"], name="ix_arch_patient_date"),
+        ]
+        ordering = ["-date", "-time_start"]
+
+    def __str__(self):
+        return f"Archived {self.pk}: {self.doctor_id} on {self.date} {self.time_start}"
+
+    def snapshot(self):
+        """Same tuple as ``Appointment.snapshot()``, for rollup deltas."""
+        return tuple(getattr(self, name) for name in Appointment.SNAPSHOT_FIELDS)
+
+
+class DailyStatusRollup(models.Model):
+    """Appointment count and booked minutes per (date, doctor, status).
+
+    Kept up to date incrementally by ``apps.appointments.rollups``;
+    ``manage.py rebuild_status_rollups`` recomputes and verifies it.
+    """
+
+    date = models.DateField()
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name="+")
+    # Rows of an unused status are all zero, so they can go with it.
+    status = models.ForeignKey(
+        AppointmentStatus, on_delete=models.CASCADE, related_name="+"
+    )
+    count = models.IntegerField(default=0)
+    minutes = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "doctor", "status"], name="uq_rollup_date_doctor_status"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["doctor", "date"], name="ix_rollup_doctor_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.doctor_id} {self.status_id}: {self.count}"
+
+
+class AppointmentChange(models.Model):
+    """Append-only change log of appointments.
+
+    Rows are written in the same transaction as the appointment change. A move
+    to another doctor or date is logged as ``removed`` for the old scope and
+    ``updated`` for the new one, so feeds filtered by date or doctor stay
+    consistent. ``seq``, the position in the feed, is given after commit by
+    ``changes.number_pending``; ``id`` follows insert order, not commit order.
+    """
+
+    CREATED = "created"
+    UPDATED = "updated"
+    REMOVED = "removed"
+    DELETED = "deleted"
+    ACTION_CHOICES = [
+        (CREATED, "Created"),
+        (UPDATED, "Updated"),
+        (REMOVED, "Moved away"),
+        (DELETED, "Deleted"),
+    ]
+
+    appointment_id = models.BigIntegerField()
+    action = models.CharField(max_length=16, choices=ACTION_CHOICES)
+    doctor_id = models.BigIntegerField()
+    date = models.DateField()
+    data = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    seq = models.BigIntegerField(blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["seq"], name="ix_change_seq"),
+            models.Index(fields=["date", "id"], name="ix_change_date_seq"),
+            models.Index(fields=["doctor_id", "id"], name="ix_change_doctor_seq"),
+            # Version lookups of one doctor's days (see versions.py).
+            models.Index(fields=["doctor_id", "date", "id"], name="ix_change_doctor_date"),
+        ]
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"#{self.pk} {self.action} appointment {self.appointment_id}"
+
+
+class VersionCounter(models.Model):
+    """A named counter in the database, bumped inside the writing transaction.
+
+    ``versions.DIRECTORY`` counts changes that alter rendered rows of any
+    date (renames, status changes, archiving); per-date versions come from
+    ``AppointmentChange``. ``changes.SEQUENCE`` and ``changes.PRUNED`` hold
+    the last ``seq`` given and the last one pruned from the change log.
+    """
+
+    key = models.CharField(max_length=64, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
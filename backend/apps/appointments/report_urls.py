@@ -1,9 +1,22 @@
+from django.conf import settings
 from django.urls import path
-from .views import DailyReportView, DoctorDailyReportView, CancelledReportView
+from .views import (
+    DailyReportView,
+    DoctorDailyReportView,
+    CancelledReportView,
+    ReportExportView,
+)
+
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import (
+        AsyncCancelledReportView as CancelledReportView,
+        AsyncDailyReportView as DailyReportView,
+        AsyncDoctorDailyReportView as DoctorDailyReportView,
+    )
 
 urlpatterns = [
     path("daily/", DailyReportView.as_view(), name="report-daily"),
     path("doctor-daily/", DoctorDailyReportView.as_view(), name="report-doctor-daily"),
     path("cancelled/", CancelledReportView.as_view(), name="report-cancelled"),
+    path("export/", ReportExportView.as_view(), name="report-export"),
 ]
-
@@ -0,0 +1,74 @@
+"""Incremental maintenance of ``DailyStatusRollup``.
+
+Every appointment write turns into +/- deltas on (date, doctor, status) keys,
+applied with ``F()`` updates inside the writer's transaction.
+"""
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import DailyStatusRollup, duration_minutes
+
+
+def _contribution(snapshot):
+    doctor_id, date, time_start, time_end, status_id = snapshot
+    return (date, doctor_id, status_id), duration_minutes(time_start, time_end)
+
+
+def apply_deltas(deltas):
+    """Apply ``{(date, doctor_id, status_id): (count, minutes)}`` deltas."""
+    for (date, doctor_id, status_id), (count, minutes) in sorted(deltas.items()):
+        if not count and not minutes:
+            continue
+        key = {"date": date, "doctor_id": doctor_id, "status_id": status_id}
+        changes = {"count": F("count") + count, "minutes": F("minutes") + minutes}
+        if DailyStatusRollup.objects.filter(**key).update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                DailyStatusRollup.objects.create(**key, count=count, minutes=minutes)
+        except IntegrityError:
+            # Created concurrently; the row exists now.
+            DailyStatusRollup.objects.filter(**key).update(**changes)
+
+
+def record_change(before, after):
+    """Record one appointment going from snapshot ``before`` to ``after``.
+
+    Either side may be ``None`` for creation and deletion.
+    """
+    deltas = defaultdict(lambda: (0, 0))
+    for snapshot, sign in ((before, -1), (after, 1)):
+        if snapshot is None:
+            continue
+        key, minutes = _contribution(snapshot)
+        count_delta, minutes_delta = deltas[key]
+        deltas[key] = (count_delta + sign, minutes_delta + sign * minutes)
+    apply_deltas(deltas)
+
+
+def record_created(appointments):
+    counts, minutes = Counter(), Counter()
+    for appointment in appointments:
+        key, duration = _contribution(appointment.snapshot())
+        counts[key] += 1
+        minutes[key] += duration
+    apply_deltas({key: (counts[key], minutes[key]) for key in counts})
+
+
+def compute_rollups(*querysets):
+    """Return ``{(date, doctor_id, status_id): (count, minutes)}`` from raw rows.
+
+    Pass the ``ArchivedAppointment`` rows too: archived appointments count.
+    """
+    counts, minutes = Counter(), Counter()
+    for queryset in querysets:
+        rows = queryset.order_by().values_list(
+            "date", "doctor_id", "status_id", "time_start", "time_end"
+        )
+        for date, doctor_id, status_id, time_start, time_end in rows.iterator(chunk_size=5000):
+            key = (date, doctor_id, status_id)
+            counts[key] += 1
+            minutes[key] += duration_minutes(time_start, time_end)
+    return {key: (counts[key], minutes[key]) for key in counts}
@@ -1,7 +1,27 @@
+from django.conf import settings
 from django.urls import path
-from .views import ScheduleView
+from .views import (
+    AvailabilityView,
+    ScheduleChangeStreamView,
+    ScheduleChangesView,
+    ScheduleGridView,
+    ScheduleView,
+)
+
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import (
+        AsyncScheduleChangeStreamView as ScheduleChangeStreamView,
+        AsyncScheduleView as ScheduleView,
+    )
 
 urlpatterns = [
     path("", ScheduleView.as_view(), name="schedule"),
+    path("grid/", ScheduleGridView.as_view(), name="schedule-grid"),
+    path("changes/", ScheduleChangesView.as_view(), name="schedule-changes"),
+    path(
+        "changes/stream/",
+        ScheduleChangeStreamView.as_view(),
+        name="schedule-changes-stream",
+    ),
+    path("availability/", AvailabilityView.as_view(), name="schedule-availability"),
 ]
-
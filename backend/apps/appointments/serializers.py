@@ -1,9 +1,11 @@
 from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
 from apps.patients.models import Patient
 from apps.doctors.models import Doctor
-from .models import Appointment, AppointmentStatus
+from .models import Appointment, AppointmentSeries, AppointmentStatus
+from .status_registry import statuses
 
 
 class AppointmentStatusSerializer(serializers.ModelSerializer):
@@ -12,7 +14,24 @@ class AppointmentStatusSerializer(serializers.ModelSerializer):
         fields = ["id", "code", "name"]
 
 
+class StatusRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves status ids through the in-process registry instead of a query."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        status = statuses.by_id(pk)
+        if status is None:
+            self.fail("does_not_exist", pk_value=data)
+        return status
+
+
 class AppointmentSerializer(serializers.ModelSerializer):
+    status = StatusRelatedField(queryset=AppointmentStatus.objects.all())
     patient_name = serializers.SerializerMethodField()
     doctor_name = serializers.SerializerMethodField()
     status_code = serializers.SerializerMethodField()
@@ -34,8 +53,9 @@ class AppointmentSerializer(serializers.ModelSerializer):
             "status_name",
             "note",
             "created_at",
+            "updated_at",
         ]
-        read_only_fields = ["id", "created_at", "patient_name", "doctor_name", "status_code", "status_name"]
+        read_only_fields = ["id", "created_at", "updated_at", "patient_name", "doctor_name", "status_code", "status_name"]
 
     def get_patient_name(self, obj):
         return f"{obj.patient.last_name} {obj.patient.first_name}"
@@ -44,17 +64,19 @@ class AppointmentSerializer(serializers.ModelSerializer):
         return f"{obj.doctor.last_name} {obj.doctor.first_name}"
 
     def get_status_code(self, obj):
-        return obj.status.code if obj.status else None
+        status = statuses.by_id(obj.status_id)
+        return status.code if status else None
 
     def get_status_name(self, obj):
-        return obj.status.name if obj.status else None
+        status = statuses.by_id(obj.status_id)
+        return status.name if status else None
 
     def validate(self, attrs):
         # Model.clean will handle overlap; keep here to allow early validation if needed.
         return super().validate(attrs)
 
     def _get_planned_status(self):
-        return AppointmentStatus.objects.get(code="planned")
+        return statuses.get("planned")
 
     def create(self, validated_data):
         with transaction.atomic():
@@ -66,3 +88,48 @@ class AppointmentSerializer(serializers.ModelSerializer):
         with transaction.atomic():
             return super().update(instance, validated_data)
 
+
+class AppointmentSeriesSerializer(serializers.ModelSerializer):
+    """The recurrence rule; occurrences are booked by ``series.book_series``."""
+
+    MAX_OCCURRENCES = 104
+
+    interval_weeks = serializers.IntegerField(min_value=1, max_value=4, default=1)
+    count = serializers.IntegerField(
+        min_value=1, max_value=MAX_OCCURRENCES, required=False, allow_null=True
+    )
+
+    class Meta:
+        model = AppointmentSeries
+        fields = [
+            "id",
+            "patient",
+            "doctor",
+            "date_start",
+            "interval_weeks",
+            "count",
+            "until",
+            "time_start",
+            "time_end",
+            "note",
+            "created_at",
+        ]
+        read_only_fields = ["id", "created_at"]
+
+    def validate(self, attrs):
+        if attrs["time_end"] <= attrs["time_start"]:
+            raise serializers.ValidationError("time_end must be after time_start")
+        count, until = attrs.get("count"), attrs.get("until")
+        if (count is None) == (until is None):
+            raise serializers.ValidationError("Exactly one of count and until is required")
+        if attrs["date_start"] < timezone.localdate():
+            raise serializers.ValidationError({"date_start": "must not be in the past"})
+        if until is not None:
+            if until < attrs["date_start"]:
+                raise serializers.ValidationError({"until": "must not be before date_start"})
+            weeks = (until - attrs["date_start"]).days // 7
+            if weeks // attrs["interval_weeks"] + 1 > self.MAX_OCCURRENCES:
+                raise serializers.ValidationError(
+                    {"until": f"the series is limited to {self.MAX_OCCURRENCES} occurrences"}
+                )
+        return attrs
@@ -0,0 +1,139 @@
+"""Booking of recurring appointment series.
+
+``book_series`` expands the rule, locks the ``DoctorDay`` rows of every
+occurrence and loads the doctor's bookings around the whole series with one
+range query (``availability.busy_intervals``), so each occurrence is checked
+in memory instead of by ``Appointment.clean()``'s query. The occurrences
+that fit are inserted in the same transaction with
+``bulk.insert_appointments``. For each one that conflicts, the nearest free
+slot of the same length within ``SUGGEST_DAYS`` days is suggested, taken
+from the doctor's working hours as in ``find_available_slots``.
+"""
+from bisect import insort
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .availability import (
+    busy_intervals,
+    free_gaps,
+    from_minutes,
+    slots_in_gaps,
+    to_minutes,
+    working_windows,
+)
+from .bulk import insert_appointments
+from .models import OVERLAP_ERROR, Appointment, AppointmentSeries, DoctorDay
+from .status_registry import statuses
+
+SUGGEST_DAYS = 3
+SUGGEST_STEP_MINUTES = 15
+
+
+def occurrences(date_start, interval_weeks, count=None, until=None):
+    """Dates of the rule: every ``interval_weeks`` weeks, ``count`` times or up to ``until``."""
+    step = timedelta(weeks=interval_weeks)
+    dates, day = [], date_start
+    while (count is None or len(dates) < count) and (until is None or day <= until):
+        dates.append(day)
+        day += step
+    return dates
+
+
+def _overlaps(intervals, start, end):
+    return any(busy_start < end and busy_end > start for busy_start, busy_end in intervals)
+
+
+def _nearest_slot(doctor_id, day, start, end, busy, windows):
+    """The free slot closest in time to ``start`` on ``day``, within ``SUGGEST_DAYS``."""
+    now = timezone.localtime()
+    today, now_minutes = now.date(), to_minutes(now, round_up=True)
+    best = None
+    for offset in range(-SUGGEST_DAYS, SUGGEST_DAYS + 1):
+        candidate = day + timedelta(days=offset)
+        if candidate < today:
+            continue
+        gaps = free_gaps(
+            windows[doctor_id].get(candidate.weekday(), []), busy.get((doctor_id, candidate), [])
+        )
+        for slot_start, slot_end in slots_in_gaps(gaps, end - start, SUGGEST_STEP_MINUTES):
+            if candidate == today and slot_start < now_minutes:
+                continue
+            distance = abs(offset * 24 * 60 + slot_start - start)
+            if best is None or distance < best[0]:
+                best = (distance, candidate, slot_start, slot_end)
+    if best is None:
+        return None
+    _, candidate, slot_start, slot_end = best
+    return {
+        "date": candidate,
+        "time_start": from_minutes(slot_start),
+        "time_end": from_minutes(slot_end),
+    }
+
+
+def book_series(data, all_or_nothing=False):
+    """Create the series described by ``data`` and book its free occurrences.
+
+    ``data`` is ``AppointmentSeriesSerializer.validated_data``. Returns
+    ``(series, created, conflicts)``: the series (None when nothing was
+    booked), the created appointments and, per conflicting occurrence, a
+    dict with the error and a ``suggestion`` (or None).
+    """
+    patient, doctor = data["patient"], data["doctor"]
+    dates = occurrences(
+        data["date_start"], data["interval_weeks"], data.get("count"), data.get("until")
+    )
+    start = to_minutes(data["time_start"])
+    end = to_minutes(data["time_end"], round_up=True)
+    planned = statuses.get_or_none("planned")
+    if planned is None:
+        raise ValidationError("Planned status not configured")
+
+    with transaction.atomic():
+        days = DoctorDay.lock_many((doctor.pk, day) for day in dates)
+        margin = timedelta(days=SUGGEST_DAYS)
+        busy = busy_intervals([doctor.pk], dates[0] - margin, dates[-1] + margin)
+        accepted, conflicting = [], []
+        for day in dates:
+            if _overlaps(busy.get((doctor.pk, day), []), start, end):
+                conflicting.append(day)
+            else:
+                accepted.append(day)
+
+        series, created = None, []
+        if accepted and not (conflicting and all_or_nothing):
+            series = AppointmentSeries.objects.create(**data)
+            objs = []
+            for day in accepted:
+                appointment = Appointment(
+                    patient=patient,
+                    doctor=doctor,
+                    date=day,
+                    time_start=data["time_start"],
+                    time_end=data["time_end"],
+                    status=planned,
+                    note=data.get("note"),
+                    series=series,
+                )
+                appointment.update_search_keys()
+                objs.append(appointment)
+                insort(busy[(doctor.pk, day)], (start, end))
+            created = insert_appointments(
+                objs, {(doctor.pk, day): days[(doctor.pk, day)] for day in accepted}
+            )
+
+    windows = working_windows([doctor.pk])
+    conflicts = [
+        {
+            "date": day,
+            "time_start": data["time_start"],
+            "time_end": data["time_end"],
+            "error": OVERLAP_ERROR,
+            "suggestion": _nearest_slot(doctor.pk, day, start, end, busy, windows),
+        }
+        for day in conflicting
+    ]
+    return series, created, conflicts
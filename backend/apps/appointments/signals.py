@@ -0,0 +1,122 @@
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from apps.doctors.models import Doctor
+from apps.patients.models import Patient
+from apps.patients.signals import patients_bulk_upserted
+from . import archive, changes, rollups, versions
+from .models import Appointment, AppointmentStatus, ArchivedAppointment, DoctorDay
+from .status_registry import statuses
+
+# Sent by set-based write paths that bypass Model.save() (bulk_create) with
+# ``appointments``, the list of created instances.
+appointments_bulk_created = Signal()
+
+
+@receiver(post_save, sender=Appointment)
+def update_rollups_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.record_change(getattr(instance, "_previous", None), instance.snapshot())
+
+
+@receiver(appointments_bulk_created)
+def update_rollups_on_bulk_create(sender, appointments, **kwargs):
+    rollups.record_created(appointments)
+
+
+@receiver(post_delete, sender=Appointment)
+def release_doctor_day(sender, instance, **kwargs):
+    if archive.in_progress():
+        return
+    with transaction.atomic():
+        day = (
+            DoctorDay.objects.select_for_update()
+            .filter(doctor_id=instance.doctor_id, date=instance.date)
+            .first()
+        )
+        if day is not None:
+            day.rebuild()
+
+
+@receiver(post_delete, sender=Appointment)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    # Archived rows keep counting in the rollup.
+    if archive.in_progress():
+        return
+    rollups.record_change(instance.snapshot(), None)
+
+
+@receiver(post_delete, sender=ArchivedAppointment)
+def update_rollups_on_archived_delete(sender, instance, **kwargs):
+    rollups.record_change(instance.snapshot(), None)
+
+
+@receiver(post_save, sender=AppointmentStatus)
+@receiver(post_delete, sender=AppointmentStatus)
+def invalidate_status_registry(sender, **kwargs):
+    transaction.on_commit(statuses.invalidate)
+    versions.bump_directory()
+
+
+@receiver(post_save, sender=Appointment)
+def log_change_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        changes.record_saved(instance, getattr(instance, "_previous", None))
+
+
+@receiver(post_delete, sender=Appointment)
+def log_change_on_delete(sender, instance, **kwargs):
+    if archive.in_progress():
+        return
+    changes.record_deleted(instance)
+
+
+@receiver(appointments_bulk_created)
+def log_changes_on_bulk_create(sender, appointments, **kwargs):
+    changes.record_created(appointments)
+
+
+@receiver(post_save, sender=Patient)
+@receiver(post_save, sender=Doctor)
+def bump_directory_version(sender, created, **kwargs):
+    # A new patient is in no rendered row yet; a new doctor is a new grid column.
+    if not created or sender is Doctor:
+        versions.bump_directory()
+
+
+@receiver(post_delete, sender=Doctor)
+def bump_directory_on_doctor_delete(sender, **kwargs):
+    versions.bump_directory()
+
+
+@receiver(post_save, sender=Patient)
+def copy_patient_search_keys(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    for model in (Appointment, ArchivedAppointment):
+        model.objects.filter(patient_id=instance.pk).exclude(
+            patient_search=instance.search_name,
+            patient_search_alt=instance.search_name_alt,
+            patient_phone=instance.phone_digits,
+        ).update(
+            patient_search=instance.search_name,
+            patient_search_alt=instance.search_name_alt,
+            patient_phone=instance.phone_digits,
+        )
+
+
+@receiver(patients_bulk_upserted)
+def copy_patient_search_keys_on_bulk_upsert(sender, updated, renamed, **kwargs):
+    if updated:
+        versions.bump_directory()
+    if not renamed:
+        return
+    patient = Patient.objects.filter(pk=OuterRef("patient_id"))
+    for model in (Appointment, ArchivedAppointment):
+        model.objects.filter(patient_id__in=renamed).update(
+            patient_search=Subquery(patient.values("search_name")[:1]),
+            patient_search_alt=Subquery(patient.values("search_name_alt")[:1]),
+        )
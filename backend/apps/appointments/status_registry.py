@@ -0,0 +1,114 @@
+"""Process-local registry of ``AppointmentStatus`` rows.
+
+The table is tiny and almost never changes, so it is loaded once per process
+and served from memory by ``code`` and by ``id``. Writes invalidate it through
+``post_save``/``post_delete`` signals; other processes notice through a
+version token kept in the shared cache, checked at most every
+``STATUS_REGISTRY_CHECK_INTERVAL`` seconds.
+"""
+import asyncio
+import threading
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import AppointmentStatus
+
+VERSION_CACHE_KEY = "appointments:status-registry:version"
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class StatusRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (by_id, by_code), replaced as a whole so readers never see half of it.
+        self._maps = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def _shared_version(self):
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(VERSION_CACHE_KEY)
+        return version
+
+    def _ensure_loaded(self):
+        """Return ``(by_id, by_code)``, reloaded first if due."""
+        maps = self._maps
+        now = time.monotonic()
+        interval = getattr(settings, "STATUS_REGISTRY_CHECK_INTERVAL", 5)
+        if maps is not None and (now - self._checked_at < interval or _in_event_loop()):
+            # The ORM cannot run in an event loop; async code refreshes
+            # through aload() and reads the loaded copy meanwhile.
+            return maps
+        with self._lock:
+            version = self._shared_version()
+            self._checked_at = now
+            maps = self._maps
+            if maps is not None and version == self._version:
+                return maps
+            statuses = list(AppointmentStatus.objects.all())
+            maps = (
+                {status.pk: status for status in statuses},
+                {status.code: status for status in statuses},
+            )
+            self._maps, self._version = maps, version
+            return maps
+
+    async def aload(self):
+        """Refresh the local copy if due, from async code.
+
+        Lookups made inside the event loop never reload, so async views call
+        this once and then use ``get``/``by_id`` as usual.
+        """
+        await sync_to_async(self._ensure_loaded)()
+
+    def get(self, code):
+        """Return the status with ``code`` or raise ``AppointmentStatus.DoesNotExist``."""
+        status = self.get_or_none(code)
+        if status is None:
+            raise AppointmentStatus.DoesNotExist(f"No appointment status {code!r}")
+        return status
+
+    def get_or_none(self, code):
+        _, by_code = self._ensure_loaded()
+        return by_code.get(code)
+
+    def by_id(self, pk):
+        by_id, _ = self._ensure_loaded()
+        return by_id.get(pk)
+
+    def all(self):
+        by_id, _ = self._ensure_loaded()
+        return list(by_id.values())
+
+    def load(self):
+        """Reload this process's copy now, for ids written since it was loaded.
+
+        Other processes are left alone; ``invalidate`` is for status writes.
+        """
+        with self._lock:
+            self._version = None
+            self._checked_at = 0.0
+        self._ensure_loaded()
+
+    def invalidate(self):
+        """Reload on the next lookup and tell other processes to do the same."""
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+        with self._lock:
+            self._version = None
+            self._checked_at = 0.0
+
+
+statuses = StatusRegistry()
@@ -0,0 +1,1158 @@
+import base64
+import csv
+import gzip
+import io
+import json
+import tempfile
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, router, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from apps.doctors.models import Doctor, DoctorWorkingHours
+from apps.patients.async_views import AsyncPatientLookupView
+from apps.patients.models import Patient
+from apps.patients.views import PatientViewSet
+from apps.users.views import LoginSerializer
+from common.metrics import metrics
+from common.renderers import ORJSONRenderer
+from common.replicas import ReplicaReadMixin
+from . import archive, changes
+from .async_views import (
+    AsyncCancelledReportView,
+    AsyncDailyReportView,
+    AsyncDoctorDailyReportView,
+    AsyncScheduleView,
+)
+from .management.commands import bench_endpoints
+from .export import EXPORT_COLUMNS, stream_csv
+from .models import (
+    OVERLAP_ERROR,
+    Appointment,
+    AppointmentChange,
+    AppointmentSeries,
+    AppointmentStatus,
+    ArchivedAppointment,
+    DailyStatusRollup,
+    DoctorDay,
+)
+from .read import ROW_ORDERING, appointment_rows
+from .serializers import AppointmentSerializer
+from .status_registry import VERSION_CACHE_KEY, statuses
+from .views import (
+    AppointmentViewSet,
+    CancelledReportView,
+    DailyReportView,
+    DoctorDailyReportView,
+    ScheduleView,
+)
+
+
+class APITestCase(TestCase):
+    fixtures = ["appointment_statuses"]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.registrar = User.objects.create_user("registrar")
+        cls.registrar.groups.add(Group.objects.get_or_create(name="registrar")[0])
+        cls.doctor = Doctor.objects.create(
+            first_name="Ivan", last_name="Petrenko", specialization="Therapist"
+        )
+        cls.patient = Patient.objects.create(
+            first_name="Олена", last_name="Сидоренко", phone="+380501234567"
+        )
+        cls.day = timezone.localdate() + timedelta(days=7)
+
+    def setUp(self):
+        self.client = APIClient()
+        token = LoginSerializer.get_token(self.registrar).access_token
+        self.authorization = f"Bearer {token}"
+        self.client.credentials(HTTP_AUTHORIZATION=self.authorization)
+
+    def book(self, day=None, start=time(10), end=time(10, 30), **fields):
+        fields.setdefault("patient", self.patient)
+        fields.setdefault("doctor", self.doctor)
+        fields.setdefault("status", statuses.get("planned"))
+        return Appointment.objects.create(
+            date=day or self.day, time_start=start, time_end=end, **fields
+        )
+
+
+class AvailabilityTests(APITestCase):
+    def test_free_slots_skip_bookings(self):
+        DoctorWorkingHours.objects.create(
+            doctor=self.doctor, weekday=self.day.weekday(), time_start=time(9), time_end=time(12)
+        )
+        self.book(start=time(10), end=time(10, 40))
+
+        response = self.client.get(
+            "/api/schedule/availability/",
+            {"from": self.day.isoformat(), "doctor_id": self.doctor.pk, "duration": 30},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        [day] = response.json()
+        self.assertEqual(day["date"], self.day.isoformat())
+        self.assertEqual(
+            [slot["time_start"] for slot in day["slots"]],
+            ["09:00:00", "09:30:00", "11:00:00", "11:30:00"],
+        )
+
+    def test_past_days_have_no_slots(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        response = self.client.get(
+            "/api/schedule/availability/", {"from": yesterday.isoformat(), "duration": 30}
+        )
+        self.assertEqual(response.json(), [])
+
+
+class BulkBookingTests(APITestCase):
+    def row(self, start, end, **fields):
+        return {
+            "patient": self.patient.pk,
+            "doctor": self.doctor.pk,
+            "date": self.day.isoformat(),
+            "time_start": start,
+            "time_end": end,
+            **fields,
+        }
+
+    def test_valid_rows_are_booked_and_the_rest_reported(self):
+        self.book(start=time(9), end=time(9, 30))
+        rows = [
+            self.row("09:15", "09:45"),
+            self.row("11:00", "11:30"),
+            self.row("11:15", "11:45"),
+            self.row("12:00", "12:30", patient=0),
+            self.row("13:00", "13:30", patient=self.patient.pk + 100),
+            self.row("14:00", "14:30"),
+        ]
+
+        response = self.client.post("/api/appointments/bulk/", rows, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row["index"] for row in response.data["created"]], [1, 5])
+        errors = {row["index"]: row["errors"] for row in response.data["errors"]}
+        self.assertEqual(sorted(errors), [0, 2, 3, 4])
+        self.assertEqual(errors[0]["non_field_errors"], [OVERLAP_ERROR])
+        self.assertEqual(errors[2]["non_field_errors"], ["Overlaps row 1 of this request"])
+        self.assertIn("patient", errors[3])
+        self.assertIn("patient", errors[4])
+        self.assertEqual(Appointment.objects.count(), 3)
+
+    def test_ledger_matches_the_booked_rows(self):
+        self.book(start=time(9), end=time(9, 30))
+        rows = [self.row("10:00", "10:20"), self.row("10:20", "11:05")]
+        rows.append(self.row("09:00", "09:30", date=(self.day + timedelta(days=1)).isoformat()))
+
+        response = self.client.post("/api/appointments/bulk/", rows, format="json")
+
+        self.assertEqual(len(response.data["created"]), 3)
+        days = DoctorDay.objects.filter(doctor=self.doctor)
+        self.assertEqual(days.count(), 2)
+        for day in days:
+            self.assertEqual(day.bits, day.compute_bits())
+
+    def test_all_or_nothing_books_nothing_on_conflict(self):
+        self.book(start=time(9), end=time(9, 30))
+        payload = {
+            "appointments": [self.row("09:00", "09:30"), self.row("10:00", "10:30")],
+            "all_or_nothing": True,
+        }
+
+        response = self.client.post("/api/appointments/bulk/", payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["created"], [])
+        self.assertEqual(Appointment.objects.count(), 1)
+
+
+class ReadPathTests(APITestCase):
+    def serialized(self, appointments):
+        return json.loads(json.dumps(AppointmentSerializer(appointments, many=True).data))
+
+    def test_rows_match_the_serializer(self):
+        statuses.all()
+        # Not committed, so the registry does not know it yet.
+        no_show = AppointmentStatus.objects.create(code="no_show", name="No show")
+        self.addCleanup(statuses.invalidate)
+        self.book(note="Перший візит")
+        self.book(start=time(11), end=time(11, 30), status=no_show)
+        self.book(day=self.day + timedelta(days=1), start=time(9), end=time(9, 15))
+        queryset = Appointment.objects.order_by(*ROW_ORDERING)
+
+        rows = appointment_rows(queryset)
+
+        self.assertEqual(rows, self.serialized(queryset))
+        self.assertEqual([row["status_code"] for row in rows], ["planned", None, "planned"])
+
+    def test_archived_rows_are_merged_in_order(self):
+        old_day = timezone.localdate() - timedelta(days=400)
+        self.book(day=old_day, start=time(9), end=time(9, 30))
+        self.book(day=old_day, start=time(12), end=time(12, 30))
+        self.book(day=old_day - timedelta(days=1))
+        archive.archive_batch(old_day + timedelta(days=1), [statuses.get("planned").pk], 10)
+        self.book(day=old_day, start=time(10), end=time(10, 30))
+        self.book()
+        hot = Appointment.objects.all()
+        archived = ArchivedAppointment.objects.all()
+
+        rows = appointment_rows(hot, archived=archived)
+
+        self.assertEqual(archived.count(), 3)
+        expected = sorted([*hot, *archived], key=lambda row: row.pk)
+        expected.sort(key=lambda row: (row.date, row.time_start), reverse=True)
+        self.assertEqual(rows, self.serialized(expected))
+
+
+class ScheduleETagTests(APITestCase):
+    def test_version_comes_from_the_database(self):
+        url = f"/api/schedule/?date={self.day}"
+        etag = self.client.get(url)["ETag"]
+        self.book()
+        # Another worker process does not share this cache.
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_rename_changes_version(self):
+        self.book()
+        url = f"/api/schedule/?date={self.day}"
+        etag = self.client.get(url)["ETag"]
+        self.patient.first_name = "Ольга"
+        self.patient.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class AsyncViewParityTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        past = timezone.localdate() - timedelta(days=3)
+        self.book()
+        self.book(start=time(11), end=time(11, 45), status=statuses.get("cancelled"))
+        self.book(day=past, status=statuses.get("cancelled"))
+        archive.archive_batch(timezone.localdate(), [statuses.get("cancelled").pk], 10)
+        self.params = {"from": past.isoformat(), "to": self.day.isoformat()}
+
+    async def assertSameResponse(self, sync_view, async_view, url, params):
+        request = APIRequestFactory().get(url, params, HTTP_AUTHORIZATION=self.authorization)
+        expected = await sync_to_async(sync_view)(request)
+        await sync_to_async(expected.render)()
+
+        request = APIRequestFactory().get(url, params, HTTP_AUTHORIZATION=self.authorization)
+        response = await async_view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response["ETag"], expected["ETag"])
+
+    async def test_async_views_match_the_sync_ones(self):
+        doctor = {"doctor_id": str(self.doctor.pk)}
+        cases = (
+            (ScheduleView, AsyncScheduleView, "/api/schedule/", {"date": self.day.isoformat()}),
+            (DailyReportView, AsyncDailyReportView, "/api/reports/daily/", self.params),
+            (
+                DoctorDailyReportView,
+                AsyncDoctorDailyReportView,
+                "/api/reports/doctor-daily/",
+                {**self.params, **doctor},
+            ),
+            (
+                CancelledReportView,
+                AsyncCancelledReportView,
+                "/api/reports/cancelled/",
+                self.params,
+            ),
+        )
+        for sync_view, async_view, url, params in cases:
+            with self.subTest(url=url):
+                await self.assertSameResponse(
+                    sync_view.as_view(), async_view.as_view(), url, params
+                )
+
+    async def test_async_lookup_matches_the_sync_one(self):
+        request = APIRequestFactory().get(
+            "/api/patients/lookup/", {"q": "sydor"}, HTTP_AUTHORIZATION=self.authorization
+        )
+        expected = await sync_to_async(PatientViewSet.as_view({"get": "lookup"}))(request)
+        await sync_to_async(expected.render)()
+        request = APIRequestFactory().get(
+            "/api/patients/lookup/", {"q": "sydor"}, HTTP_AUTHORIZATION=self.authorization
+        )
+
+        response = await AsyncPatientLookupView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(len(json.loads(response.content)), 1)
+
+
+class AppointmentFilterTests(APITestCase):
+    def test_filters_run_in_sql(self):
+        other_doctor = Doctor.objects.create(
+            first_name="Maria", last_name="Kovalenko", specialization="Surgeon"
+        )
+        other_patient = Patient.objects.create(
+            first_name="Петро", last_name="Мельник", phone="+380501234568"
+        )
+        match = self.book()
+        self.book(start=time(11), end=time(11, 30), patient=other_patient)
+        self.book(doctor=other_doctor)
+        self.book(day=self.day + timedelta(days=1))
+        self.book(start=time(12), end=time(12, 30), status=statuses.get("cancelled"))
+        statuses.all()
+
+        # One COUNT(*) and one page, however many filters are given.
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                "/api/appointments/",
+                {
+                    "date": self.day,
+                    "doctor": self.doctor.pk,
+                    "status": "planned",
+                    "patient": self.patient.pk,
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.data["results"]], [match.pk])
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                "/api/appointments/",
+                {"date_from": self.day, "date_to": self.day, "status": "planned,cancelled"},
+            )
+        self.assertEqual(response.data["count"], 4)
+
+
+class AppointmentSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.doctor.middle_name = "Andriiovych"
+        cls.doctor.save()
+        cls.local_patient = Patient.objects.create(
+            first_name="Петро", last_name="Мельник", phone="067 765 43 21"
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.match = self.book()
+        self.local_match = self.book(start=time(11), end=time(11, 30), patient=self.local_patient)
+
+    def search(self, query):
+        response = self.client.get("/api/appointments/", {"search": query})
+        return {row["id"] for row in response.data["results"]}
+
+    def test_patient_first_name(self):
+        self.assertEqual(self.search("Олена"), {self.match.pk})
+        self.assertEqual(self.search("olena sydor"), {self.match.pk})
+        self.assertEqual(self.search("Сидоренко Ол"), {self.match.pk})
+
+    def test_doctor_name_words(self):
+        both = {self.match.pk, self.local_match.pk}
+        self.assertEqual(self.search("Ivan"), both)
+        self.assertEqual(self.search("Андрійович"), both)
+        self.assertEqual(self.search("andr petr"), both)
+        self.assertEqual(self.search("ivan ivan"), set())
+
+    def test_phone_formats(self):
+        for query in ("050123", "+38050123", "38050123", "8050123", "501234", "(050) 123-45"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), {self.match.pk})
+        # Stored normalized, whatever format the phone was typed in.
+        for query in ("067765", "+380677654321", "677654"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), {self.local_match.pk})
+
+
+class ExportTests(APITestCase):
+    def export(self, **params):
+        params = {"from": self.day.isoformat(), "to": self.day.isoformat(), **params}
+        return self.client.get("/api/reports/export/", params)
+
+    def test_csv_and_ndjson_stream_the_same_rows(self):
+        first = self.book(note="=HYPERLINK(\"http://example.com\")")
+        second = self.book(start=time(11), end=time(11, 30))
+
+        response = self.export(format="csv")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        content = b"".join(response.streaming_content).decode("utf-8")
+        header, *rows = csv.reader(io.StringIO(content.lstrip("\ufeff")))
+        self.assertEqual(header, EXPORT_COLUMNS)
+        self.assertEqual([row[0] for row in rows], [str(first.pk), str(second.pk)])
+        self.assertEqual(rows[0][7], "Сидоренко Олена")
+        self.assertEqual(rows[0][-1], "'=HYPERLINK(\"http://example.com\")")
+        self.assertEqual(rows[1][9], "planned")
+
+        response = self.export(format="ndjson")
+
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        items = [json.loads(line) for line in lines]
+        self.assertEqual([item["id"] for item in items], [first.pk, second.pk])
+        self.assertEqual(items[0]["note"], first.note)
+        self.assertEqual(items[1]["time_start"], "11:00:00")
+
+    def test_formula_cells_are_quoted(self):
+        rows = [(1, "-Іванов", "+380501234567", "@me", "Олена", None, 5)]
+        content = "".join(stream_csv(rows))
+        self.assertEqual(
+            content.splitlines()[1], "1,'-Іванов,'+380501234567,'@me,Олена,,5"
+        )
+
+    def test_errors_are_json(self):
+        response = self.client.get("/api/reports/export/", {"from": "bad", "format": "csv"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("from", response.json())
+
+
+class RenderingTests(APITestCase):
+    def test_orjson_output_matches_json_renderer(self):
+        self.book(note="Alt\u2028line")
+        self.book(start=time(11), end=time(11, 45), note=None)
+        payload = {
+            "items": list(
+                Appointment.objects.values(
+                    "id", "date", "time_start", "time_end", "note", "patient__last_name"
+                ).order_by("time_start")
+            ),
+            "created_at": timezone.now(),
+            "price": Decimal("1250.50"),
+            "missing": None,
+            "totals": [{"status__code": "planned", "count": 2, "minutes": 75}],
+        }
+        self.assertIsInstance(payload["items"][0]["date"], date)
+        self.assertIsInstance(payload["items"][0]["time_start"], time)
+
+        for media_type in ("application/json", "application/json; indent=4"):
+            with self.subTest(media_type=media_type):
+                self.assertEqual(
+                    ORJSONRenderer().render(payload, media_type),
+                    JSONRenderer().render(payload, media_type),
+                )
+
+    def test_only_large_responses_are_compressed(self):
+        self.book()
+        params = {"date": self.day.isoformat()}
+        length = len(self.client.get("/api/schedule/", params).content)
+
+        for min_length, encoding in ((length + 1, None), (length, "gzip")):
+            with self.subTest(min_length=min_length), override_settings(
+                GZIP_MIN_LENGTH=min_length
+            ):
+                response = self.client.get(
+                    "/api/schedule/", params, HTTP_ACCEPT_ENCODING="gzip"
+                )
+                self.assertEqual(response.get("Content-Encoding"), encoding)
+
+    def test_exports_stream_through_compression(self):
+        self.book()
+        params = {"from": self.day.isoformat(), "to": self.day.isoformat(), "format": "csv"}
+        plain = self.client.get("/api/reports/export/", params)
+        chunks = iter(plain.streaming_content)
+        # The header goes out before the rows are queried.
+        with self.assertNumQueries(0):
+            self.assertEqual(next(chunks).decode("utf-8").lstrip("\ufeff").split(",")[0], "id")
+        plain = b"".join(chunks)
+
+        response = self.client.get("/api/reports/export/", params, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertTrue(body.endswith(plain))
+
+
+class ChangeFeedTests(APITestCase):
+    def feed(self, since):
+        return self.client.get("/api/schedule/changes/", {"since": since})
+
+    def book(self, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return super().book(*args, **kwargs)
+
+    def pending(self, **fields):
+        """A change committed by a writer whose on_commit hook has not run yet."""
+        fields = {
+            "appointment_id": 0,
+            "action": "created",
+            "doctor_id": self.doctor.pk,
+            "date": self.day,
+            **fields,
+        }
+        return AppointmentChange.objects.create(**fields)
+
+    def test_late_commit_with_lower_id_is_not_skipped(self):
+        self.book()
+        since = self.client.get("/api/schedule/changes/").data["last_seq"]
+        placeholder = self.pending()
+        # A long transaction took the placeholder's id before the booking
+        # below and commits only after a reader has seen the booking.
+        placeholder.delete()
+        self.book(start=time(11), end=time(11, 30))
+        since = self.feed(since).data["last_seq"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending(id=placeholder.pk)
+            transaction.on_commit(changes.assign_sequence)
+
+        late = self.feed(since).data["changes"]
+        self.assertEqual([change["appointment"] for change in late], [0])
+        self.assertGreater(late[0]["seq"], since)
+
+    def test_readers_do_not_number_changes(self):
+        self.book()
+        since = changes.last_seq()
+        change = self.pending()
+
+        # One query each for the pruned and the log; nothing is written.
+        with self.assertNumQueries(2):
+            response = self.feed(since)
+        self.assertEqual(response.data["changes"], [])
+        change.refresh_from_db()
+        self.assertIsNone(change.seq)
+
+        out = io.StringIO()
+        call_command("sequence_changes", stdout=out)
+
+        self.assertEqual(out.getvalue(), "Numbered 1 change log entries.\n")
+        self.assertEqual([row["appointment"] for row in self.feed(since).data["changes"]], [0])
+
+    def test_pruned_changes_answer_gone(self):
+        for hour in (9, 10, 11):
+            self.book(start=time(hour), end=time(hour, 30))
+        since = changes.last_seq()
+        AppointmentChange.objects.update(created_at=timezone.now() - timedelta(days=60))
+
+        self.assertEqual(changes.prune_batch(changes.retention_horizon(), 10), 2)
+        # The newest entry stays for the version floor.
+        self.assertEqual(AppointmentChange.objects.count(), 1)
+        self.assertEqual(self.feed(0).status_code, 410)
+        response = self.feed(since)
+        self.assertEqual((response.status_code, response.data["changes"]), (200, []))
+
+
+class CursorPaginationTests(APITestCase):
+    def cursor(self, key, reverse=False):
+        raw = json.dumps({"r": int(reverse), "k": key}).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def test_pages_follow_the_index_order(self):
+        for offset in range(3):
+            day = self.day + timedelta(days=offset)
+            for hour in (9, 10):
+                self.book(day=day, start=time(hour), end=time(hour, 30))
+        expected = list(
+            Appointment.objects.order_by("-date", "-time_start", "id").values_list("id", flat=True)
+        )
+
+        seen, url = [], "/api/appointments/?pagination=cursor&page_size=4"
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            seen += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+        # The second page seeks on the leading column of ix_app_date_time.
+        self.assertIn('"date" <= ', queries[-1]["sql"])
+
+    def test_malformed_cursor_is_not_found(self):
+        day = str(self.day)
+        keys = [
+            ["x", 1, 2],
+            [day, "x", 1],
+            [day, "10:00", "x"],
+            [None, "10:00", 1],
+            [[1], "10:00", 1],
+            [day, "10:00"],
+        ]
+        for key in keys:
+            with self.subTest(key=key):
+                response = self.client.get("/api/appointments/", {"cursor": self.cursor(key)})
+                self.assertEqual(response.status_code, 404)
+        response = self.client.get("/api/appointments/", {"cursor": "not base64!"})
+        self.assertEqual(response.status_code, 404)
+
+
+class PerformanceTimingTests(APITestCase):
+    def serialize_seconds(self, view):
+        return metrics.serialize._series[(view, "GET")][-1]
+
+    def test_serializer_data_is_timed_apart_from_the_view(self):
+        self.book()
+        for view, url in (
+            ("appointment-list", "/api/appointments/"),
+            ("schedule", f"/api/schedule/?date={self.day}"),
+        ):
+            with self.subTest(view=view):
+                before = self.serialize_seconds(view)
+                response = self.client.get(url)
+                self.assertIn("serialize;dur=", response["Server-Timing"])
+                self.assertGreater(self.serialize_seconds(view), before)
+
+    def test_written_rows_are_timed_with_the_plain_serializer(self):
+        view = AppointmentViewSet(request=None, format_kwarg=None)
+        self.assertIs(view.get_serializer_class(), AppointmentSerializer)
+
+        before = metrics.serialize._series[("appointment-list", "POST")][-1]
+        payload = {
+            "patient": self.patient.pk,
+            "doctor": self.doctor.pk,
+            "date": self.day.isoformat(),
+            "time_start": "10:00",
+            "time_end": "10:30",
+            "status": statuses.get("planned").pk,
+        }
+        response = self.client.post("/api/appointments/", payload, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(metrics.serialize._series[("appointment-list", "POST")][-1], before)
+
+
+class DoctorDayLockTests(APITestCase):
+    def test_ledger_follows_booking_edits(self):
+        payload = {
+            "patient": self.patient.pk,
+            "doctor": self.doctor.pk,
+            "date": self.day.isoformat(),
+            "time_start": "10:00",
+            "time_end": "10:30",
+            "status": statuses.get("planned").pk,
+        }
+        response = self.client.post("/api/appointments/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        url = f"/api/appointments/{response.data['id']}/"
+        response = self.client.post("/api/appointments/", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["non_field_errors"], [OVERLAP_ERROR])
+        day = DoctorDay.objects.get(doctor=self.doctor, date=self.day)
+        self.assertEqual(day.bits, DoctorDay.mask(time(10), time(10, 30)))
+
+        self.client.patch(url, {"time_start": "11:00", "time_end": "11:45"}, format="json")
+        day.refresh_from_db()
+        self.assertEqual(day.bits, DoctorDay.mask(time(11), time(11, 45)))
+        response = self.client.post("/api/appointments/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        self.client.delete(url)
+        day.refresh_from_db()
+        self.assertEqual(day.bits, day.compute_bits())
+        self.assertEqual(day.bits, DoctorDay.mask(time(10), time(10, 30)))
+
+    def test_lock_many_creates_fresh_days_per_doctor(self):
+        other_doctor = Doctor.objects.create(
+            first_name="Maria", last_name="Kovalenko", specialization="Surgeon"
+        )
+        booked = self.book(day=self.day + timedelta(days=1))
+        DoctorDay.objects.all().delete()
+        existing = DoctorDay.objects.create(doctor=self.doctor, date=self.day)
+        keys = [(doctor.pk, self.day + timedelta(days=offset))
+                for doctor in (self.doctor, other_doctor) for offset in range(10)]
+
+        # Per doctor: lock existing rows, read appointments of the missing
+        # days, insert them, lock them.
+        with transaction.atomic(), self.assertNumQueries(8):
+            days = DoctorDay.lock_many(keys)
+
+        self.assertEqual(len(days), 20)
+        self.assertEqual(days[(self.doctor.pk, self.day)].pk, existing.pk)
+        self.assertTrue(all(day.pk for day in days.values()))
+        fresh = days[(self.doctor.pk, booked.date)]
+        self.assertEqual(fresh.bits, DoctorDay.mask(booked.time_start, booked.time_end))
+        self.assertEqual(DoctorDay.objects.get(pk=fresh.pk).bits, fresh.bits)
+
+
+class ScheduleGridTests(APITestCase):
+    def test_status_newer_than_the_registry(self):
+        statuses.all()
+        # Not committed, so the registry is not told about it.
+        no_show = AppointmentStatus.objects.create(code="no_show", name="No show")
+        self.addCleanup(statuses.invalidate)
+        self.book(status=no_show)
+        cache.set(VERSION_CACHE_KEY, "version", timeout=None)
+
+        response = self.client.get(
+            "/api/schedule/grid/", {"from": self.day.isoformat(), "to": self.day.isoformat()}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        position = data["appointments"]["status"][0]
+        self.assertEqual(data["statuses"][position]["code"], "no_show")
+        # Only this process reloads; other processes keep their copies.
+        self.assertEqual(cache.get(VERSION_CACHE_KEY), "version")
+
+
+class RollupTests(APITestCase):
+    def grouped(self):
+        """``(date, doctor, status) -> (count, minutes)`` over hot and archived rows."""
+        totals = {}
+        for model in (Appointment, ArchivedAppointment):
+            rows = model.objects.values_list(
+                "date", "doctor_id", "status_id", "time_start", "time_end"
+            )
+            for day, doctor_id, status_id, start, end in rows:
+                count, minutes = totals.get((day, doctor_id, status_id), (0, 0))
+                minutes += (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
+                totals[(day, doctor_id, status_id)] = (count + 1, minutes)
+        return totals
+
+    def rollups(self):
+        return {
+            (row.date, row.doctor_id, row.status_id): (row.count, row.minutes)
+            for row in DailyStatusRollup.objects.exclude(count=0)
+        }
+
+    def test_rollups_match_a_fresh_group_by(self):
+        old_day = timezone.localdate() - timedelta(days=400)
+        moved = self.book()
+        cancelled = self.book(start=time(11), end=time(11, 45))
+        deleted = self.book(start=time(12), end=time(12, 20))
+        self.book(day=old_day, start=time(9), end=time(9, 50))
+        old = self.book(day=old_day, start=time(10), end=time(10, 30))
+        rows = [
+            {"patient": self.patient.pk, "doctor": self.doctor.pk, "date": str(day),
+             "time_start": "15:00", "time_end": "15:40"}
+            for day in (self.day, self.day + timedelta(days=3), old_day)
+        ]
+        self.client.post("/api/appointments/bulk/", rows, format="json")
+
+        cancelled.status = statuses.get("cancelled")
+        cancelled.save()
+        moved.date, moved.time_end = self.day + timedelta(days=2), time(10, 50)
+        moved.save()
+        deleted.delete()
+        old.status = statuses.get("completed")
+        old.save()
+        archive.archive_batch(
+            old_day + timedelta(days=1), [status.pk for status in statuses.all()], 10
+        )
+
+        self.assertEqual(ArchivedAppointment.objects.count(), 3)
+        self.assertEqual(self.rollups(), self.grouped())
+
+    def test_totals_with_a_status_newer_than_the_registry(self):
+        statuses.all()
+        # Not committed, so the registry is not told about it.
+        no_show = AppointmentStatus.objects.create(code="no_show", name="No show")
+        self.addCleanup(statuses.invalidate)
+        self.book(status=no_show)
+        self.book(start=time(11), end=time(11, 30))
+
+        response = self.client.get("/api/reports/daily/", {"date": self.day.isoformat()})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["totals"],
+            [
+                {"status__code": "planned", "count": 1, "minutes": 30},
+                {"status__code": "no_show", "count": 1, "minutes": 30},
+            ],
+        )
+
+    async def test_async_totals_with_a_status_newer_than_the_registry(self):
+        await statuses.aload()
+        no_show = await AppointmentStatus.objects.acreate(code="no_show", name="No show")
+        self.addCleanup(statuses.invalidate)
+        await sync_to_async(self.book)(status=no_show)
+        request = APIRequestFactory().get(
+            "/api/reports/daily/",
+            {"date": self.day.isoformat(), "items": "false"},
+            HTTP_AUTHORIZATION=self.authorization,
+        )
+
+        response = await AsyncDailyReportView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content)["totals"],
+            [{"status__code": "no_show", "count": 1, "minutes": 30}],
+        )
+
+    def test_deleting_archived_rows_updates_rollups(self):
+        old_day = timezone.localdate() - timedelta(days=400)
+        self.book(day=old_day)
+        self.book(day=old_day, start=time(11), end=time(11, 45))
+        archive.archive_batch(old_day + timedelta(days=1), [statuses.get("planned").pk], 10)
+        rollup = DailyStatusRollup.objects.get(date=old_day, doctor=self.doctor)
+        self.assertEqual((rollup.count, rollup.minutes), (2, 75))
+
+        # The patient's archived history goes with them.
+        self.patient.delete()
+
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.count, rollup.minutes), (0, 0))
+
+
+class ArchiveTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.old_day = timezone.localdate() - timedelta(days=400)
+        completed, cancelled = statuses.get("completed"), statuses.get("cancelled")
+        # Interleaved with rows that stay hot, on the same days.
+        self.book(day=self.old_day, start=time(9), end=time(9, 30), status=completed)
+        self.book(day=self.old_day, start=time(10), end=time(10, 45))
+        self.book(day=self.old_day, start=time(11), end=time(11, 20), status=cancelled)
+        self.book(day=self.old_day - timedelta(days=1), status=cancelled)
+        self.book(day=self.old_day + timedelta(days=1), start=time(8), end=time(8, 30))
+        self.book(day=self.old_day + timedelta(days=1), status=completed)
+        self.range = {
+            "from": (self.old_day - timedelta(days=1)).isoformat(),
+            "to": (self.old_day + timedelta(days=1)).isoformat(),
+        }
+
+    def archive(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("archive_appointments", stdout=io.StringIO())
+        self.assertEqual(ArchivedAppointment.objects.count(), 4)
+        self.assertEqual(Appointment.objects.count(), 2)
+
+    def reports(self):
+        doctor = {**self.range, "doctor_id": self.doctor.pk}
+        export = self.client.get("/api/reports/export/", {**self.range, "format": "csv"})
+        return {
+            "daily": self.client.get("/api/reports/daily/", self.range).json(),
+            "doctor-daily": self.client.get("/api/reports/doctor-daily/", doctor).json(),
+            "cancelled": self.client.get("/api/reports/cancelled/", self.range).json(),
+            "history": self.client.get(f"/api/patients/{self.patient.pk}/history/").json(),
+            "export": b"".join(export.streaming_content),
+        }
+
+    def rollups(self):
+        return list(
+            DailyStatusRollup.objects.order_by("date", "doctor", "status").values_list(
+                "date", "doctor", "status", "count", "minutes"
+            )
+        )
+
+    def test_reports_and_rollups_are_unchanged(self):
+        reports, rollups = self.reports(), self.rollups()
+        self.assertEqual(len(reports["daily"]["items"]), 6)
+        self.assertEqual(reports["cancelled"]["count"], 2)
+
+        self.archive()
+
+        self.assertEqual(self.reports(), reports)
+        self.assertEqual(self.rollups(), rollups)
+
+    def test_archived_rows_are_merged_in_row_ordering(self):
+        self.archive()
+
+        items = self.client.get("/api/reports/daily/", self.range).json()["items"]
+
+        expected = sorted(
+            [*Appointment.objects.all(), *ArchivedAppointment.objects.all()],
+            key=lambda row: row.pk,
+        )
+        expected.sort(key=lambda row: (row.date, row.time_start), reverse=True)
+        self.assertEqual([item["id"] for item in items], [row.pk for row in expected])
+        self.assertEqual(
+            [item["time_start"] for item in items if item["date"] == str(self.old_day)],
+            ["11:00:00", "10:00:00", "09:00:00"],
+        )
+
+    def test_archiving_is_not_an_appointment_change(self):
+        changes_before = AppointmentChange.objects.count()
+        rollups = self.rollups()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.archive()
+
+        self.assertEqual(AppointmentChange.objects.count(), changes_before)
+        self.assertEqual(self.rollups(), rollups)
+        self.assertFalse(
+            [query for query in queries if "appointments_dailystatusrollup" in query["sql"]]
+        )
+
+
+class SeriesBookingTests(APITestCase):
+    def series(self, **fields):
+        payload = {
+            "patient": self.patient.pk,
+            "doctor": self.doctor.pk,
+            "date_start": self.day.isoformat(),
+            "count": 3,
+            "time_start": "10:00",
+            "time_end": "10:30",
+            **fields,
+        }
+        return self.client.post("/api/appointments/series/", payload, format="json")
+
+    def test_all_or_nothing_is_parsed_as_a_boolean(self):
+        self.book(day=self.day + timedelta(weeks=1))
+
+        response = self.series(all_or_nothing="false")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["created"]), 2)
+        self.assertEqual(len(response.data["conflicts"]), 1)
+        response = self.series(date_start=str(self.day + timedelta(days=1)), all_or_nothing="yes!")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("all_or_nothing", response.data)
+
+    def test_bulk_all_or_nothing_is_parsed_as_a_boolean(self):
+        self.book()
+        rows = [
+            {"patient": self.patient.pk, "doctor": self.doctor.pk, "date": str(day),
+             "time_start": "10:00", "time_end": "10:30"}
+            for day in (self.day, self.day + timedelta(days=1))
+        ]
+
+        response = self.client.post(
+            "/api/appointments/bulk/",
+            {"appointments": rows, "all_or_nothing": "false"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["created"]), 1)
+
+    def test_free_occurrences_are_booked_and_conflicts_get_a_suggestion(self):
+        DoctorWorkingHours.objects.create(
+            doctor=self.doctor, weekday=self.day.weekday(), time_start=time(9), time_end=time(13)
+        )
+        busy_day = self.day + timedelta(weeks=1)
+        self.book(day=busy_day, start=time(10), end=time(10, 20))
+        self.book(day=busy_day, start=time(10, 20), end=time(11))
+
+        response = self.series()
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        created = Appointment.objects.filter(series_id=data["series"]["id"]).order_by("date")
+        self.assertEqual(
+            [row.date for row in created], [self.day, self.day + timedelta(weeks=2)]
+        )
+        # 09:30 is half an hour from 10:00, 11:00 a whole hour.
+        self.assertEqual(
+            data["conflicts"],
+            [
+                {
+                    "date": busy_day.isoformat(),
+                    "time_start": "10:00:00",
+                    "time_end": "10:30:00",
+                    "error": OVERLAP_ERROR,
+                    "suggestion": {
+                        "date": busy_day.isoformat(),
+                        "time_start": "09:30:00",
+                        "time_end": "10:00:00",
+                    },
+                }
+            ],
+        )
+        for day in DoctorDay.objects.filter(doctor=self.doctor):
+            self.assertEqual(day.bits, day.compute_bits())
+
+    def test_suggestions_look_at_nearby_days(self):
+        # Working hours only the day after, fully free there.
+        next_day = self.day + timedelta(weeks=1, days=1)
+        DoctorWorkingHours.objects.create(
+            doctor=self.doctor, weekday=next_day.weekday(), time_start=time(9), time_end=time(17)
+        )
+        self.book(day=self.day + timedelta(weeks=1))
+
+        response = self.series(count=2)
+
+        # The earliest slot there is the closest in time, 23 hours later.
+        suggestion = response.json()["conflicts"][0]["suggestion"]
+        self.assertEqual(
+            suggestion,
+            {"date": next_day.isoformat(), "time_start": "09:00:00", "time_end": "09:30:00"},
+        )
+
+    @override_settings(SCHEDULE_DEFAULT_WORKING_HOURS=[])
+    def test_no_suggestion_without_working_hours(self):
+        self.book(day=self.day + timedelta(weeks=1))
+
+        response = self.series()
+
+        self.assertIsNone(response.json()["conflicts"][0]["suggestion"])
+
+    def test_all_or_nothing_books_nothing_on_conflict(self):
+        self.book(day=self.day + timedelta(weeks=2))
+
+        response = self.series(all_or_nothing=True)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data["conflicts"]), 1)
+        self.assertEqual(Appointment.objects.count(), 1)
+        self.assertFalse(AppointmentSeries.objects.exists())
+
+    def test_start_in_the_past_is_rejected(self):
+        response = self.series(date_start=str(timezone.localdate() - timedelta(days=1)))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("date_start", response.data)
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_missing_planned_status_is_a_bad_request(self):
+        AppointmentStatus.objects.filter(code="planned").delete()
+        statuses.invalidate()
+        self.addCleanup(statuses.invalidate)
+
+        response = self.series()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Appointment.objects.exists())
+
+
+class QueryBudgetTests(TransactionTestCase):
+    """``bench_endpoints`` cases on a small data set, with writes committing."""
+
+    def test_endpoints_stay_within_their_query_budgets(self):
+        command = bench_endpoints.Command(stdout=io.StringIO())
+        command._seed({"doctors": 2, "patients": 50, "days": 35, "seed": 1})
+        self.addCleanup(statuses.invalidate)
+
+        results = command._run(repeat=2)
+
+        self.assertEqual(results.keys(), bench_endpoints.QUERY_BUDGETS.keys())
+        over = {
+            name: result["queries"]
+            for name, result in results.items()
+            if result["queries"] > result["budget"]
+        }
+        self.assertEqual(over, {})
+
+
+class ReplicaProbeView(ReplicaReadMixin, APIView):
+    """Reports where reads of the request would go, without querying."""
+
+    def get(self, request):
+        with transaction.atomic():
+            in_transaction = router.db_for_read(Appointment)
+        return Response(
+            {
+                "read": router.db_for_read(Appointment),
+                "transaction": in_transaction,
+                "locked": Appointment.objects.select_for_update().db,
+            }
+        )
+
+    def post(self, request):
+        return Response(status=201)
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica1"],
+    DATABASE_ROUTERS=["common.replicas.ReplicaRouter"],
+    REPLICA_LAG_SECONDS=5,
+)
+class ReplicaRouterTests(TransactionTestCase):
+    """Routing decisions; outside ``TestCase`` so no test transaction is open."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user("registrar")
+        self.authorization = f"Bearer {LoginSerializer.get_token(user).access_token}"
+        self.view = ReplicaProbeView.as_view()
+
+    def request(self, method="get"):
+        request = getattr(APIRequestFactory(), method)(
+            "/", HTTP_AUTHORIZATION=self.authorization
+        )
+        return self.view(request)
+
+    def test_safe_requests_read_from_the_replica(self):
+        self.assertEqual(self.request().data["read"], "replica1")
+        self.assertEqual(router.db_for_read(Appointment), "default")
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        self.assertEqual(self.request("post").status_code, 201)
+
+        self.assertEqual(self.request().data["read"], "default")
+        later = timezone.now().timestamp() + settings.REPLICA_LAG_SECONDS + 1
+        with mock.patch("time.time", return_value=later):
+            self.assertEqual(self.request().data["read"], "replica1")
+
+    def test_transactions_and_locks_use_the_primary(self):
+        data = self.request().data
+
+        self.assertEqual(data["read"], "replica1")
+        self.assertEqual(data["transaction"], "default")
+        self.assertEqual(data["locked"], "default")
+
+
+@skipUnless(
+    connection.settings_dict["OPTIONS"] == settings.SQLITE_TUNED_OPTIONS,
+    "the tuned SQLite profile is off",
+)
+class SQLiteProfileTests(TransactionTestCase):
+    def test_transactions_take_the_write_lock_up_front(self):
+        with CaptureQueriesContext(connection) as queries, transaction.atomic():
+            Appointment.objects.exists()
+
+        self.assertEqual(queries[0]["sql"], "BEGIN IMMEDIATE")
+
+    def test_connections_apply_the_pragmas(self):
+        expected = {
+            "journal_mode": "wal",
+            "synchronous": 1,
+            "mmap_size": 268435456,
+            "cache_size": -65536,
+            "temp_store": 2,
+            "busy_timeout": settings.SQLITE_TUNED_OPTIONS["timeout"] * 1000,
+        }
+        # The test database lives in memory, where WAL does not apply.
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = type(connections["default"])(
+                {**connection.settings_dict, "NAME": f"{directory}/profile.sqlite3"}
+            )
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {}
+                    for name in expected:
+                        cursor.execute(f"PRAGMA {name}")
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+
+        self.assertEqual(pragmas, expected)
+
+
+class StatusRegistryTests(TestCase):
+    fixtures = ["appointment_statuses"]
+
+    def test_lookups_survive_invalidation(self):
+        planned = statuses.get("planned")
+        maps = statuses._ensure_loaded()
+        statuses.invalidate()
+        # A reader that already holds the maps keeps working with them.
+        self.assertEqual(maps[0][planned.pk], planned)
+        self.assertEqual(statuses.by_id(planned.pk), planned)
+
+    def test_new_status_is_found_after_commit(self):
+        statuses.all()
+        with self.captureOnCommitCallbacks(execute=True):
+            status = AppointmentStatus.objects.create(code="no_show", name="No show")
+        self.assertEqual(statuses.get_or_none("no_show"), status)
+
+    @override_settings(STATUS_REGISTRY_CHECK_INTERVAL=0)
+    async def test_lookups_in_event_loop_do_not_reload(self):
+        await statuses.aload()
+        planned = statuses.get("planned")
+        statuses.invalidate()
+        # A reload here would run the ORM in the event loop and raise.
+        self.assertEqual(statuses.by_id(planned.pk), planned)
@@ -1,7 +1,8 @@
 from rest_framework.routers import DefaultRouter
-from .views import AppointmentViewSet
+from .views import AppointmentSeriesViewSet, AppointmentViewSet
 
 router = DefaultRouter()
+router.register(r"series", AppointmentSeriesViewSet, basename="appointment-series")
 router.register(r"", AppointmentViewSet, basename="appointment")
 
 urlpatterns = router.urls
@@ -0,0 +1,136 @@
+"""Change versions for conditional GET on schedule and report endpoints.
+
+Versions come from the database, so every worker process agrees on them and
+they are always as fresh as the rows they describe. A scope (date range,
+optionally one doctor) is versioned by the number and the last sequence
+number of its ``AppointmentChange`` rows: every committed appointment write
+appends one, and the count grows even when a transaction with a lower
+sequence number commits last. The ``directory`` counter (``VersionCounter``)
+covers changes that alter rendered rows of any date (patient/doctor renames,
+status renames, archiving) and is bumped in the writing transaction. The
+first sequence number still in the log moves when old changes are pruned, so
+a pruned scope never returns to an earlier version.
+
+``conditional_get`` hashes the versions into a strong ETag and answers
+``304 Not Modified`` after one query. Versions are read from the same
+database as the body, replica or primary, so an ETag never outruns its body.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.db.models import F, Func, Subquery
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import AppointmentChange, VersionCounter
+
+DIRECTORY = "directory"
+
+
+def bump_directory():
+    """Change the version of every scope; call inside the writing transaction."""
+    updated = VersionCounter.objects.filter(key=DIRECTORY).update(value=F("value") + 1)
+    if not updated:
+        VersionCounter.objects.get_or_create(key=DIRECTORY, defaults={"value": 1})
+
+
+def _scalar(queryset, function):
+    return Subquery(queryset.order_by().values(value=Func(F("id"), function=function)))
+
+
+def _versions_query(date_from, date_to, doctor_id):
+    changes = AppointmentChange.objects.filter(date__gte=date_from, date__lte=date_to)
+    if doctor_id is not None:
+        changes = changes.filter(doctor_id=doctor_id)
+    return VersionCounter.objects.filter(key=DIRECTORY).values_list(
+        "value",
+        _scalar(changes, "COUNT"),
+        _scalar(changes, "MAX"),
+        _scalar(AppointmentChange.objects.all(), "MIN"),
+    )
+
+
+def _versions(row):
+    if row is None:
+        # The counter row is gone (created by migration 0009 and by
+        # bump_directory): never match, rather than risk a stale 304.
+        return [uuid.uuid4().hex]
+    directory, count, last_seq, first_seq = row
+    return [str(directory), str(count), str(last_seq or 0), str((first_seq or 1) - 1)]
+
+
+def current_versions(date_from, date_to, doctor_id=None):
+    return _versions(_versions_query(date_from, date_to, doctor_id).first())
+
+
+async def acurrent_versions(date_from, date_to, doctor_id=None):
+    return _versions(await _versions_query(date_from, date_to, doctor_id).afirst())
+
+
+def _etag(request, media_type, versions):
+    digest = hashlib.sha1()
+    for part in (request.get_full_path(), media_type or "", *versions):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def _not_modified(request, etag):
+    # GZipMiddleware turns the ETag of a compressed response into a weak one,
+    # which clients then send back.
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return etag in etags or f"W/{etag}" in etags
+
+
+def conditional_get(method):
+    """Decorate an ``APIView.get`` with ETag / ``If-None-Match`` handling.
+
+    The view's ``get_version_scope(request)`` returns
+    ``(date_from, date_to, doctor_id)`` and may raise ``ValidationError`` for
+    bad parameters.
+    """
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        date_from, date_to, doctor_id = self.get_version_scope(request)
+        versions = current_versions(date_from, date_to, doctor_id)
+        etag = _etag(request, request.accepted_media_type, versions)
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response = method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    return wrapper
+
+
+def aconditional_get(method):
+    """``conditional_get`` for the async views in ``async_views``.
+
+    ETags match those of the sync views for the same URL, so clients can
+    move between the two deployment modes without a full refetch.
+    """
+
+    @wraps(method)
+    async def wrapper(self, request, *args, **kwargs):
+        date_from, date_to, doctor_id = self.get_version_scope(request)
+        versions = await acurrent_versions(date_from, date_to, doctor_id)
+        etag = _etag(request, self.media_type, versions)
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _not_modified(request, etag):
+            return HttpResponseNotModified(headers=headers)
+        response = await method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    return wrapper
@@ -1,53 +1,196 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
-from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.db.models import Sum
 from django.utils.dateparse import parse_date
-from rest_framework import viewsets, permissions, filters, status
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, viewsets, permissions, filters, serializers, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import APIException, ValidationError
 
-from .models import Appointment, AppointmentStatus
-from .serializers import AppointmentSerializer, AppointmentStatusSerializer
+from apps.doctors.models import Doctor
+from common.pagination import (
+    KeysetPagination,
+    PaginationModeMixin,
+    StandardResultsSetPagination,
+)
+from common.renderers import ORJSONRenderer
+from common.replicas import ReplicaReadMixin
+from common.views import SerializationTimingMixin
+from . import archive
+from .availability import find_available_slots
+from .bulk import MAX_BULK_ROWS, bulk_book
+from .changes import (
+    EventStreamRenderer,
+    changes_since,
+    event_stream,
+    last_seq,
+    pruned_seq,
+    serialize_change,
+)
+from .export import (
+    CSVStreamRenderer,
+    NDJSONStreamRenderer,
+    export_rows,
+    stream_csv,
+    stream_ndjson,
+)
+from .filters import AppointmentFilter, AppointmentSearchFilter
+from .grid import schedule_grid
+from .models import Appointment, AppointmentSeries, ArchivedAppointment, DailyStatusRollup
+from .serializers import (
+    AppointmentSerializer,
+    AppointmentSeriesSerializer,
+    AppointmentStatusSerializer,
+)
 from .permissions import IsRegistrarOrAdmin
+from .read import appointment_rows
+from .series import book_series
+from .status_registry import statuses
+from .versions import conditional_get
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+def _all_or_nothing(data):
+    """The ``all_or_nothing`` flag of a booking request, parsed like a serializer field."""
+    try:
+        return serializers.BooleanField().run_validation(data.get("all_or_nothing", False))
+    except ValidationError as exc:
+        raise ValidationError({"all_or_nothing": exc.detail})
+
+
+class AppointmentKeysetPagination(KeysetPagination):
+    # Matches ix_app_date_time; ties on (date, time_start) are broken by id.
+    ordering = ("-date", "-time_start", "id")
+
+
+class AppointmentViewSet(
+    ReplicaReadMixin, SerializationTimingMixin, PaginationModeMixin, viewsets.ModelViewSet
+):
     queryset = (
-        Appointment.objects.select_related("patient", "doctor", "status")
+        Appointment.objects.select_related("patient", "doctor")
         .all()
         .order_by("-date", "-time_start")
     )
     serializer_class = AppointmentSerializer
     permission_classes = [IsRegistrarOrAdmin]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = [
-        "patient__last_name",
-        "patient__first_name",
-        "patient__middle_name",
-        "patient__phone",
-        "doctor__last_name",
-    ]
+    filter_backends = [DjangoFilterBackend, AppointmentSearchFilter, filters.OrderingFilter]
+    filterset_class = AppointmentFilter
+    # Served from the denormalized keys by AppointmentSearchFilter; listed
+    # for the browsable API and schema.
+    search_fields = ["patient_search", "patient_search_alt", "patient_phone"]
     ordering_fields = ["date", "time_start", "time_end", "created_at"]
-    filterset_fields = ["doctor", "patient", "date", "status"]
+    # ?pagination=cursor (or any ?cursor=) switches to keyset pages, which
+    # ignore ?ordering= and never run COUNT(*) unless ?count=approx is given.
+    pagination_classes = {
+        "page": StandardResultsSetPagination,
+        "cursor": AppointmentKeysetPagination,
+    }
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
             return [permissions.IsAuthenticated()]
         return [IsRegistrarOrAdmin()]
 
-    @transaction.atomic
+    def _save(self, perform, serializer):
+        # The overlap check runs against the locked DoctorDay in save().
+        try:
+            with transaction.atomic():
+                perform(serializer)
+        except DjangoValidationError as exc:
+            raise ValidationError({"non_field_errors": exc.messages})
+
     def perform_create(self, serializer):
-        serializer.save()
+        self._save(super().perform_create, serializer)
 
-    @transaction.atomic
     def perform_update(self, serializer):
-        serializer.save()
+        self._save(super().perform_update, serializer)
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request):
+        """Book many appointments at once.
+
+        Accepts a list of rows or ``{"appointments": [...], "all_or_nothing": bool}``.
+        Valid rows are inserted in one transaction; invalid or conflicting rows
+        are reported by their index in the request.
+        """
+        data = request.data
+        all_or_nothing = False
+        if isinstance(data, dict):
+            all_or_nothing = _all_or_nothing(data)
+            data = data.get("appointments")
+        if not isinstance(data, list) or not data:
+            raise ValidationError({"appointments": "a non-empty list is required"})
+        if len(data) > MAX_BULK_ROWS:
+            raise ValidationError(
+                {"appointments": f"at most {MAX_BULK_ROWS} rows per request"}
+            )
+
+        created, errors = bulk_book(data, all_or_nothing=all_or_nothing)
+        return Response(
+            {
+                "created": [{"index": index, "id": obj.pk} for index, obj in created],
+                "errors": errors,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class AppointmentSeriesViewSet(
+    ReplicaReadMixin,
+    SerializationTimingMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = AppointmentSeries.objects.all()
+    serializer_class = AppointmentSeriesSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ["patient", "doctor"]
+
+    def get_permissions(self):
+        if self.action in ["list", "retrieve"]:
+            return [permissions.IsAuthenticated()]
+        return [IsRegistrarOrAdmin()]
+
+    def create(self, request, *args, **kwargs):
+        """Book every occurrence of the rule that does not conflict.
+
+        Conflicting occurrences are reported with the nearest free slot of
+        the same length, if any; with ``all_or_nothing`` nothing is booked
+        when one conflicts.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        all_or_nothing = _all_or_nothing(request.data)
+        series, created, conflicts = book_series(
+            serializer.validated_data, all_or_nothing=all_or_nothing
+        )
+        return Response(
+            {
+                "series": self.get_serializer(series).data if series else None,
+                "created": [{"date": obj.date, "id": obj.pk} for obj in created],
+                "conflicts": conflicts,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        series = self.get_object()
+        data = self.get_serializer(series).data
+        data["appointments"] = appointment_rows(
+            Appointment.objects.filter(series=series),
+            ArchivedAppointment.objects.filter(series=series),
+        )
+        return Response(data)
 
 
-class ScheduleView(APIView):
+class ScheduleMixin:
     permission_classes = [permissions.IsAuthenticated]
 
-    def get(self, request):
+    def get_version_scope(self, request):
         date_param = request.query_params.get("date")
         doctor_id = request.query_params.get("doctor_id")
         if not date_param:
@@ -55,73 +198,416 @@ class ScheduleView(APIView):
         date = parse_date(date_param)
         if not date:
             raise ValidationError({"date": "invalid date"})
+        if doctor_id and not doctor_id.isdigit():
+            raise ValidationError({"doctor_id": "invalid doctor_id"})
+        return date, date, int(doctor_id) if doctor_id else None
 
-        qs = Appointment.objects.select_related("patient", "doctor", "status").filter(
-            date=date
-        )
+    def get_queryset(self, request):
+        date, _, doctor_id = self.get_version_scope(request)
+        qs = Appointment.objects.filter(date=date)
         if doctor_id:
             qs = qs.filter(doctor_id=doctor_id)
+        return qs
 
-        serializer = AppointmentSerializer(qs, many=True)
-        return Response(serializer.data)
 
+class ScheduleView(ReplicaReadMixin, ScheduleMixin, APIView):
+    @conditional_get
+    def get(self, request):
+        return Response(appointment_rows(self.get_queryset(request)))
+
+
+class ScheduleGridView(ReplicaReadMixin, APIView):
+    """Appointments of ``?from=&to=`` in columnar form, see ``grid.schedule_grid``.
+
+    ``?doctor_ids=1,2`` limits the grid to these doctors; by default it has a
+    column for every doctor.
+    """
 
-class DailyReportMixin:
     permission_classes = [permissions.IsAuthenticated]
+    max_days = 31
 
-    def _parse_date(self, request):
+    def _parse_date(self, request, name):
+        value = request.query_params.get(name)
+        if not value:
+            raise ValidationError({name: f"{name} is required"})
+        date = parse_date(value)
+        if not date:
+            raise ValidationError({name: "invalid date"})
+        return date
+
+    def _doctor_ids(self, request):
+        value = request.query_params.get("doctor_ids")
+        if not value:
+            return None
+        ids = value.split(",")
+        if not all(pk.isdigit() for pk in ids):
+            raise ValidationError({"doctor_ids": "must be a comma-separated list of ids"})
+        return sorted({int(pk) for pk in ids})
+
+    def get_version_scope(self, request):
+        date_from = self._parse_date(request, "from")
+        date_to = self._parse_date(request, "to")
+        if date_to < date_from:
+            raise ValidationError({"to": "to must not be before from"})
+        if (date_to - date_from).days >= self.max_days:
+            raise ValidationError({"to": f"range is limited to {self.max_days} days"})
+        doctor_ids = self._doctor_ids(request)
+        doctor_id = doctor_ids[0] if doctor_ids and len(doctor_ids) == 1 else None
+        return date_from, date_to, doctor_id
+
+    @conditional_get
+    def get(self, request):
+        date_from, date_to, _ = self.get_version_scope(request)
+        return Response(schedule_grid(date_from, date_to, self._doctor_ids(request)))
+
+
+class ChangesPruned(APIException):
+    status_code = 410
+    default_detail = "Changes after this sequence number were pruned; reload the schedule."
+    default_code = "changes_pruned"
+
+
+class ChangeFeedMixin:
+    """Parses ``?since=&date=&doctor_id=`` for the change feed views."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _parse_seq(self, value, name):
+        if not value.isdigit():
+            raise ValidationError({name: "invalid sequence number"})
+        return int(value)
+
+    def _check_since(self, since):
+        if since < pruned_seq():
+            raise ChangesPruned()
+
+    def _parse_scope(self, request):
+        date = None
         date_param = request.query_params.get("date")
+        if date_param:
+            date = parse_date(date_param)
+            if not date:
+                raise ValidationError({"date": "invalid date"})
+        doctor_id = request.query_params.get("doctor_id")
+        if doctor_id:
+            if not doctor_id.isdigit():
+                raise ValidationError({"doctor_id": "invalid doctor_id"})
+            doctor_id = int(doctor_id)
+        return date, doctor_id or None
+
+
+class ScheduleChangesView(ChangeFeedMixin, APIView):
+    """Changes after ``?since=``; without it, only the current ``last_seq``.
+
+    A client asks for ``last_seq`` first, then loads the schedule, and from
+    then on asks for changes since that ``last_seq``, following ``has_more``
+    until it is false. Changes committed between the two requests come again
+    in the feed; applying them twice is harmless.
+    """
+
+    max_limit = 1000
+
+    def get(self, request):
+        since = request.query_params.get("since")
+        if not since:
+            return Response({"changes": [], "last_seq": last_seq(), "has_more": False})
+        since = self._parse_seq(since, "since")
+        self._check_since(since)
+        date, doctor_id = self._parse_scope(request)
+        limit = request.query_params.get("limit", "500")
+        if not limit.isdigit() or not 1 <= int(limit) <= self.max_limit:
+            raise ValidationError({"limit": f"must be between 1 and {self.max_limit}"})
+        limit = int(limit)
+
+        rows = changes_since(since, date=date, doctor_id=doctor_id, limit=limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return Response(
+            {
+                "changes": [serialize_change(row) for row in rows],
+                "last_seq": rows[-1]["seq"] if rows else since,
+                "has_more": has_more,
+            }
+        )
+
+
+class ChangeStreamMixin(ChangeFeedMixin):
+    def _stream_params(self, request):
+        """Return ``(since, date, doctor_id)``; ``since`` is None for "from now on"."""
+        since = request.headers.get("Last-Event-ID") or request.query_params.get("since")
+        since = self._parse_seq(since, "since") if since else None
+        date, doctor_id = self._parse_scope(request)
+        return since, date, doctor_id
+
+    def _stream_response(self, events):
+        response = StreamingHttpResponse(
+            events, content_type="text/event-stream; charset=utf-8"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class ScheduleChangeStreamView(ChangeStreamMixin, APIView):
+    """Server-sent events of schedule changes after ``Last-Event-ID`` or ``?since=``."""
+
+    renderer_classes = [EventStreamRenderer]
+
+    def get(self, request):
+        since, date, doctor_id = self._stream_params(request)
+        if since is None:
+            since = last_seq()
+        else:
+            self._check_since(since)
+        return self._stream_response(event_stream(since, date=date, doctor_id=doctor_id))
+
+
+class AvailabilityView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    max_days = 31
+
+    def _parse_date(self, request, name, default=None):
+        value = request.query_params.get(name)
+        if not value:
+            if default is not None:
+                return default
+            raise ValidationError({name: f"{name} is required"})
+        date = parse_date(value)
+        if not date:
+            raise ValidationError({name: "invalid date"})
+        return date
+
+    def _parse_minutes(self, request, name, default):
+        value = request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            minutes = int(value)
+        except ValueError:
+            raise ValidationError({name: "must be an integer number of minutes"})
+        if not 5 <= minutes <= 24 * 60:
+            raise ValidationError({name: "must be between 5 and 1440 minutes"})
+        return minutes
+
+    def get(self, request):
+        date_from = self._parse_date(request, "from")
+        date_to = self._parse_date(request, "to", default=date_from)
+        if date_to < date_from:
+            raise ValidationError({"to": "to must not be before from"})
+        if (date_to - date_from).days >= self.max_days:
+            raise ValidationError({"to": f"range is limited to {self.max_days} days"})
+        duration = self._parse_minutes(request, "duration", 30)
+        step = self._parse_minutes(request, "step", duration)
+
+        doctors = Doctor.objects.order_by("id")
+        doctor_id = request.query_params.get("doctor_id")
+        if doctor_id:
+            if not doctor_id.isdigit():
+                raise ValidationError({"doctor_id": "invalid doctor_id"})
+            doctors = doctors.filter(pk=doctor_id)
+        doctor_ids = list(doctors.values_list("id", flat=True))
+        if doctor_id and not doctor_ids:
+            raise ValidationError({"doctor_id": "unknown doctor"})
+
+        return Response(
+            find_available_slots(doctor_ids, date_from, date_to, duration, step)
+        )
+
+
+class DailyReportMixin:
+    """Shared parsing and totals for report views.
+
+    Reports cover ``?date=`` or an inclusive ``?from=&to=`` range. Totals come
+    from ``DailyStatusRollup`` so their cost does not grow with the number of
+    appointments; ``?items=false`` skips the per-appointment rows. Items of
+    ranges that reach back before the archive horizon include archived
+    appointments.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    max_range_days = 366
+
+    def _parse_date(self, request, name="date"):
+        date_param = request.query_params.get(name)
         if not date_param:
-            raise ValidationError({"date": "date is required"})
+            raise ValidationError({name: f"{name} is required"})
         date = parse_date(date_param)
         if not date:
-            raise ValidationError({"date": "invalid date"})
+            raise ValidationError({name: "invalid date"})
         return date
 
-    def _status_totals(self, qs):
-        # Use a separate queryset without ordering to avoid SQL GROUP BY issues
-        return qs.order_by().values("status__code").annotate(count=Count("id"))
+    def _parse_range(self, request):
+        params = request.query_params
+        if params.get("date") or not (params.get("from") or params.get("to")):
+            date = self._parse_date(request)
+            return date, date
+        date_from = self._parse_date(request, "from")
+        date_to = self._parse_date(request, "to")
+        if date_to < date_from:
+            raise ValidationError({"to": "to must not be before from"})
+        if (date_to - date_from).days >= self.max_range_days:
+            raise ValidationError({"to": f"range is limited to {self.max_range_days} days"})
+        return date_from, date_to
 
+    def get_version_scope(self, request):
+        date_from, date_to = self._parse_range(request)
+        return date_from, date_to, None
 
-class DailyReportView(DailyReportMixin, APIView):
-    def get(self, request):
-        date = self._parse_date(request)
-        qs = Appointment.objects.select_related("patient", "doctor", "status").filter(
-            date=date
+    def _include_items(self, request):
+        return request.query_params.get("items", "true").lower() not in ("0", "false", "no")
+
+    def _rollups(self, date_from, date_to, **filters):
+        return DailyStatusRollup.objects.filter(
+            date__gte=date_from, date__lte=date_to, **filters
+        )
+
+    def _items(self, date_from, date_to, **filters):
+        return Appointment.objects.filter(date__gte=date_from, date__lte=date_to, **filters)
+
+    def _archived_items(self, date_from, date_to, **filters):
+        """``ArchivedAppointment`` rows of the range, or None when it is all hot."""
+        if not archive.reaches_archive(date_from):
+            return None
+        return ArchivedAppointment.objects.filter(
+            date__gte=date_from, date__lte=date_to, **filters
+        )
+
+    def _item_rows(self, date_from, date_to, **filters):
+        return appointment_rows(
+            self._items(date_from, date_to, **filters),
+            archived=self._archived_items(date_from, date_to, **filters),
         )
-        serializer = AppointmentSerializer(qs, many=True)
-        totals = self._status_totals(qs)
-        return Response({"items": serializer.data, "totals": list(totals)})
 
+    def _totals_rows(self, date_from, date_to, **filters):
+        return (
+            self._rollups(date_from, date_to, **filters)
+            .values("status_id")
+            .annotate(count=Sum("count"), minutes=Sum("minutes"))
+            .order_by("status_id")
+        )
+
+    def _load_statuses(self, rows):
+        """Reload the registry once if ``rows`` have a status created since it loaded."""
+        if any(statuses.by_id(row["status_id"]) is None for row in rows):
+            statuses.load()
+
+    def _format_totals(self, rows):
+        totals = []
+        for row in rows:
+            if not row["count"]:
+                continue
+            status = statuses.by_id(row["status_id"])
+            totals.append(
+                {
+                    "status__code": status.code if status else None,
+                    "count": row["count"],
+                    "minutes": row["minutes"],
+                }
+            )
+        return totals
 
-class DoctorDailyReportView(DailyReportMixin, APIView):
+    def _status_totals(self, date_from, date_to, **filters):
+        rows = list(self._totals_rows(date_from, date_to, **filters))
+        self._load_statuses(rows)
+        return self._format_totals(rows)
+
+    def _cancelled_status(self):
+        cancelled_status = statuses.get_or_none("cancelled")
+        if not cancelled_status:
+            raise APIException("Cancelled status not configured")
+        return cancelled_status
+
+    def _report(self, request, date_from, date_to, **filters):
+        data = {}
+        if self._include_items(request):
+            data["items"] = self._item_rows(date_from, date_to, **filters)
+        data["totals"] = self._status_totals(date_from, date_to, **filters)
+        return Response(data)
+
+
+class DailyReportView(ReplicaReadMixin, DailyReportMixin, APIView):
+    @conditional_get
     def get(self, request):
-        date = self._parse_date(request)
+        date_from, date_to = self._parse_range(request)
+        return self._report(request, date_from, date_to)
+
+
+class DoctorReportMixin(DailyReportMixin):
+    def get_version_scope(self, request):
+        date_from, date_to = self._parse_range(request)
         doctor_id = request.query_params.get("doctor_id")
         if not doctor_id:
             raise ValidationError({"doctor_id": "doctor_id is required"})
-        qs = Appointment.objects.select_related("patient", "doctor", "status").filter(
-            date=date, doctor_id=doctor_id
+        if not doctor_id.isdigit():
+            raise ValidationError({"doctor_id": "invalid doctor_id"})
+        return date_from, date_to, int(doctor_id)
+
+
+class DoctorDailyReportView(ReplicaReadMixin, DoctorReportMixin, APIView):
+    @conditional_get
+    def get(self, request):
+        date_from, date_to, doctor_id = self.get_version_scope(request)
+        return self._report(request, date_from, date_to, doctor_id=doctor_id)
+
+
+class CancelledReportView(ReplicaReadMixin, DailyReportMixin, APIView):
+    @conditional_get
+    def get(self, request):
+        date_from, date_to = self._parse_range(request)
+        cancelled_status = self._cancelled_status()
+        data = {}
+        if self._include_items(request):
+            data["items"] = self._item_rows(date_from, date_to, status=cancelled_status)
+        data["count"] = (
+            self._rollups(date_from, date_to, status=cancelled_status).aggregate(
+                total=Sum("count")
+            )["total"]
+            or 0
         )
-        serializer = AppointmentSerializer(qs, many=True)
-        totals = self._status_totals(qs)
-        return Response({"items": serializer.data, "totals": list(totals)})
+        return Response(data)
+
+
+class ReportExportView(DailyReportMixin, APIView):
+    """Streams appointments of ``?from=&to=`` as CSV or NDJSON (``?format=``)."""
 
+    renderer_classes = [CSVStreamRenderer, NDJSONStreamRenderer]
+    max_range_days = 3660
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code >= 400:
+            # Error bodies are JSON whichever stream format was asked for.
+            response.accepted_renderer = ORJSONRenderer()
+            response.accepted_media_type = ORJSONRenderer.media_type
+        return response
 
-class CancelledReportView(DailyReportMixin, APIView):
     def get(self, request):
-        date = self._parse_date(request)
-        cancelled_status = (
-            AppointmentStatus.objects.filter(code="cancelled").first()
+        date_from, date_to = self._parse_range(request)
+        filters = {}
+        doctor_id = request.query_params.get("doctor_id")
+        if doctor_id:
+            if not doctor_id.isdigit():
+                raise ValidationError({"doctor_id": "invalid doctor_id"})
+            filters["doctor_id"] = int(doctor_id)
+        status_code = request.query_params.get("status")
+        if status_code:
+            export_status = statuses.get_or_none(status_code)
+            if export_status is None:
+                raise ValidationError({"status": "unknown status"})
+            filters["status_id"] = export_status.pk
+
+        rows = export_rows(
+            self._items(date_from, date_to, **filters),
+            archived=self._archived_items(date_from, date_to, **filters),
         )
-        if not cancelled_status:
-            return Response(
-                {"detail": "Cancelled status not configured"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-        qs = Appointment.objects.select_related("patient", "doctor", "status").filter(
-            date=date, status=cancelled_status
+        renderer = request.accepted_renderer
+        if renderer.format == "ndjson":
+            content = stream_ndjson(rows)
+        else:
+            content = stream_csv(rows)
+        response = StreamingHttpResponse(
+            content, content_type=f"{renderer.media_type}; charset=utf-8"
         )
-        serializer = AppointmentSerializer(qs, many=True)
-        return Response({"items": serializer.data, "count": qs.count()})
-
+        filename = f"appointments_{date_from}_{date_to}.{renderer.format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
@@ -1,5 +1,8 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 
+from common.text import name_key
+
 
 class Doctor(models.Model):
     first_name = models.CharField(max_length=100)
@@ -20,3 +23,58 @@ class Doctor(models.Model):
     def __str__(self):
         return f"Dr. {self.last_name}"
 
+    @property
+    def search_words(self):
+        """Folded name words, matched by appointment search."""
+        return name_key(self.last_name, self.first_name, self.middle_name).split()
+
+
+OVERLAP_ERROR = "Working hours overlap another window of this doctor on this weekday"
+
+
+class DoctorWorkingHours(models.Model):
+    MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = range(7)
+    WEEKDAY_CHOICES = [
+        (MONDAY, "Monday"),
+        (TUESDAY, "Tuesday"),
+        (WEDNESDAY, "Wednesday"),
+        (THURSDAY, "Thursday"),
+        (FRIDAY, "Friday"),
+        (SATURDAY, "Saturday"),
+        (SUNDAY, "Sunday"),
+    ]
+
+    doctor = models.ForeignKey(
+        Doctor, on_delete=models.CASCADE, related_name="working_hours"
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    time_start = models.TimeField()
+    time_end = models.TimeField()
+
+    class Meta:
+        verbose_name_plural = "Doctor working hours"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doctor", "weekday", "time_start"],
+                name="uq_doctor_hours_start",
+            ),
+        ]
+        ordering = ["doctor", "weekday", "time_start"]
+
+    def clean(self):
+        if self.time_end <= self.time_start:
+            raise ValidationError("time_end must be after time_start")
+        if self.doctor_id is not None and self.overlapping().exists():
+            raise ValidationError(OVERLAP_ERROR)
+
+    def overlapping(self):
+        """Other windows of the same doctor and weekday that overlap this one."""
+        return DoctorWorkingHours.objects.filter(
+            doctor_id=self.doctor_id,
+            weekday=self.weekday,
+            time_start__lt=self.time_end,
+            time_end__gt=self.time_start,
+        ).exclude(pk=self.pk)
+
+    def __str__(self):
+        return f"{self.doctor} {self.get_weekday_display()} {self.time_start}-{self.time_end}"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Doctor
+from .models import OVERLAP_ERROR, Doctor, DoctorWorkingHours
 
 
 class DoctorSerializer(serializers.ModelSerializer):
@@ -8,3 +8,25 @@ class DoctorSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ["id", "created_at", "updated_at"]
 
+
+class DoctorWorkingHoursSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DoctorWorkingHours
+        fields = ["id", "doctor", "weekday", "time_start", "time_end"]
+        read_only_fields = ["id"]
+
+    def validate(self, attrs):
+        time_start = attrs.get("time_start", getattr(self.instance, "time_start", None))
+        time_end = attrs.get("time_end", getattr(self.instance, "time_end", None))
+        if time_start and time_end and time_end <= time_start:
+            raise serializers.ValidationError("time_end must be after time_start")
+        window = DoctorWorkingHours(
+            pk=getattr(self.instance, "pk", None),
+            doctor=attrs.get("doctor", getattr(self.instance, "doctor", None)),
+            weekday=attrs.get("weekday", getattr(self.instance, "weekday", None)),
+            time_start=time_start,
+            time_end=time_end,
+        )
+        if window.overlapping().exists():
+            raise serializers.ValidationError(OVERLAP_ERROR)
+        return super().validate(attrs)
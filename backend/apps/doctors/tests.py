@@ -0,0 +1,63 @@
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.users.views import LoginSerializer
+from .models import Doctor, DoctorWorkingHours
+
+
+class WorkingHoursTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user("admin")
+        admin.groups.add(Group.objects.get_or_create(name="admin")[0])
+        cls.token = LoginSerializer.get_token(admin).access_token
+        cls.doctor = Doctor.objects.create(
+            first_name="Ivan", last_name="Petrenko", specialization="Therapist"
+        )
+        cls.morning = DoctorWorkingHours.objects.create(
+            doctor=cls.doctor,
+            weekday=DoctorWorkingHours.MONDAY,
+            time_start="09:00",
+            time_end="13:00",
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def add(self, time_start, time_end, weekday=DoctorWorkingHours.MONDAY):
+        return self.client.post(
+            "/api/doctors/working-hours/",
+            {
+                "doctor": self.doctor.pk,
+                "weekday": weekday,
+                "time_start": time_start,
+                "time_end": time_end,
+            },
+            format="json",
+        )
+
+    def test_overlapping_windows_are_rejected(self):
+        self.assertEqual(self.add("12:00", "15:00").status_code, 400)
+        self.assertEqual(self.add("08:00", "18:00").status_code, 400)
+        self.assertEqual(self.add("13:00", "17:00").status_code, 201)
+        tuesday = self.add("10:00", "12:00", weekday=DoctorWorkingHours.TUESDAY)
+        self.assertEqual(tuesday.status_code, 201)
+
+        url = f"/api/doctors/working-hours/{self.morning.pk}/"
+        response = self.client.patch(url, {"time_end": "14:00"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(url, {"time_start": "08:00"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_clean_rejects_overlap(self):
+        window = DoctorWorkingHours(
+            doctor=self.doctor,
+            weekday=DoctorWorkingHours.MONDAY,
+            time_start="12:30",
+            time_end="14:00",
+        )
+        with self.assertRaises(ValidationError):
+            window.full_clean()
@@ -1,8 +1,9 @@
 from rest_framework.routers import DefaultRouter
-from .views import DoctorViewSet
+from .views import DoctorViewSet, DoctorWorkingHoursViewSet
 
 router = DefaultRouter()
+# Registered before the catch-all doctor routes so "working-hours" is not read as a pk.
+router.register(r"working-hours", DoctorWorkingHoursViewSet, basename="doctor-working-hours")
 router.register(r"", DoctorViewSet, basename="doctor")
 
 urlpatterns = router.urls
-
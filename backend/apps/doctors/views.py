@@ -1,10 +1,12 @@
 from rest_framework import viewsets, permissions
-from .models import Doctor
-from .serializers import DoctorSerializer
+from .models import Doctor, DoctorWorkingHours
+from .serializers import DoctorSerializer, DoctorWorkingHoursSerializer
 from apps.users.permissions import IsAdmin
+from common.replicas import ReplicaReadMixin
+from common.views import SerializationTimingMixin
 
 
-class DoctorViewSet(viewsets.ModelViewSet):
+class DoctorViewSet(ReplicaReadMixin, SerializationTimingMixin, viewsets.ModelViewSet):
     queryset = Doctor.objects.all().order_by("last_name")
     serializer_class = DoctorSerializer
 
@@ -13,3 +15,14 @@ class DoctorViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated()]
         return [IsAdmin()]
 
+
+class DoctorWorkingHoursViewSet(SerializationTimingMixin, viewsets.ModelViewSet):
+    queryset = DoctorWorkingHours.objects.all()
+    serializer_class = DoctorWorkingHoursSerializer
+    filterset_fields = ["doctor", "weekday"]
+    pagination_class = None
+
+    def get_permissions(self):
+        if self.action in ["list", "retrieve"]:
+            return [permissions.IsAuthenticated()]
+        return [IsAdmin()]
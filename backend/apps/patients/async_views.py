@@ -0,0 +1,11 @@
+from common.async_views import AsyncAPIView
+from .lookup import alookup_patients
+from .views import PatientLookupMixin
+
+
+class AsyncPatientLookupView(PatientLookupMixin, AsyncAPIView):
+    """Async ``/api/patients/lookup/``; routed when ``ASYNC_READ_VIEWS`` is on."""
+
+    async def get(self, request):
+        query, limit = self._lookup_params(request)
+        return self.render(await alookup_patients(query, limit) if query else [])
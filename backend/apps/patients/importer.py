@@ -0,0 +1,303 @@
+"""Streaming bulk import of patients from CSV or XLSX files.
+
+Files are read row by row (``csv`` over the byte stream, openpyxl in
+read-only mode), validated by ``clean_row`` and written in batches of
+``batch_size`` rows, one transaction each, so memory is bounded by the batch
+and not by the file. Rows are upserted on the normalized phone
+(``common.text.normalize_phone``), matched against ``Patient.phone_digits``
+so that patients typed in as ``050...`` through the API are found too: a
+known phone updates that patient with the columns present in the file, a
+new one creates a patient, and when a phone repeats the later row wins.
+Each batch looks up its phones with one query, updates the known patients
+with one ``executemany`` and ``bulk_create``s the rest.
+
+Rejected rows are passed to ``on_reject`` with their row number and errors
+and never stop the import. Batches already written stay written if the
+import fails later; as it is an upsert, running it again is safe.
+"""
+import csv
+import io
+from datetime import date, datetime
+from itertools import chain
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from common.text import fold, normalize_phone
+from .models import Patient
+from .signals import patients_bulk_upserted
+
+try:
+    import openpyxl
+except ImportError:  # Optional: without it only CSV files can be imported.
+    openpyxl = None
+
+FORMATS = ("csv", "xlsx")
+BATCH_SIZE = 1000
+
+# Accepted headers per field, matched after folding (case, Cyrillic and
+# punctuation do not matter). Other columns are ignored.
+COLUMNS = {
+    "last_name": ("last_name", "прізвище"),
+    "first_name": ("first_name", "ім'я"),
+    "middle_name": ("middle_name", "по батькові"),
+    "phone": ("phone", "телефон"),
+    "email": ("email", "e-mail", "пошта"),
+    "birth_date": ("birth_date", "дата народження"),
+}
+REQUIRED_COLUMNS = ("last_name", "first_name", "phone")
+OPTIONAL_COLUMNS = ("middle_name", "email", "birth_date")
+_HEADERS = {fold(alias): field for field, aliases in COLUMNS.items() for alias in aliases}
+_NAME_LENGTH = Patient._meta.get_field("last_name").max_length
+_EMAIL_LENGTH = Patient._meta.get_field("email").max_length
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be imported (format, encoding, columns)."""
+
+
+def _fields(header):
+    """Map column positions to patient fields."""
+    fields = {}
+    for position, title in enumerate(header):
+        field = _HEADERS.get(fold(str(title or "")))
+        if field and field not in fields.values():
+            fields[position] = field
+    return fields
+
+
+def _records(fields, rows, first_number):
+    for number, row in enumerate(rows, start=first_number):
+        values = {field: row[position] for position, field in fields.items() if position < len(row)}
+        if any(value not in (None, "") for value in values.values()):
+            yield number, values
+
+
+def read_csv(file, encoding="utf-8-sig"):
+    """Return ``(fields, records)`` for a binary CSV file.
+
+    The delimiter (``,``, ``;`` or tab) is taken from the header line.
+    """
+    text = io.TextIOWrapper(file, encoding=encoding, newline="")
+    try:
+        header = text.readline()
+    except UnicodeDecodeError:
+        raise ImportFileError(f"The file is not valid {encoding} text")
+    delimiter = max(",;\t", key=header.count)
+    rows = csv.reader(chain([header], text), delimiter=delimiter)
+    fields = _fields(next(rows, []))
+
+    def records():
+        try:
+            yield from _records(fields, rows, 2)
+        except UnicodeDecodeError:
+            raise ImportFileError(f"The file is not valid {encoding} text")
+        except csv.Error as error:
+            raise ImportFileError(f"Line {rows.line_num}: {error}")
+
+    return fields, records()
+
+
+def read_xlsx(file):
+    """Return ``(fields, records)`` for the first sheet of an XLSX workbook."""
+    if openpyxl is None:
+        raise ImportFileError("XLSX import requires the openpyxl package")
+    try:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception:
+        raise ImportFileError("The file is not a valid XLSX workbook")
+    rows = workbook.worksheets[0].iter_rows(values_only=True)
+    fields = _fields(next(rows, ()))
+
+    def records():
+        try:
+            yield from _records(fields, rows, 2)
+        finally:
+            workbook.close()
+
+    return fields, records()
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheets store phones typed as numbers as floats.
+        value = int(value)
+    return str(value).strip()
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = _text(value)
+    try:
+        return parse_date(value) or datetime.strptime(value, "%d.%m.%Y").date()
+    except ValueError:
+        return None
+
+
+def clean_row(values):
+    """Return ``(data, errors)`` for one row of raw ``{field: value}``.
+
+    Plain checks rather than a serializer per row, which would dominate the
+    import time.
+    """
+    data, errors = {}, {}
+    for name in ("last_name", "first_name", "middle_name"):
+        value = _text(values.get(name))
+        if len(value) > _NAME_LENGTH:
+            errors[name] = [f"Ensure this field has no more than {_NAME_LENGTH} characters."]
+        data[name] = value or None
+    for name in ("last_name", "first_name"):
+        if not data[name] and name not in errors:
+            errors[name] = ["This field is required."]
+
+    raw_phone = _text(values.get("phone"))
+    data["phone"] = normalize_phone(raw_phone)
+    if not raw_phone:
+        errors["phone"] = ["This field is required."]
+    elif not data["phone"]:
+        errors["phone"] = ["Enter a valid phone number."]
+
+    email = _text(values.get("email"))
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors["email"] = ["Enter a valid email address."]
+        if len(email) > _EMAIL_LENGTH:
+            errors["email"] = [f"Ensure this field has no more than {_EMAIL_LENGTH} characters."]
+    data["email"] = email or None
+
+    birth_date = values.get("birth_date")
+    data["birth_date"] = None
+    if _text(birth_date):
+        data["birth_date"] = _date(birth_date)
+        if data["birth_date"] is None:
+            errors["birth_date"] = ["Enter a date as YYYY-MM-DD or DD.MM.YYYY."]
+    return data, errors
+
+
+def _update(patients, update_fields):
+    """``UPDATE ... WHERE id = %s`` for every patient in one ``executemany``.
+
+    ``bulk_update`` puts a ``CASE`` over the whole batch into every column,
+    which makes each row slower to update the larger the batch.
+    """
+    quote = connection.ops.quote_name
+    fields = [Patient._meta.get_field(name) for name in update_fields]
+    assignments = ", ".join(f"{quote(field.column)} = %s" for field in fields)
+    sql = (
+        f"UPDATE {quote(Patient._meta.db_table)} SET {assignments} "
+        f"WHERE {quote(Patient._meta.pk.column)} = %s"
+    )
+    rows = [
+        [field.get_db_prep_save(getattr(patient, field.attname), connection) for field in fields]
+        + [patient.pk]
+        for patient in patients
+    ]
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+
+def _write(patients, update_fields):
+    """Upsert one batch; returns ``(created, updated)`` counts."""
+    existing = {
+        phone_digits: (pk, search_name)
+        # Lowest pk wins if old rows share a number in different formats.
+        for phone_digits, pk, search_name in Patient.objects.filter(
+            phone_digits__in=[patient.phone_digits for patient in patients]
+        ).order_by("-pk").values_list("phone_digits", "pk", "search_name")
+    }
+    now = timezone.now()
+    updated, created = [], []
+    for patient in patients:
+        if patient.phone_digits in existing:
+            patient.pk = existing[patient.phone_digits][0]
+            patient.updated_at = now
+            updated.append(patient)
+        else:
+            created.append(patient)
+    _update(updated, update_fields)
+    Patient.objects.bulk_create(created)
+
+    patients_bulk_upserted.send(
+        sender=Patient,
+        updated=[patient.pk for patient in updated],
+        renamed=[
+            patient.pk
+            for patient in updated
+            if patient.search_name != existing[patient.phone_digits][1]
+        ],
+    )
+    return len(created), len(updated)
+
+
+def _flush(batch, update_fields):
+    patients = []
+    for data in batch.values():
+        patient = Patient(**data)
+        patient.update_search_keys()
+        patients.append(patient)
+    try:
+        with transaction.atomic():
+            return _write(patients, update_fields)
+    except IntegrityError:
+        # A phone of the batch was created concurrently; it exists now.
+        with transaction.atomic():
+            return _write(patients, update_fields)
+
+
+def import_patients(file, file_format="csv", encoding="utf-8-sig", batch_size=BATCH_SIZE,
+                    on_reject=None):
+    """Import a binary CSV or XLSX file; returns the counts of the import.
+
+    ``on_reject(row_number, errors)`` is called for every rejected row.
+    """
+    if file_format not in FORMATS:
+        raise ImportFileError(f"Unsupported format {file_format!r}")
+    if file_format == "xlsx":
+        fields, records = read_xlsx(file)
+    else:
+        fields, records = read_csv(file, encoding)
+    missing = [name for name in REQUIRED_COLUMNS if name not in fields.values()]
+    if missing:
+        raise ImportFileError(f"Missing columns: {', '.join(missing)}")
+
+    update_fields = [
+        *(name for name in REQUIRED_COLUMNS if name != "phone"),
+        *(name for name in OPTIONAL_COLUMNS if name in fields.values()),
+        "search_name",
+        "search_name_alt",
+        "updated_at",
+    ]
+    counts = {"rows": 0, "created": 0, "updated": 0, "duplicates": 0, "rejected": 0}
+    batch = {}
+    for number, values in records:
+        counts["rows"] += 1
+        data, errors = clean_row(values)
+        if errors:
+            counts["rejected"] += 1
+            if on_reject is not None:
+                on_reject(number, errors)
+            continue
+        if batch.pop(data["phone"], None) is not None:
+            counts["duplicates"] += 1
+        batch[data["phone"]] = data
+        if len(batch) >= batch_size:
+            created, updated = _flush(batch, update_fields)
+            counts["created"] += created
+            counts["updated"] += updated
+            batch = {}
+    if batch:
+        created, updated = _flush(batch, update_fields)
+        counts["created"] += created
+        counts["updated"] += updated
+    return counts
@@ -0,0 +1,74 @@
+"""Prefix lookup of patients for search-as-you-type.
+
+Every candidate query is a range seek on one of the search-key indexes,
+ordered by that key and cut at ``limit``, so its cost depends on ``limit``
+and not on the number of patients.
+"""
+from common.text import digits, fold, is_phone_query, phone_prefixes, prefix_range
+from .models import SEARCH_KEY_LENGTH, Patient
+
+LOOKUP_FIELDS = ("id", "last_name", "first_name", "middle_name", "phone", "birth_date")
+MIN_PHONE_DIGITS = 3
+
+
+def _by_prefix(field, prefix, max_length, limit, exclude=()):
+    low, high = prefix_range(prefix, max_length)
+    qs = Patient.objects.filter(**{f"{field}__gte": low, f"{field}__lte": high})
+    if exclude:
+        qs = qs.exclude(pk__in=exclude)
+    return qs.order_by(field, "pk").values(*LOOKUP_FIELDS)[:limit]
+
+
+def _candidates(query):
+    """``(field, prefix, max_length)`` range scans to try, in order."""
+    if is_phone_query(query):
+        query_digits = digits(query)
+        if len(query_digits) < MIN_PHONE_DIGITS:
+            return []
+        return [("phone_digits", prefix, 32) for prefix in phone_prefixes(query_digits)]
+    key = fold(query)
+    if not key:
+        return []
+    return [
+        ("search_name", key, SEARCH_KEY_LENGTH),
+        ("search_name_alt", key, SEARCH_KEY_LENGTH),
+    ]
+
+
+def _represent(row):
+    return {
+        "id": row["id"],
+        "full_name": " ".join(
+            part for part in (row["last_name"], row["first_name"], row["middle_name"]) if part
+        ),
+        "phone": row["phone"],
+        "birth_date": row["birth_date"],
+    }
+
+
+def lookup_patients(query, limit=10):
+    """Return up to ``limit`` patients whose name or phone starts with ``query``.
+
+    Names match "last first middle" first, then "first last middle"; a query
+    made of phone characters only matches the digits of the phone.
+    """
+    rows, seen = [], set()
+    for field, prefix, max_length in _candidates(query):
+        if len(rows) >= limit:
+            break
+        for row in _by_prefix(field, prefix, max_length, limit - len(rows), exclude=tuple(seen)):
+            seen.add(row["id"])
+            rows.append(_represent(row))
+    return rows
+
+
+async def alookup_patients(query, limit=10):
+    """``lookup_patients`` on the async ORM."""
+    rows, seen = [], set()
+    for field, prefix, max_length in _candidates(query):
+        if len(rows) >= limit:
+            break
+        async for row in _by_prefix(field, prefix, max_length, limit - len(rows), exclude=tuple(seen)):
+            seen.add(row["id"])
+            rows.append(_represent(row))
+    return rows
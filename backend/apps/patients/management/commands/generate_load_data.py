@@ -0,0 +1,291 @@
+import random
+import time as clock
+from datetime import date, time, timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.appointments import versions
+from apps.appointments.models import Appointment
+from apps.appointments.status_registry import statuses
+from apps.doctors.models import Doctor
+from apps.patients.models import Patient
+from common.text import phone_key
+
+# Generated phones live in their own block so they never collide with real
+# ones; each run continues after the highest number already in the block.
+PATIENT_PHONE_PREFIX = "+38099"
+DOCTOR_PHONE_PREFIX = "+38098"
+PHONE_DIGITS = 7
+
+LAST_NAMES = [
+    "Шевченко", "Коваленко", "Бондаренко", "Ткаченко", "Кравченко", "Олійник",
+    "Шевчук", "Поліщук", "Бойко", "Мельник", "Лисенко", "Руденко", "Савченко",
+    "Петренко", "Мороз", "Павленко", "Марченко", "Левченко", "Харченко",
+    "Гончаренко", "Кузьменко", "Іваненко", "Сидоренко", "Клименко", "Романенко",
+    "Ковальчук", "Ткачук", "Гаврилюк", "Литвиненко", "Василенко", "Приходько",
+    "Тарасенко", "Яковенко", "Данилюк", "Остапенко", "Зінченко", "Карпенко",
+]
+FIRST_NAMES = [
+    ("Олександр", "Олександрович", "Олександрівна"),
+    ("Андрій", "Андрійович", "Андріївна"),
+    ("Іван", "Іванович", "Іванівна"),
+    ("Петро", "Петрович", "Петрівна"),
+    ("Микола", "Миколайович", "Миколаївна"),
+    ("Сергій", "Сергійович", "Сергіївна"),
+    ("Василь", "Васильович", "Василівна"),
+    ("Дмитро", "Дмитрович", "Дмитрівна"),
+    ("Юрій", "Юрійович", "Юріївна"),
+    ("Володимир", "Володимирович", "Володимирівна"),
+    ("Тарас", "Тарасович", "Тарасівна"),
+    ("Олег", "Олегович", "Олегівна"),
+    ("Віктор", "Вікторович", "Вікторівна"),
+    ("Богдан", "Богданович", "Богданівна"),
+]
+FEMALE_FIRST_NAMES = [
+    "Олена", "Наталія", "Марія", "Ірина", "Оксана", "Тетяна", "Світлана",
+    "Юлія", "Ганна", "Катерина", "Людмила", "Вікторія", "Софія", "Ольга",
+]
+SPECIALIZATIONS = [
+    "Терапевтична стоматологія",
+    "Ортодонтія",
+    "Хірургічна стоматологія",
+    "Ортопедична стоматологія",
+    "Дитяча стоматологія",
+    "Пародонтологія",
+    "Гігієна",
+]
+NOTES = ["Первинний огляд", "Контроль", "Чистка", "Пломбування", "Консультація"]
+
+# Appointment lengths in minutes and their weights.
+DURATIONS = ([15, 30, 45, 60, 90], [1, 6, 3, 3, 1])
+# Status mix for past and for future dates.
+PAST_STATUSES = (["completed", "cancelled", "planned"], [82, 13, 5])
+FUTURE_STATUSES = (["planned", "cancelled"], [92, 8])
+# Working day per weekday (start hour, end hour); Sunday is off.
+WORKING_DAY = {0: (9, 18), 1: (9, 18), 2: (9, 18), 3: (9, 18), 4: (9, 18), 5: (10, 15)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a large synthetic data set for load testing: doctors, patients "
+        "and non-overlapping appointments. Appointments are only created for the "
+        "doctors generated by this run and are not written to the change log."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--doctors", type=int, default=20)
+        parser.add_argument("--patients", type=int, default=10000)
+        parser.add_argument("--days", type=int, default=90, help="Length of the schedule in days")
+        parser.add_argument(
+            "--start",
+            help="First schedule date (YYYY-MM-DD); default keeps the last 30 days in the future",
+        )
+        parser.add_argument(
+            "--fill",
+            type=float,
+            default=0.8,
+            help="Share of working time that is booked (0..1)",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not 0 <= options["fill"] <= 1:
+            raise CommandError("--fill must be between 0 and 1")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        if options["start"]:
+            start = parse_date(options["start"])
+            if start is None:
+                raise CommandError(f"--start: invalid date {options['start']!r}")
+        else:
+            start = date.today() - timedelta(days=max(options["days"] - 30, 0))
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        started = clock.perf_counter()
+
+        doctor_ids = self._create_doctors(options["doctors"])
+        self._create_patients(options["patients"])
+        patient_keys = list(
+            Patient.objects.filter(phone__startswith=PATIENT_PHONE_PREFIX).values_list(
+                "pk", "search_name", "search_name_alt", "phone_digits"
+            )
+        )
+        if doctor_ids and not patient_keys:
+            raise CommandError("No generated patients to book; use --patients")
+
+        end = start + timedelta(days=options["days"] - 1)
+        total = self._create_appointments(doctor_ids, patient_keys, start, end, options["fill"])
+        if total:
+            call_command(
+                "rebuild_status_rollups",
+                date_from=start.isoformat(),
+                date_to=end.isoformat(),
+                stdout=self.stdout,
+            )
+            versions.bump_directory()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(doctor_ids)} doctors, {options['patients']} patients and "
+                f"{total} appointments in {clock.perf_counter() - started:.1f} s."
+            )
+        )
+
+    def _next_phones(self, model, prefix, count):
+        last = (
+            model.objects.filter(phone__startswith=prefix)
+            .order_by("-phone")
+            .values_list("phone", flat=True)
+            .first()
+        )
+        first = int(last[len(prefix):]) + 1 if last else 0
+        if first + count > 10 ** PHONE_DIGITS:
+            raise CommandError(f"Phone block {prefix} is exhausted")
+        return (f"{prefix}{number:0{PHONE_DIGITS}d}" for number in range(first, first + count))
+
+    def _person(self):
+        last_name = self.rng.choice(LAST_NAMES)
+        first_name, male_middle, female_middle = self.rng.choice(FIRST_NAMES)
+        if self.rng.random() < 0.5:
+            return last_name, first_name, male_middle
+        return last_name, self.rng.choice(FEMALE_FIRST_NAMES), female_middle
+
+    def _insert(self, model, fields, rows):
+        """Insert value tuples in batches with ``executemany``.
+
+        Skips per-object SQL compilation, which dominates ``bulk_create`` at
+        this volume; values must already be adapted with ``_db_value``.
+        """
+        quote = connection.ops.quote_name
+        columns = ", ".join(quote(model._meta.get_field(name).column) for name in fields)
+        sql = (
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) "
+            f"VALUES ({', '.join(['%s'] * len(fields))})"
+        )
+        batch, total = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                total += self._execute_batch(sql, batch)
+                batch = []
+        if batch:
+            total += self._execute_batch(sql, batch)
+        return total
+
+    def _execute_batch(self, sql, batch):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+        return len(batch)
+
+    def _db_value(self, model, field, value):
+        return model._meta.get_field(field).get_db_prep_save(value, connection)
+
+    def _create_doctors(self, count):
+        doctors = []
+        for phone in self._next_phones(Doctor, DOCTOR_PHONE_PREFIX, count):
+            last_name, first_name, middle_name = self._person()
+            doctors.append(
+                Doctor(
+                    last_name=last_name,
+                    first_name=first_name,
+                    middle_name=middle_name,
+                    specialization=self.rng.choice(SPECIALIZATIONS),
+                    phone=phone,
+                )
+            )
+        with transaction.atomic():
+            Doctor.objects.bulk_create(doctors, batch_size=self.batch_size)
+        phones = [doctor.phone for doctor in doctors]
+        return list(Doctor.objects.filter(phone__in=phones).values_list("pk", flat=True))
+
+    def _create_patients(self, count):
+        fields = [
+            "last_name", "first_name", "middle_name", "phone", "birth_date",
+            "created_at", "updated_at", "search_name", "search_name_alt", "phone_digits",
+        ]
+        now = self._db_value(Patient, "created_at", timezone.now())
+        born_from = date(1940, 1, 1).toordinal()
+        born_to = date(2020, 12, 31).toordinal()
+        # Names repeat a lot; fold each combination once.
+        search_keys = {}
+
+        def rows():
+            for phone in self._next_phones(Patient, PATIENT_PHONE_PREFIX, count):
+                name = self._person()
+                if name not in search_keys:
+                    patient = Patient(last_name=name[0], first_name=name[1], middle_name=name[2])
+                    patient.update_search_keys()
+                    search_keys[name] = (patient.search_name, patient.search_name_alt)
+                birth_date = date.fromordinal(self.rng.randint(born_from, born_to))
+                yield (
+                    *name,
+                    phone,
+                    self._db_value(Patient, "birth_date", birth_date),
+                    now,
+                    now,
+                    *search_keys[name],
+                    phone_key(phone),
+                )
+
+        return self._insert(Patient, fields, rows())
+
+    def _day_slots(self, day, fill):
+        """Yield non-overlapping (start, end) minute pairs for one working day."""
+        if day.weekday() not in WORKING_DAY:
+            return
+        opens, closes = WORKING_DAY[day.weekday()]
+        minute, closes = opens * 60, closes * 60
+        durations, weights = DURATIONS
+        while True:
+            length = self.rng.choices(durations, weights)[0]
+            if minute + length > closes:
+                return
+            if self.rng.random() < fill:
+                yield minute, minute + length
+            minute += length
+
+    def _create_appointments(self, doctor_ids, patient_keys, start, end, fill):
+        status_ids = {status.code: status.pk for status in statuses.all()}
+        missing = {*PAST_STATUSES[0], *FUTURE_STATUSES[0]} - status_ids.keys()
+        if missing:
+            raise CommandError(f"Missing appointment statuses: {', '.join(sorted(missing))}")
+        fields = [
+            "patient", "doctor", "date", "time_start", "time_end", "status", "note",
+            "created_at", "updated_at", "patient_search", "patient_search_alt", "patient_phone",
+        ]
+        now = self._db_value(Appointment, "created_at", timezone.now())
+        times = {
+            minute: self._db_value(Appointment, "time_start", time(minute // 60, minute % 60))
+            for minute in range(0, 24 * 60, 5)
+        }
+        today = date.today()
+
+        def rows():
+            for doctor_id in doctor_ids:
+                day = start
+                while day <= end:
+                    codes, weights = PAST_STATUSES if day < today else FUTURE_STATUSES
+                    day_value = self._db_value(Appointment, "date", day)
+                    for start_minute, end_minute in self._day_slots(day, fill):
+                        patient_id, *patient_columns = self.rng.choice(patient_keys)
+                        yield (
+                            patient_id,
+                            doctor_id,
+                            day_value,
+                            times[start_minute],
+                            times[end_minute],
+                            status_ids[self.rng.choices(codes, weights)[0]],
+                            self.rng.choice(NOTES) if self.rng.random() < 0.2 else None,
+                            now,
+                            now,
+                            *patient_columns,
+                        )
+                    day += timedelta(days=1)
+
+        return self._insert(Appointment, fields, rows())
@@ -0,0 +1,69 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.patients.importer import BATCH_SIZE, FORMATS, ImportFileError, import_patients
+
+
+class Command(BaseCommand):
+    help = (
+        "Import patients from a CSV or XLSX file, updating known phone numbers. "
+        "The file is streamed and written in batches; rejected rows are printed "
+        "or written to the --rejects file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="By default from the file extension")
+        parser.add_argument("--encoding", default="utf-8-sig", help="CSV encoding, e.g. cp1251")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--rejects", help="Write rejected rows to this CSV file")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"{path}: no such file")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        file_format = options["format"] or ("xlsx" if path.suffix.lower() == ".xlsx" else "csv")
+
+        rejects_file = None
+        if options["rejects"]:
+            rejects_file = open(options["rejects"], "w", encoding="utf-8", newline="")
+            writer = csv.writer(rejects_file)
+            writer.writerow(["row", "errors"])
+
+            def on_reject(number, errors):
+                writer.writerow([number, json.dumps(errors, ensure_ascii=False)])
+        else:
+            def on_reject(number, errors):
+                self.stderr.write(f"Row {number}: {json.dumps(errors, ensure_ascii=False)}")
+
+        started = time.perf_counter()
+        try:
+            with open(path, "rb") as file:
+                counts = import_patients(
+                    file,
+                    file_format=file_format,
+                    encoding=options["encoding"],
+                    batch_size=options["batch_size"],
+                    on_reject=on_reject,
+                )
+        except (ImportFileError, LookupError) as error:
+            raise CommandError(str(error))
+        finally:
+            if rejects_file is not None:
+                rejects_file.close()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{counts['rows']} rows in {elapsed:.1f} s "
+                f"({counts['rows'] / elapsed if elapsed else 0:.0f} rows/s): "
+                f"created {counts['created']}, updated {counts['updated']}, "
+                f"duplicates {counts['duplicates']}, rejected {counts['rejected']}"
+            )
+        )
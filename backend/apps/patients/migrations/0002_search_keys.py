@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+from common.text import digits, name_key
+
+
+def populate_search_keys(apps, schema_editor):
+    Patient = apps.get_model("patients", "Patient")
+    batch = []
+    for patient in Patient.objects.order_by("pk").iterator(chunk_size=2000):
+        patient.search_name = name_key(
+            patient.last_name, patient.first_name, patient.middle_name
+        )
+        patient.search_name_alt = name_key(
+            patient.first_name, patient.last_name, patient.middle_name
+        )
+        patient.phone_digits = digits(patient.phone)[:32]
+        batch.append(patient)
+        if len(batch) == 2000:
+            Patient.objects.bulk_update(
+                batch, ["search_name", "search_name_alt", "phone_digits"]
+            )
+            batch = []
+    Patient.objects.bulk_update(batch, ["search_name", "search_name_alt", "phone_digits"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='phone_digits',
+            field=models.CharField(default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='search_name_alt',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['search_name'], name='ix_patient_search_name'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['search_name_alt'], name='ix_patient_search_alt'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['phone_digits'], name='ix_patient_phone_digits'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+from common.text import phone_key
+
+
+def normalize_phone_digits(apps, schema_editor):
+    Patient = apps.get_model("patients", "Patient")
+    batch = []
+    for patient in Patient.objects.only("phone", "phone_digits").order_by("pk").iterator(chunk_size=2000):
+        phone_digits = phone_key(patient.phone)[:32]
+        if patient.phone_digits != phone_digits:
+            patient.phone_digits = phone_digits
+            batch.append(patient)
+        if len(batch) == 2000:
+            Patient.objects.bulk_update(batch, ["phone_digits"])
+            batch = []
+    Patient.objects.bulk_update(batch, ["phone_digits"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0002_search_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_phone_digits, migrations.RunPython.noop),
+    ]
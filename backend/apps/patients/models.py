@@ -1,5 +1,9 @@
 from django.db import models
 
+from common.text import name_key, phone_key
+
+SEARCH_KEY_LENGTH = 255
+
 
 class Patient(models.Model):
     first_name = models.CharField(max_length=100)
@@ -10,13 +14,37 @@ class Patient(models.Model):
     birth_date = models.DateField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Folded search keys (see common.text), maintained by save(); code that
+    # writes patients in bulk must call update_search_keys() itself.
+    search_name = models.CharField(max_length=SEARCH_KEY_LENGTH, default="", editable=False)
+    search_name_alt = models.CharField(max_length=SEARCH_KEY_LENGTH, default="", editable=False)
+    phone_digits = models.CharField(max_length=32, default="", editable=False)
 
     class Meta:
         indexes = [
             models.Index(fields=["last_name", "first_name"], name="ix_patient_name"),
+            models.Index(fields=["search_name"], name="ix_patient_search_name"),
+            models.Index(fields=["search_name_alt"], name="ix_patient_search_alt"),
+            models.Index(fields=["phone_digits"], name="ix_patient_phone_digits"),
         ]
         ordering = ["last_name", "first_name"]
 
     def __str__(self):
         return f"{self.last_name} {self.first_name}"
 
+    def update_search_keys(self):
+        """Recompute the search keys: "last first middle" and "first last middle"."""
+        self.search_name = name_key(
+            self.last_name, self.first_name, self.middle_name, max_length=SEARCH_KEY_LENGTH
+        )
+        self.search_name_alt = name_key(
+            self.first_name, self.last_name, self.middle_name, max_length=SEARCH_KEY_LENGTH
+        )
+        self.phone_digits = phone_key(self.phone)[:32]
+
+    def save(self, *args, **kwargs):
+        self.update_search_keys()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "search_name", "search_name_alt", "phone_digits"}
+        super().save(*args, **kwargs)
@@ -5,6 +5,6 @@ from .models import Patient
 class PatientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Patient
-        fields = "__all__"
+        exclude = ["search_name", "search_name_alt", "phone_digits"]
         read_only_fields = ["id", "created_at", "updated_at"]
 
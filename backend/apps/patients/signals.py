@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent by bulk patient writes that bypass Model.save() (importer.py) inside
+# their transaction, with ``updated``, the ids of existing patients that were
+# overwritten, and ``renamed``, those of them whose search keys changed.
+patients_bulk_upserted = Signal()
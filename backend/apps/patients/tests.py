@@ -0,0 +1,161 @@
+import io
+from datetime import time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.appointments.models import Appointment, AppointmentStatus
+from apps.doctors.models import Doctor
+from apps.users.views import LoginSerializer
+from .importer import import_patients
+from .lookup import lookup_patients
+from .models import Patient
+
+
+class PatientLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.olena = Patient.objects.create(
+            first_name="Олена", last_name="Сидоренко", phone="+380501234567"
+        )
+        cls.yurii = Patient.objects.create(
+            first_name="Юрій", last_name="Іваненко", phone="067 765 43 21"
+        )
+        cls.ivan = Patient.objects.create(
+            first_name="Іван", last_name="Сидорчук", phone="0931112233"
+        )
+
+    def ids(self, query, limit=10):
+        return [row["id"] for row in lookup_patients(query, limit)]
+
+    def test_latin_query_finds_cyrillic_names(self):
+        # Ordered by the key: "sydorchuk ivan" before "sydorenko olena".
+        self.assertEqual(self.ids("sydor"), [self.ivan.pk, self.olena.pk])
+        self.assertEqual(self.ids("Ivanenko Iu"), [self.yurii.pk])
+        # First name first, from the alternative key.
+        self.assertEqual(self.ids("olena syd"), [self.olena.pk])
+        self.assertEqual(self.ids("іван"), [self.yurii.pk, self.ivan.pk])
+        self.assertEqual(self.ids("sydor", limit=1), [self.ivan.pk])
+
+    def test_phone_digits_prefix(self):
+        self.assertEqual(self.ids("050 123"), [self.olena.pk])
+        self.assertEqual(self.ids("+38067"), [self.yurii.pk])
+        self.assertEqual(self.ids("93111"), [self.ivan.pk])
+        self.assertEqual(self.ids("05"), [])
+
+    def test_lookup_endpoint(self):
+        client = APIClient()
+        token = LoginSerializer.get_token(User.objects.create_user("staff")).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = client.get("/api/patients/lookup/", {"q": "sydorenko"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "id": self.olena.pk,
+                    "full_name": "Сидоренко Олена",
+                    "phone": "+380501234567",
+                    "birth_date": None,
+                }
+            ],
+        )
+
+
+class PatientSearchKeyTests(TestCase):
+    fixtures = ["appointment_statuses"]
+
+    def test_rename_updates_appointment_keys(self):
+        patient = Patient.objects.create(
+            first_name="Олена", last_name="Сидоренко", phone="0501234567"
+        )
+        doctor = Doctor.objects.create(
+            first_name="Ivan", last_name="Petrenko", specialization="Therapist"
+        )
+        appointment = Appointment.objects.create(
+            patient=patient,
+            doctor=doctor,
+            date=timezone.localdate() + timedelta(days=1),
+            time_start=time(10),
+            time_end=time(10, 30),
+            status=AppointmentStatus.objects.get(code="planned"),
+        )
+        self.assertEqual(
+            (appointment.patient_search, appointment.patient_phone),
+            ("sydorenko olena", "380501234567"),
+        )
+
+        patient.last_name = "Коваль"
+        patient.phone = "+380671112233"
+        patient.save()
+
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.patient_search, "koval olena")
+        self.assertEqual(appointment.patient_search_alt, "olena koval")
+        self.assertEqual(appointment.patient_phone, "380671112233")
+
+
+class ImportPatientsTests(TestCase):
+    def run_import(self, *rows):
+        lines = ["last_name,first_name,phone", *rows]
+        return import_patients(io.BytesIO("\n".join(lines).encode()))
+
+    def test_updates_patients_whatever_their_phone_format(self):
+        local = Patient.objects.create(
+            first_name="Олена", last_name="Сидоренко", phone="0501234567"
+        )
+        spaced = Patient.objects.create(
+            first_name="Петро", last_name="Мельник", phone="8 067 765 43 21"
+        )
+
+        counts = self.run_import(
+            "Сидоренко,Ольга,+380501234567",
+            "Мельник,Павло,067-765-43-21",
+            "Новак,Ірина,+380931112233",
+        )
+
+        self.assertEqual((counts["created"], counts["updated"]), (1, 2))
+        self.assertEqual(Patient.objects.count(), 3)
+        local.refresh_from_db()
+        spaced.refresh_from_db()
+        self.assertEqual((local.first_name, local.phone), ("Ольга", "0501234567"))
+        self.assertEqual(spaced.first_name, "Павло")
+        # A second run finds the patients it created.
+        counts = self.run_import("Новак,Ірина,0931112233")
+        self.assertEqual((counts["created"], counts["updated"]), (0, 1))
+
+
+class GenerateLoadDataTests(TestCase):
+    fixtures = ["appointment_statuses"]
+
+    def generate(self, **options):
+        out = io.StringIO()
+        start = timezone.localdate() - timedelta(days=3)
+        call_command(
+            "generate_load_data", start=start.isoformat(), days=7, seed=7, stdout=out, **options
+        )
+        return out.getvalue()
+
+    def test_generates_bookable_data(self):
+        out = self.generate(doctors=2, patients=30)
+        self.generate(doctors=1, patients=10)
+
+        self.assertIn("Created 2 doctors, 30 patients and ", out)
+        self.assertEqual(Patient.objects.count(), 40)
+        self.assertEqual(Patient.objects.values("phone").distinct().count(), 40)
+        rows = list(
+            Appointment.objects.order_by("doctor_id", "date", "time_start").values_list(
+                "doctor_id", "date", "time_start", "time_end", "patient_search"
+            )
+        )
+        self.assertTrue(rows)
+        for previous, row in zip(rows, rows[1:]):
+            if previous[:2] == row[:2]:
+                self.assertLessEqual(previous[3], row[2])
+        self.assertTrue(all(row[4] for row in rows))
+        call_command("rebuild_status_rollups", verify=True, stdout=io.StringIO())
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import PatientViewSet
 
@@ -6,3 +8,10 @@ router.register(r"", PatientViewSet, basename="patient")
 
 urlpatterns = router.urls
 
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import AsyncPatientLookupView
+
+    urlpatterns = [
+        path("lookup/", AsyncPatientLookupView.as_view(), name="patient-lookup"),
+        *urlpatterns,
+    ]
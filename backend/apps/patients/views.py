@@ -1,14 +1,97 @@
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from apps.appointments.models import Appointment, ArchivedAppointment
+from apps.appointments.permissions import IsRegistrarOrAdmin
+from apps.appointments.read import appointment_values, represent
+from common.replicas import ReplicaReadMixin
+from common.views import SerializationTimingMixin
+from .importer import FORMATS, ImportFileError, import_patients
+from .lookup import lookup_patients
 from .models import Patient
 from .serializers import PatientSerializer
 
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientLookupMixin:
+    lookup_max_limit = 50
+
+    def _lookup_params(self, request):
+        """``?q=`` prefix of a name or phone and ``?limit=`` rows."""
+        query = request.query_params.get("q", "").strip()
+        limit = request.query_params.get("limit", "10")
+        if not limit.isdigit() or not 1 <= int(limit) <= self.lookup_max_limit:
+            raise ValidationError({"limit": f"must be between 1 and {self.lookup_max_limit}"})
+        return query, int(limit)
+
+
+class PatientViewSet(
+    ReplicaReadMixin, SerializationTimingMixin, PatientLookupMixin, viewsets.ModelViewSet
+):
     queryset = Patient.objects.all().order_by("-created_at")
     serializer_class = PatientSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["last_name", "first_name", "middle_name", "phone"]
     ordering_fields = ["last_name", "created_at"]
+    replica_actions = ("list", "retrieve", "history")
+    max_reported_rejects = 100
+
+    @action(detail=False, methods=["get"], url_path="lookup", pagination_class=None)
+    def lookup(self, request):
+        """Search-as-you-type over the indexed search keys."""
+        query, limit = self._lookup_params(request)
+        return Response(lookup_patients(query, limit) if query else [])
+
+    @action(detail=True, methods=["get"], url_path="history")
+    def history(self, request, pk=None):
+        """The patient's appointments, archived ones included, newest first."""
+        patient = self.get_object()
+        rows = appointment_values(
+            Appointment.objects.filter(patient_id=patient.pk),
+            archived=ArchivedAppointment.objects.filter(patient_id=patient.pk),
+        )
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(represent(rows))
+        return self.get_paginated_response(represent(page))
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser],
+        permission_classes=[IsRegistrarOrAdmin],
+    )
+    def import_file(self, request):
+        """Upsert patients from an uploaded CSV or XLSX ``file`` (see importer.py).
+
+        Returns the counts and the first ``max_reported_rejects`` rejected rows.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "a CSV or XLSX file is required"})
+        file_format = request.data.get("format") or (
+            "xlsx" if upload.name.lower().endswith(".xlsx") else "csv"
+        )
+        if file_format not in FORMATS:
+            raise ValidationError({"format": f"must be one of {', '.join(FORMATS)}"})
+
+        rejects = []
+
+        def on_reject(number, errors):
+            if len(rejects) < self.max_reported_rejects:
+                rejects.append({"row": number, "errors": errors})
 
+        try:
+            counts = import_patients(
+                upload.file,
+                file_format=file_format,
+                encoding=request.data.get("encoding") or "utf-8-sig",
+                on_reject=on_reject,
+            )
+        except (ImportFileError, LookupError) as error:
+            raise ValidationError({"file": str(error)})
+        return Response({**counts, "rejects": rejects})
@@ -0,0 +1,46 @@
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+
+from .roles import REVOKED, aget_override, get_override
+
+
+class RoleTokenUser(TokenUser):
+    """Token-backed user exposing the signed ``roles`` claim."""
+
+    @cached_property
+    def roles(self):
+        return list(self.token.get("roles", []))
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """JWT authentication that never loads ``auth_user``.
+
+    The user is built from the validated token; a cached role override (see
+    ``apps.users.roles``) takes precedence over the claim so role changes and
+    deactivations apply before the token expires.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        return self._apply_override(user, get_override(user.id))
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for async views; returns the user or ``None``."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        user = super().get_user(self.get_validated_token(raw_token))
+        return self._apply_override(user, await aget_override(user.id))
+
+    def _apply_override(self, user, override):
+        if override == REVOKED:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if override is not None:
+            user.roles = override
+        return user
@@ -1,20 +1,26 @@
 from rest_framework.permissions import BasePermission
 
+from .roles import get_roles
 
-class IsAdmin(BasePermission):
-    def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.groups.filter(name="admin").exists()
-        )
 
+class HasRole(BasePermission):
+    """Grants access when the user has any of ``roles``.
+
+    Roles come from the access token, so no query is made for JWT requests.
+    """
+
+    roles = ()
 
-class IsRegistrar(BasePermission):
     def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.groups.filter(name="registrar").exists()
-        )
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        return not set(self.roles).isdisjoint(get_roles(user))
+
+
+class IsAdmin(HasRole):
+    roles = ("admin",)
+
 
+class IsRegistrar(HasRole):
+    roles = ("registrar",)
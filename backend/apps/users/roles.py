@@ -0,0 +1,51 @@
+"""Role lookup shared by permissions, serializers and authentication.
+
+Access tokens carry the user's group names in the ``roles`` claim, so requests
+authenticated by token never need to query ``auth_user_groups``. When roles
+change or a user is deactivated, an override is written to the cache for one
+access-token lifetime; tokens issued before the change are corrected (or
+rejected) until they expire, and refreshed tokens are re-stamped from the
+database.
+"""
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+
+ROLES_CACHE_KEY = "users:roles:{}"
+REVOKED = "__revoked__"
+
+
+def _override_timeout():
+    return int(settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds())
+
+
+def roles_from_db(user_id):
+    return list(
+        Group.objects.filter(user__id=user_id)
+        .order_by("name")
+        .values_list("name", flat=True)
+    )
+
+
+def override_roles(user_id, roles):
+    cache.set(ROLES_CACHE_KEY.format(user_id), list(roles), _override_timeout())
+
+
+def revoke(user_id):
+    cache.set(ROLES_CACHE_KEY.format(user_id), REVOKED, _override_timeout())
+
+
+def get_override(user_id):
+    return cache.get(ROLES_CACHE_KEY.format(user_id))
+
+
+async def aget_override(user_id):
+    return await cache.aget(ROLES_CACHE_KEY.format(user_id))
+
+
+def get_roles(user):
+    """Return the role names of ``user``, from the token when it has one."""
+    roles = getattr(user, "roles", None)
+    if roles is not None:
+        return roles
+    return roles_from_db(user.pk)
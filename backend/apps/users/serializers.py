@@ -1,6 +1,8 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
+from .roles import get_roles
+
 
 class UserSerializer(serializers.ModelSerializer):
     roles = serializers.SerializerMethodField()
@@ -10,5 +12,4 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "first_name", "last_name", "email", "roles"]
 
     def get_roles(self, obj):
-        return list(obj.groups.values_list("name", flat=True))
-
+        return get_roles(obj)
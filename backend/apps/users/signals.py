@@ -0,0 +1,53 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .roles import REVOKED, get_override, override_roles, revoke, roles_from_db
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def refresh_roles_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # group.user_set changes: remember members before a clear.
+        if action == "pre_clear":
+            instance._cleared_user_ids = list(instance.user_set.values_list("pk", flat=True))
+            return
+        if action == "post_clear":
+            user_ids = getattr(instance, "_cleared_user_ids", [])
+        elif action in ("post_add", "post_remove"):
+            user_ids = pk_set or []
+        else:
+            return
+    else:
+        if action not in ("post_add", "post_remove", "post_clear"):
+            return
+        user_ids = [instance.pk]
+
+    for user_id in user_ids:
+        override_roles(user_id, roles_from_db(user_id))
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_members(sender, instance, **kwargs):
+    instance._member_ids = list(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Group)
+def refresh_roles_on_group_delete(sender, instance, **kwargs):
+    for user_id in getattr(instance, "_member_ids", []):
+        override_roles(user_id, roles_from_db(user_id))
+
+
+@receiver(post_save, sender=User)
+def revoke_inactive_user(sender, instance, created, **kwargs):
+    if created:
+        return
+    if not instance.is_active:
+        revoke(instance.pk)
+    elif get_override(instance.pk) == REVOKED:
+        override_roles(instance.pk, roles_from_db(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user(sender, instance, **kwargs):
+    revoke(instance.pk)
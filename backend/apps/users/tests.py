@@ -0,0 +1,58 @@
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import StatelessJWTAuthentication
+from .permissions import IsAdmin, IsRegistrar
+from .views import LoginSerializer
+
+
+class RoleClaimTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.registrar_group = Group.objects.create(name="registrar")
+        cls.admin_group = Group.objects.create(name="admin")
+        cls.user = User.objects.create_user("registrar")
+        cls.user.groups.add(cls.registrar_group)
+
+    def setUp(self):
+        cache.clear()
+        self.refresh = LoginSerializer.get_token(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}")
+
+    def test_roles_come_from_the_token_without_queries(self):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}"
+        )
+        with self.assertNumQueries(0):
+            request = Request(request, authenticators=[StatelessJWTAuthentication()])
+            self.assertTrue(IsRegistrar().has_permission(request, None))
+            self.assertFalse(IsAdmin().has_permission(request, None))
+
+    def test_removed_role_applies_to_issued_tokens(self):
+        self.assertEqual(self.client.post("/api/appointments/", {}).status_code, 400)
+
+        self.user.groups.remove(self.registrar_group)
+
+        self.assertEqual(self.client.post("/api/appointments/", {}).status_code, 403)
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+
+    def test_refresh_stamps_current_roles(self):
+        self.user.groups.add(self.admin_group)
+
+        response = self.client.post("/api/auth/refresh/", {"refresh": str(self.refresh)})
+
+        self.assertEqual(response.status_code, 200)
+        access = AccessToken(response.data["access"])
+        self.assertEqual(access["roles"], ["admin", "registrar"])
@@ -1,7 +1,14 @@
 from django.contrib.auth.models import User
 from rest_framework import generics, permissions
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from common.views import SerializationTimingMixin
+from .roles import get_roles, roles_from_db
 from .serializers import UserSerializer
 
 
@@ -9,22 +16,33 @@ class LoginSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        token["roles"] = list(user.groups.values_list("name", flat=True))
+        token["roles"] = roles_from_db(user.pk)
         return token
 
 
+class RefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # Re-stamp roles so refreshed tokens never carry stale ones.
+        access = AccessToken(data["access"])
+        access["roles"] = roles_from_db(access[api_settings.USER_ID_CLAIM])
+        data["access"] = str(access)
+        return data
+
+
 class LoginView(TokenObtainPairView):
     serializer_class = LoginSerializer
 
 
 class RefreshView(TokenRefreshView):
-    pass
+    serializer_class = RefreshSerializer
 
 
-class MeView(generics.RetrieveAPIView):
+class MeView(SerializationTimingMixin, generics.RetrieveAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
-
+        user = User.objects.get(pk=self.request.user.pk)
+        user.roles = get_roles(self.request.user)
+        return user
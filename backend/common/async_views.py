@@ -0,0 +1,73 @@
+"""Async counterpart of DRF's ``APIView`` for read-only JSON endpoints.
+
+DRF views are synchronous, so under ASGI each request holds a worker
+thread for its whole duration. ``AsyncAPIView`` keeps the parts these
+endpoints need: stateless JWT authentication, DRF permission classes,
+``APIException`` error bodies and JSON output. Its handlers
+are coroutines that use the async ORM. Parsing helpers written for DRF
+views work as they are, because ``request.query_params`` is provided.
+``replica_reads = True`` is the counterpart of ``ReplicaReadMixin``.
+"""
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.permissions import IsAuthenticated
+
+from apps.users.authentication import StatelessJWTAuthentication
+from . import replicas
+from .renderers import ORJSONRenderer
+
+
+class AsyncAPIView(View):
+    http_method_names = ["get", "head", "options"]
+    permission_classes = [IsAuthenticated]
+    authentication_class = StatelessJWTAuthentication
+    media_type = ORJSONRenderer.media_type
+    replica_reads = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.query_params = request.GET
+        authenticator = self.authentication_class()
+        token = replicas.read_from_primary()
+        try:
+            user = await authenticator.aauthenticate(request)
+            request.user = user or AnonymousUser()
+            self.check_permissions(request)
+            handler = getattr(self, request.method.lower(), None)
+            if request.method.lower() not in self.http_method_names or handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            if self.replica_reads and await replicas.awants_replica(request):
+                replicas.read_from_replica()
+            return await handler(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = self.render(self._error_data(exc), status=exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                response["WWW-Authenticate"] = authenticator.authenticate_header(request)
+            return response
+        finally:
+            replicas.reset(token)
+
+    def check_permissions(self, request):
+        for permission in (permission_class() for permission_class in self.permission_classes):
+            if not permission.has_permission(request, self):
+                if not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+
+    def _error_data(self, exc):
+        if isinstance(exc.detail, (list, dict)):
+            return exc.detail
+        return {"detail": exc.detail}
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return HttpResponse(
+            ORJSONRenderer().render(data),
+            content_type=self.media_type,
+            status=status,
+        )
+
+    async def options(self, request, *args, **kwargs):
+        response = HttpResponse()
+        response["Allow"] = ", ".join(method.upper() for method in self.http_method_names)
+        return response
@@ -0,0 +1,128 @@
+"""In-process request metrics rendered in the Prometheus text format.
+
+Each worker process keeps its own histograms; scrape every worker (or sum
+across them) when running several.
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, labels):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series = defaultdict(lambda: [0] * (len(buckets) + 1) + [0.0])
+
+    def observe(self, value, *label_values):
+        series = self._series[label_values]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = defaultdict(int)
+
+    def inc(self, *label_values):
+        self._values[label_values] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{{{_labels(self.labels, label_values)}}} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class RequestMetrics:
+    """Histograms of request, DB, serialization and render time and query counts per view."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        labels = ("view", "method")
+        self.requests = Counter(
+            "http_requests_total", "Requests by view, method and status.", labels + ("status",)
+        )
+        self.duration = Histogram(
+            "http_request_duration_seconds", "Total request time.", SECONDS_BUCKETS, labels
+        )
+        self.db = Histogram(
+            "http_request_db_seconds", "Time spent in SQL queries.", SECONDS_BUCKETS, labels
+        )
+        self.serialize = Histogram(
+            "http_request_serialize_seconds",
+            "Time building response data (serializers), outside SQL.",
+            SECONDS_BUCKETS,
+            labels,
+        )
+        self.app = Histogram(
+            "http_request_app_seconds",
+            "View time outside SQL and serialization: permissions, Python code.",
+            SECONDS_BUCKETS,
+            labels,
+        )
+        self.render_time = Histogram(
+            "http_request_render_seconds", "Response rendering time.", SECONDS_BUCKETS, labels
+        )
+        self.queries = Histogram(
+            "http_request_queries", "SQL queries per request.", QUERY_BUCKETS, labels
+        )
+
+    def observe(self, view, method, status, total, db, serialize, app, render, queries):
+        with self._lock:
+            self.requests.inc(view, method, status)
+            self.duration.observe(total, view, method)
+            self.db.observe(db, view, method)
+            self.serialize.observe(serialize, view, method)
+            self.app.observe(app, view, method)
+            self.render_time.observe(render, view, method)
+            self.queries.observe(queries, view, method)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (
+                self.requests,
+                self.duration,
+                self.db,
+                self.serialize,
+                self.app,
+                self.render_time,
+                self.queries,
+            ):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = RequestMetrics()
@@ -0,0 +1,207 @@
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+
+from .metrics import metrics
+
+logger = logging.getLogger("perf")
+
+# Timing marks of the request being handled, for ``serializing()``.
+_current_marks = ContextVar("perf_marks", default=None)
+
+
+class _QueryTimer:
+    """``execute_wrapper`` that counts queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = (0.0, None)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if elapsed > self.slowest[0]:
+                self.slowest = (elapsed, sql)
+
+
+@contextmanager
+def serializing():
+    """Count the block as ``serialize`` time of the current request.
+
+    SQL run inside it (lazy relations, querysets iterated while rows are
+    built) stays in ``db``; nested blocks count once. Outside a request
+    measured by ``PerformanceMiddleware`` it does nothing.
+    """
+    marks = _current_marks.get()
+    if marks is None or marks["serializing"]:
+        yield
+        return
+    timer = marks["timer"]
+    marks["serializing"] = True
+    started, db_before = time.perf_counter(), timer.seconds
+    try:
+        yield
+    finally:
+        marks["serializing"] = False
+        elapsed = time.perf_counter() - started - (timer.seconds - db_before)
+        marks["serialize"] += max(elapsed, 0.0)
+
+
+class PerformanceMiddleware:
+    """Measures SQL, serialization, application and render time of every request.
+
+    Adds a ``Server-Timing`` header (``db``, ``serialize``, ``app``,
+    ``render``, ``total`` in ms, plus the query count), records the timings
+    in the in-process histograms served by ``/api/_metrics`` and logs
+    requests slower than ``PERF_SLOW_REQUEST_MS`` with their slowest SQL.
+    ``serialize`` is the time spent in ``serializing()`` blocks: serializer
+    ``.data`` of views with ``SerializationTimingMixin`` and the
+    ``read.represent`` fast path. ``app`` is the rest outside SQL until the
+    response is rendered: middleware, authentication, permissions and view
+    code. Streaming responses are timed up to the first byte. Works in both
+    WSGI and ASGI stacks.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = _QueryTimer()
+        token = _current_marks.set(self._start(request, timer))
+        started = time.perf_counter()
+        try:
+            with self._timed_connections(timer):
+                response = self.get_response(request)
+        finally:
+            _current_marks.reset(token)
+        return self._finish(request, response, timer, started)
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        token = _current_marks.set(self._start(request, timer))
+        started = time.perf_counter()
+        # The async ORM runs queries on the request's thread-sensitive
+        # executor thread; the wrappers must be installed on its connections.
+        stack = await sync_to_async(self._timed_connections)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current_marks.reset(token)
+        return self._finish(request, response, timer, started)
+
+    @staticmethod
+    def _start(request, timer):
+        request._perf = {
+            "view_ended": None,
+            "rendered": None,
+            "serialize": 0.0,
+            "serializing": False,
+            "timer": timer,
+        }
+        return request._perf
+
+    def _timed_connections(self, timer):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        return stack
+
+    def _finish(self, request, response, timer, started):
+        ended = time.perf_counter()
+        marks = request._perf
+        view_ended = marks["view_ended"] or ended
+        render = (marks["rendered"] or view_ended) - view_ended
+        serialize = marks["serialize"]
+        app = max(view_ended - started - timer.seconds - serialize, 0.0)
+        total = ended - started
+
+        if settings.PERF_SERVER_TIMING:
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={timer.seconds * 1000:.1f};desc="{timer.count} queries"',
+                    f"serialize;dur={serialize * 1000:.1f}",
+                    f"app;dur={app * 1000:.1f}",
+                    f"render;dur={render * 1000:.1f}",
+                    f"total;dur={total * 1000:.1f}",
+                ]
+            )
+
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else "unmatched"
+        metrics.observe(
+            view,
+            request.method,
+            response.status_code,
+            total,
+            timer.seconds,
+            serialize,
+            app,
+            render,
+            timer.count,
+        )
+
+        if total * 1000 >= settings.PERF_SLOW_REQUEST_MS:
+            slowest_seconds, slowest_sql = timer.slowest
+            logger.warning(
+                "Slow request %s %s: %d in %.0f ms (db %.0f ms in %d queries, serialize "
+                "%.0f ms, app %.0f ms, render %.0f ms); slowest SQL %.0f ms: %s",
+                request.method,
+                request.get_full_path(),
+                response.status_code,
+                total * 1000,
+                timer.seconds * 1000,
+                timer.count,
+                serialize * 1000,
+                app * 1000,
+                render * 1000,
+                slowest_seconds * 1000,
+                (slowest_sql or "-")[:1000],
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; split the two.
+        marks = request._perf
+        marks["view_ended"] = time.perf_counter()
+
+        def rendered(response):
+            marks["rendered"] = time.perf_counter()
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """``GZipMiddleware`` for bodies of at least ``GZIP_MIN_LENGTH`` bytes.
+
+    Small responses are not worth the CPU. Server-sent events are never
+    compressed: gzip would hold events back until its buffer fills.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming:
+            if response.get("Content-Type", "").startswith("text/event-stream"):
+                return response
+        elif len(response.content) < settings.GZIP_MIN_LENGTH:
+            return response
+        return super().process_response(request, response)
@@ -1,7 +1,202 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = "page_size"
     max_page_size = 100
 
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a composite key, without COUNT(*) or OFFSET.
+
+    ``ordering`` must be unique (end it with the primary key). Each page is
+    fetched with a row-value style ``WHERE`` on the last key seen, so deep
+    pages cost the same as the first one when an index matches the ordering.
+    ``?count=approx`` adds a count capped at ``approximate_count_cap``.
+    """
+
+    ordering = ("-id",)
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    approximate_count_cap = 10000
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.approximate_count = None
+        if request.query_params.get(self.count_query_param) == "approx":
+            capped = queryset.order_by()[: self.approximate_count_cap + 1].count()
+            self.approximate_count = min(capped, self.approximate_count_cap)
+            self.count_is_capped = capped > self.approximate_count_cap
+
+        reverse, position = self.decode_cursor(request, queryset.model)
+        ordering = self._reversed(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.first_key = self._key(rows[0]) if rows else None
+        self.last_key = self._key(rows[-1]) if rows else None
+        if not rows and position is not None:
+            # Keep the client able to walk back to where it came from.
+            self.first_key = self.last_key = position
+        return rows
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value:
+            try:
+                size = int(value)
+            except ValueError:
+                size = 0
+            if size > 0:
+                return min(size, self.max_page_size)
+        return self.page_size
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.approximate_count is not None:
+            payload["count"] = self.approximate_count
+            payload["count_is_approximate"] = self.count_is_capped
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer"},
+                "count_is_approximate": {"type": "boolean"},
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return self.encode_cursor(False, self.last_key)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_key is None:
+            return None
+        return self.encode_cursor(True, self.first_key)
+
+    def encode_cursor(self, reverse, key):
+        raw = json.dumps({"r": int(reverse), "k": key}, separators=(",", ":"))
+        cursor = base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """Return ``(reverse, key)``, the key values parsed by ``model``'s fields."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return False, None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            data = json.loads(raw)
+            key = data["k"]
+            if not isinstance(key, list) or len(key) != len(self.ordering):
+                raise ValueError
+            return bool(data["r"]), [
+                self._parse_value(model, field.lstrip("-"), value)
+                for field, value in zip(self.ordering, key)
+            ]
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _parse_value(model, name, value):
+        if value is None or isinstance(value, (list, dict, bool)):
+            raise ValueError
+        value = model._meta.get_field(name).to_python(value)
+        if value is None:
+            raise ValueError
+        return value
+
+    def _key(self, obj):
+        key = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip("-"))
+            key.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return key
+
+    @staticmethod
+    def _reversed(ordering):
+        return tuple(f[1:] if f.startswith("-") else f"-{f}" for f in ordering)
+
+    @staticmethod
+    def _after(ordering, key):
+        """``(a, b, c) > (x, y, z)`` expanded for per-column directions.
+
+        The expansion is an OR, which planners cannot turn into an index
+        range; the redundant ``a >= x`` in front gives them a seek on the
+        leading column.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, key):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        name = ordering[0].lstrip("-")
+        lookup = "lte" if ordering[0].startswith("-") else "gte"
+        return Q(**{f"{name}__{lookup}": key[0]}) & condition
+
+
+class PaginationModeMixin:
+    """Lets clients choose the pagination style per request.
+
+    ``?pagination=page|cursor`` picks an entry of ``pagination_classes``;
+    a ``cursor`` parameter implies cursor mode. Views set
+    ``default_pagination_mode`` to switch their default.
+    """
+
+    pagination_classes = {"page": StandardResultsSetPagination}
+    default_pagination_mode = "page"
+    pagination_mode_param = "pagination"
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            mode = self.default_pagination_mode
+            request = getattr(self, "request", None)
+            if request is not None:
+                params = request.query_params
+                if params.get(KeysetPagination.cursor_query_param):
+                    mode = "cursor"
+                mode = params.get(self.pagination_mode_param, mode)
+            if mode not in self.pagination_classes:
+                raise ValidationError(
+                    {self.pagination_mode_param: f"must be one of {sorted(self.pagination_classes)}"}
+                )
+            self._paginator = self.pagination_classes[mode]()
+        return self._paginator
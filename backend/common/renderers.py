@@ -0,0 +1,42 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional: without it the renderer is plain JSONRenderer.
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` that encodes with orjson when it is installed.
+
+    The output is byte-for-byte what ``JSONRenderer`` produces with the
+    default settings (compact, UTF-8): dates, times, decimals and lazy strings
+    still go through DRF's encoder, so their format does not change, while
+    dicts, lists, strings and numbers are encoded in C. Indented
+    (``Accept: application/json; indent=4``) and ASCII-only output fall back to
+    ``JSONRenderer``.
+    """
+
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=self._default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # Like JSONRenderer, escape the two characters that end a line in
+        # JavaScript so the output stays safe inside <script>.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
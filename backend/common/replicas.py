@@ -0,0 +1,122 @@
+"""Routing of read-only requests to database replicas.
+
+Replicas are the ``DATABASES`` aliases listed in ``DATABASE_REPLICAS``
+(configured from ``DB_REPLICAS``, see settings). Nothing reads from them
+unless a view opts in: ``ReplicaReadMixin`` on DRF views and
+``replica_reads = True`` on ``AsyncAPIView`` subclasses. Everything else,
+including every write, every read inside a write request or a transaction
+and ``select_for_update()``, uses ``default``.
+
+Replicas lag behind the primary, so a user who has just written is pinned to
+the primary for ``REPLICA_LAG_SECONDS`` (read-your-writes). Views with ETags
+read their versions from the same replica as the body (see
+``apps.appointments.versions``), so a stale body is never cached under a new
+ETag. Pins live in the default cache; use a shared cache with several
+worker processes.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_KEY = "replicas:pinned:{}"
+
+_read_alias = ContextVar("replica_read_alias", default=None)
+
+
+class ReplicaRouter:
+    """Sends reads to the replica chosen for the current request, if any."""
+
+    def db_for_read(self, model, **hints):
+        # Reads inside a transaction must see its writes and locks.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Without this an instance loaded from a replica would be saved there.
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def read_from_replica():
+    """Route this context's reads to a replica; returns a token for ``reset``."""
+    return _read_alias.set(random.choice(settings.DATABASE_REPLICAS))
+
+
+def read_from_primary():
+    return _read_alias.set(None)
+
+
+def reset(token):
+    _read_alias.reset(token)
+
+
+def reading_from_replica():
+    return _read_alias.get() is not None
+
+
+def pin(user):
+    """Keep ``user`` on the primary while replicas may miss their last write."""
+    if settings.DATABASE_REPLICAS and user.is_authenticated:
+        cache.set(PIN_KEY.format(user.pk), True, timeout=settings.REPLICA_LAG_SECONDS)
+
+
+def wants_replica(request):
+    return (
+        bool(settings.DATABASE_REPLICAS)
+        and request.method in SAFE_METHODS
+        and not (request.user.is_authenticated and cache.get(PIN_KEY.format(request.user.pk)))
+    )
+
+
+async def awants_replica(request):
+    return (
+        bool(settings.DATABASE_REPLICAS)
+        and request.method in SAFE_METHODS
+        and not (
+            request.user.is_authenticated and await cache.aget(PIN_KEY.format(request.user.pk))
+        )
+    )
+
+
+class ReplicaReadMixin:
+    """Serve safe requests of a DRF view from a replica.
+
+    On viewsets only ``replica_actions`` do; custom actions such as lookups
+    used while booking stay on the primary. Unsafe requests pin the user to
+    the primary. The decision is taken after authentication, so the whole
+    view, including pagination and serialization, reads from one database.
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def dispatch(self, request, *args, **kwargs):
+        token = read_from_primary()
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        action = getattr(self, "action", None)
+        if action is not None and action not in self.replica_actions:
+            return
+        if wants_replica(request):
+            read_from_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            pin(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
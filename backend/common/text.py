@@ -0,0 +1,109 @@
+"""Normalization of names and phones into index-friendly search keys.
+
+Keys are lower-case ASCII letters, digits and single spaces: Cyrillic is
+transliterated (Ukrainian national rules, plus the few Russian-only letters)
+and other accents are stripped, so ``Іваненко`` and ``ivanenko`` fold to the
+same key and prefix searches can run as plain range scans over an index.
+"""
+import re
+import unicodedata
+
+_TRANSLIT = str.maketrans(
+    {
+        "а": "a", "б": "b", "в": "v", "г": "h", "ґ": "g", "д": "d", "е": "e",
+        "є": "ie", "ж": "zh", "з": "z", "и": "y", "і": "i", "ї": "i", "й": "i",
+        "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+        "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch",
+        "ш": "sh", "щ": "shch", "ь": "", "ю": "iu", "я": "ia", "ы": "y",
+        "э": "e", "ё": "e", "ъ": "", "'": "", "ʼ": "", "’": "",
+    }
+)
+_NON_KEY = re.compile(r"[^a-z0-9]+")
+_NON_DIGIT = re.compile(r"\D+")
+_PHONE_QUERY = re.compile(r"[\d\s()+\-.]+")
+
+# Largest character a key can contain, in every collation we run on.
+KEY_MAX_CHAR = "z"
+
+
+def fold(value):
+    """Return the search key of ``value``: transliterated, lower-case words."""
+    if not value:
+        return ""
+    value = value.lower().translate(_TRANSLIT)
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    return " ".join(_NON_KEY.split(value)).strip()
+
+
+def digits(value):
+    """Return only the digits of ``value``."""
+    return _NON_DIGIT.sub("", value or "")
+
+
+def is_phone_query(value):
+    """Whether ``value`` is made of phone characters only (digits, +, spaces, ...)."""
+    return bool(_PHONE_QUERY.fullmatch(value))
+
+
+def phone_prefixes(value):
+    """Digit prefixes to match for a typed phone.
+
+    Numbers are stored normalized, with the country code (``phone_key``), so
+    a local ``050...``, ``8050...`` or a bare ``50...`` also matches
+    ``38050...``.
+    """
+    prefixes = [value]
+    if value.startswith("0"):
+        prefixes.append("38" + value)
+    elif value.startswith("80"):
+        prefixes.append("3" + value)
+    elif not value.startswith("3"):
+        prefixes.append("380" + value)
+    return prefixes
+
+
+def normalize_phone(value):
+    """Return ``value`` as ``+<country code><number>``, or "" if it is not a phone.
+
+    Numbers without ``+`` or ``00`` are Ukrainian: ``050...``, ``8050...``,
+    ``38050...``, or nine digits when a spreadsheet has dropped the leading
+    zero.
+    """
+    value = str(value or "").strip()
+    number = digits(value)
+    if value.startswith("00"):
+        number = number[2:]
+    elif not value.startswith("+"):
+        if len(number) == 9:
+            number = "380" + number
+        elif len(number) == 10 and number.startswith("0"):
+            number = "38" + number
+        elif len(number) == 11 and number.startswith("80"):
+            number = "3" + number
+        elif not number.startswith("380"):
+            return ""
+    if number.startswith("380") and len(number) != 12:
+        return ""
+    if not 8 <= len(number) <= 15:
+        return ""
+    return "+" + number
+
+
+def phone_key(value):
+    """Digits of the normalized phone, or of ``value`` itself if it is not one."""
+    return digits(normalize_phone(value) or value)
+
+
+def name_key(*parts, max_length=255):
+    """Fold and join name parts, skipping empty ones."""
+    return " ".join(key for key in map(fold, parts) if key)[:max_length]
+
+
+def prefix_range(prefix, max_length):
+    """Bounds ``(low, high)`` such that ``low <= key <= high`` iff key starts with ``prefix``.
+
+    Used instead of ``LIKE 'prefix%'`` so the lookup is a range seek on any
+    backend, whatever its LIKE or collation rules.
+    """
+    return prefix, prefix + KEY_MAX_CHAR * (max_length - len(prefix))
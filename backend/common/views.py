@@ -0,0 +1,61 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.users.permissions import IsAdmin
+from .metrics import metrics
+from .middleware import serializing
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return json.dumps(data).encode(self.charset)
+
+
+class MetricsView(APIView):
+    """Request histograms of this worker process in Prometheus text format."""
+
+    permission_classes = [IsAdmin]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        return Response(
+            metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
+class SerializationTimingMixin:
+    """Reports serializer ``.data`` as ``serialize`` time.
+
+    ``.data`` is cached on the serializer, so it is built here inside
+    ``serializing()``, for serializers of instances as soon as they are
+    created and for written ones right after the save; the view then reads
+    the cached copy. See ``common.middleware.PerformanceMiddleware``.
+    """
+
+    def timed_data(self, serializer):
+        with serializing():
+            return serializer.data
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        instance = args[0] if args else kwargs.get("instance")
+        if instance is not None and "data" not in kwargs:
+            self.timed_data(serializer)
+        return serializer
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.timed_data(serializer)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.timed_data(serializer)
@@ -26,6 +26,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "common.middleware.PerformanceMiddleware",
+    "common.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -55,14 +57,34 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 db_engine = os.getenv("DB_ENGINE", "sqlite").lower()  # Змінив дефолт на sqlite
 
+# Production profile for SQLite: WAL lets readers run alongside the single
+# writer, and BEGIN IMMEDIATE takes the write lock when a transaction starts,
+# so concurrent bookings queue on the busy timeout instead of failing with
+# "database is locked" when a read lock cannot be upgraded.
+SQLITE_TUNED_OPTIONS = {
+    "transaction_mode": "IMMEDIATE",
+    "timeout": int(os.getenv("DB_SQLITE_BUSY_TIMEOUT", "20")),
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA mmap_size=268435456;"
+        "PRAGMA cache_size=-65536;"
+        "PRAGMA temp_store=MEMORY;"
+    ),
+}
+
 if db_engine == "sqlite":
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / os.getenv("DB_NAME", "db.sqlite3"),
+            "OPTIONS": (
+                SQLITE_TUNED_OPTIONS if os.getenv("DB_SQLITE_TUNED", "True") == "True" else {}
+            ),
         }
     }
 else:
@@ -74,6 +96,8 @@ else:
             "PASSWORD": os.getenv("DB_PASSWORD", ""),
             "HOST": os.getenv("DB_HOST", "localhost"),
             "PORT": os.getenv("DB_PORT", "1433"),
+            # Persistent connections help under WSGI only; keep 0 under ASGI.
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "0")),
             "OPTIONS": {
                 "driver": os.getenv("DB_DRIVER", "ODBC Driver 18 for SQL Server"),
                 "extra_params": os.getenv("DB_EXTRA_PARAMS", "TrustServerCertificate=yes"),
@@ -81,6 +105,40 @@ else:
         }
     }
 
+# Read replicas (optional): comma-separated SQLite file names or MSSQL hosts
+# that share the primary's credentials. Reports, schedule and list/retrieve
+# reads go to them; see common/replicas.py.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(filter(None, os.getenv("DB_REPLICAS", "").split(",")), 1):
+    alias = f"replica{number}"
+    if db_engine == "sqlite":
+        location = {"NAME": BASE_DIR / replica.strip()}
+    else:
+        location = {"HOST": replica.strip()}
+    DATABASES[alias] = {**DATABASES["default"], **location, "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(alias)
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["common.replicas.ReplicaRouter"]
+# After a write the user reads from the primary for this long; should exceed
+# the replication lag.
+REPLICA_LAG_SECONDS = int(os.getenv("DB_REPLICA_LAG_SECONDS", "5"))
+
+# A shared cache (Redis) is needed for cross-process invalidation when running
+# several workers; the local-memory default is enough for a single process.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -98,11 +156,15 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.StatelessJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "common.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_PAGINATION_CLASS": "common.pagination.StandardResultsSetPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_FILTER_BACKENDS": [
@@ -116,8 +178,44 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_USER_CLASS": "apps.users.authentication.RoleTokenUser",
 }
 
+# Seconds between checks of the shared status registry version.
+STATUS_REGISTRY_CHECK_INTERVAL = int(os.getenv("STATUS_REGISTRY_CHECK_INTERVAL", "5"))
+
+# The change stream polls the log this often. An async (ASGI) stream stays
+# open up to CHANGE_STREAM_MAX_SECONDS; a sync one holds a WSGI worker, so it
+# is a long poll that ends after CHANGE_STREAM_WSGI_SECONDS or on the first
+# changes.
+CHANGE_STREAM_POLL_SECONDS = float(os.getenv("CHANGE_STREAM_POLL_SECONDS", "1"))
+CHANGE_STREAM_MAX_SECONDS = int(os.getenv("CHANGE_STREAM_MAX_SECONDS", "300"))
+CHANGE_STREAM_WSGI_SECONDS = int(os.getenv("CHANGE_STREAM_WSGI_SECONDS", "25"))
+
+# manage.py archive_appointments prunes change log entries older than this;
+# clients that are further behind get 410 from the feed and reload.
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+
+# Completed and cancelled appointments older than this many days may be moved
+# to the archive table (manage.py archive_appointments, apps/appointments/archive.py).
+# Lowering it is safe; raising it after archiving hides archived rows from reports.
+APPOINTMENT_ARCHIVE_AFTER_DAYS = int(os.getenv("APPOINTMENT_ARCHIVE_AFTER_DAYS", "365"))
+
+# Serve the schedule, report and patient lookup endpoints with async views
+# (apps/*/async_views.py). Meant for the ASGI deployment, see DEPLOY_ASGI.md.
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "False") == "True"
+
+# Responses of at least this many bytes are gzip-compressed for clients
+# that accept it (common.middleware.CompressionMiddleware).
+GZIP_MIN_LENGTH = int(os.getenv("GZIP_MIN_LENGTH", "1024"))
+
+# Request instrumentation (common.middleware.PerformanceMiddleware).
+PERF_SERVER_TIMING = os.getenv("PERF_SERVER_TIMING", "True") == "True"
+PERF_SLOW_REQUEST_MS = int(os.getenv("PERF_SLOW_REQUEST_MS", "500"))
+
+# Working hours (weekday, start, end) assumed for doctors without DoctorWorkingHours rows.
+SCHEDULE_DEFAULT_WORKING_HOURS = [(weekday, "09:00", "18:00") for weekday in range(5)]
+
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ORIGINS", "").split(",") if os.getenv("CORS_ORIGINS") else []
 CSRF_TRUSTED_ORIGINS = CORS_ALLOWED_ORIGINS
 
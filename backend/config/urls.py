@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from common.views import MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/auth/", include("apps.users.urls")),
@@ -9,5 +11,6 @@ urlpatterns = [
     path("api/appointments/", include("apps.appointments.urls")),
     path("api/schedule/", include("apps.appointments.schedule_urls")),
     path("api/reports/", include("apps.appointments.report_urls")),
+    path("api/_metrics", MetricsView.as_view(), name="metrics"),
 ]
 
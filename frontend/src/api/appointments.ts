@@ -1,3 +1,4 @@
+import { isAxiosError } from 'axios'
 import { apiClient } from './client'
 
 export interface AppointmentStatus {
@@ -34,6 +35,56 @@ export interface ScheduleParams {
   doctor_id?: number
 }
 
+export interface ScheduleGridParams {
+  from: string
+  to: string
+  doctor_ids?: number[]
+}
+
+// Columnar week/month grid: appointments are parallel arrays of indexes into
+// dates/doctors/patients/statuses; start/end are minutes since midnight.
+export interface ScheduleGrid {
+  dates: string[]
+  doctors: { id: number; name: string }[]
+  patients: { id: number; name: string }[]
+  statuses: AppointmentStatus[]
+  appointments: {
+    id: number[]
+    doctor: number[]
+    date: number[]
+    start: number[]
+    end: number[]
+    status: number[]
+    patient: number[]
+  }
+}
+
+export interface AppointmentSeries {
+  id: number
+  patient: number
+  doctor: number
+  date_start: string
+  interval_weeks: number // 1-4
+  count: number | null // exactly one of count and until
+  until: string | null
+  time_start: string
+  time_end: string
+  note?: string
+  created_at?: string
+}
+
+export interface AppointmentSeriesResult {
+  series: AppointmentSeries | null
+  created: { date: string; id: number }[]
+  conflicts: {
+    date: string
+    time_start: string
+    time_end: string
+    error: string
+    suggestion: { date: string; time_start: string; time_end: string } | null
+  }[]
+}
+
 export const appointmentsApi = {
   list: async (date?: string, page?: number): Promise<AppointmentListResponse> => {
     const params = new URLSearchParams()
@@ -69,5 +120,28 @@ export const appointmentsApi = {
     const response = await apiClient.get<Appointment[]>(`/schedule/?${searchParams.toString()}`)
     return response.data
   },
+
+  getScheduleGrid: async (params: ScheduleGridParams): Promise<ScheduleGrid> => {
+    const searchParams = new URLSearchParams({ from: params.from, to: params.to })
+    if (params.doctor_ids?.length) searchParams.append('doctor_ids', params.doctor_ids.join(','))
+    const response = await apiClient.get<ScheduleGrid>(`/schedule/grid/?${searchParams.toString()}`)
+    return response.data
+  },
+
+  // Books the free occurrences; conflicts come back with a suggested slot.
+  // 400 with only conflicts is a result too, not an error.
+  createSeries: async (
+    data: Omit<AppointmentSeries, 'id' | 'created_at'> & { all_or_nothing?: boolean }
+  ): Promise<AppointmentSeriesResult> => {
+    try {
+      const response = await apiClient.post<AppointmentSeriesResult>('/appointments/series/', data)
+      return response.data
+    } catch (error) {
+      if (isAxiosError(error) && error.response?.data?.conflicts) {
+        return error.response.data as AppointmentSeriesResult
+      }
+      throw error
+    }
+  },
 }
 
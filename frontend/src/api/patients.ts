@@ -1,4 +1,5 @@
 import { apiClient } from './client'
+import type { AppointmentListResponse } from './appointments'
 
 export interface Patient {
   id: number
@@ -19,6 +20,15 @@ export interface PatientListResponse {
   results: Patient[]
 }
 
+export interface PatientImportResult {
+  rows: number
+  created: number
+  updated: number
+  duplicates: number
+  rejected: number
+  rejects: { row: number; errors: Record<string, string[]> }[]
+}
+
 export const patientsApi = {
   list: async (search?: string, page?: number): Promise<PatientListResponse> => {
     const params = new URLSearchParams()
@@ -45,6 +55,24 @@ export const patientsApi = {
     return response.data
   },
 
+  // All of the patient's appointments, archived ones included, newest first.
+  history: async (id: number, page?: number): Promise<AppointmentListResponse> => {
+    const params = page ? `?page=${page}` : ''
+    const response = await apiClient.get<AppointmentListResponse>(`/patients/${id}/history/${params}`)
+    return response.data
+  },
+
+  // Upsert patients from a CSV/XLSX file; phones are the key.
+  importFile: async (file: File, encoding?: string): Promise<PatientImportResult> => {
+    const form = new FormData()
+    form.append('file', file)
+    if (encoding) form.append('encoding', encoding)
+    const response = await apiClient.post<PatientImportResult>('/patients/import/', form, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    })
+    return response.data
+  },
+
   delete: async (id: number): Promise<void> => {
     await apiClient.delete(`/patients/${id}/`)
   },